@@ -2,12 +2,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import AuthPrincipal, principal_cache
 from app.core.config import settings
-from app.core.database import get_db
-from app.crud.user import get_by_id
-from app.models.user import User
+from app.core.database import get_async_db
+from app.crud.aio.user import get_by_id
 from app.schemas.user import TokenPayload
 
 # Схема OAuth2 для получения токена
@@ -15,10 +15,10 @@ oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> AuthPrincipal:
     """
     Получение текущего пользователя по токену
     """
@@ -39,18 +39,25 @@ def get_current_user(
             detail="Неверный идентификатор пользователя"
         )
 
-    user = get_by_id(db, user_id=token_data.sub)
+    # Соединение с БД берется только при промахе кэша
+    principal = principal_cache.get(token_data.sub)
+    if principal is not None:
+        return principal
+
+    user = await get_by_id(db, user_id=token_data.sub)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Пользователь не найден"
         )
-    return user
+    principal = AuthPrincipal.from_user(user)
+    principal_cache.put(principal)
+    return principal
 
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+async def get_current_active_user(
+    current_user: AuthPrincipal = Depends(get_current_user),
+) -> AuthPrincipal:
     """
     Получение текущего активного пользователя
     """
@@ -62,9 +69,9 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_admin_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+async def get_current_admin_user(
+    current_user: AuthPrincipal = Depends(get_current_active_user),
+) -> AuthPrincipal:
     """
     Получение текущего пользователя с правами администратора
     """
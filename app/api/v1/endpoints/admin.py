@@ -0,0 +1,50 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_admin_user
+from app.core.auth_cache import AuthPrincipal, principal_cache
+from app.core.bloom import view_dedup
+from app.core.database import get_read_db, pool_stats
+from app.core.password_pool import password_pool
+from app.core.content_store import pack_store
+from app.core.periodic import content_pack_compactor, tag_usage_reconciler
+from app.core.view_buffer import view_buffer
+from app.crud.aio import content as content_crud
+from app.schemas.admin import ContentStatsResponse, MetricsResponse
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=MetricsResponse)
+async def read_metrics(
+    current_user: AuthPrincipal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Метрики пулов соединений, кэшей и фоновых компонентов (только для администраторов).
+    """
+    return {
+        "pools": pool_stats(),
+        "view_buffer": view_buffer.stats(),
+        "view_dedup": view_dedup.stats(),
+        "auth_cache": principal_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "tag_usage_reconciler": tag_usage_reconciler.stats(),
+        "content_pack": pack_store.stats(),
+        "content_pack_compactor": content_pack_compactor.stats(),
+    }
+
+
+@router.get("/content-stats", response_model=ContentStatsResponse)
+async def read_content_stats(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthPrincipal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Статистика дедупликации содержимого фрагментов (только для администраторов).
+
+    dedup_ratio - отношение объема содержимого всех фрагментов к объему,
+    хранящемуся в content_blobs; inline_fragments - еще не перенесенные
+    командой dedup-content фрагменты.
+    """
+    return await content_crud.stats(db)
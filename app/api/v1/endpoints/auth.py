@@ -3,26 +3,26 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import create_access_token
-from app.crud import user as user_crud
+from app.crud.aio import user as user_crud
 from app.schemas.user import Token
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(get_db),
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     Получение токена доступа для пользователя (OAuth2 совместимый)
     """
     # Попытка аутентификации пользователя
-    user = user_crud.authenticate(
+    user = await user_crud.authenticate(
         db=db, email=form_data.username, password=form_data.password
     )
     if not user:
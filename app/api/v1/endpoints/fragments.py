@@ -1,39 +1,51 @@
-from typing import Any, List, Optional
+import tempfile
+from datetime import date
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from sqlalchemy.orm import Session
-
-from app.api.deps import get_current_active_user
-from app.core.database import get_db
-from app.crud import fragment as fragment_crud
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user, get_current_admin_user
+from app.core.auth_cache import AuthPrincipal
+from app.core.bloom import is_repeat_view
+from app.core.config import settings
+from app.core.database import get_async_db, get_read_db, get_write_db
+from app.core.fast_json import FastJSONResponse
+from app.core.http_cache import PRIVATE_CACHE_CONTROL, cache_headers, is_not_modified, make_etag
+from app.core.ndjson import dumps_line, gzip_json_array_chunks, iter_lines, ndjson_chunks
+from app.core.view_buffer import view_buffer
+from app.crud.aio import fragment as fragment_crud
+from app.crud.aio import view as view_crud
 # from app.models.fragment import Fragment
-from app.models.user import User
 from app.schemas.fragment import (
     FragmentCreate,
     FragmentListResponse,
     FragmentResponse,
     FragmentUpdate,
+    FragmentViewStats,
 )
-from app.schemas.tag import TagResponse
-from app.schemas.user import UserPublic
 
 router = APIRouter()
 
 
 @router.post("/", response_model=FragmentResponse, status_code=status.HTTP_201_CREATED)
-def create_fragment(
+async def create_fragment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     fragment_in: FragmentCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Создание нового фрагмента кода.
     """
-    fragment = fragment_crud.create(db, fragment_create=fragment_in, author_id=current_user.id)
+    fragment = await fragment_crud.create(db, fragment_create=fragment_in, author_id=current_user.id)
 
     # Получаем фрагмент с дополнительной информацией для ответа
-    fragment_with_info = fragment_crud.get_by_id(
+    fragment_with_info = await fragment_crud.get_by_id(
         db, fragment_id=fragment.id, current_user_id=current_user.id
     )
 
@@ -43,13 +55,129 @@ def create_fragment(
             detail="Фрагмент не найден"
         )
 
-    return prepare_fragment_response(db, fragment_with_info, current_user.id)
+    return FastJSONResponse(
+        fragment_record(fragment_with_info, current_user.id), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post("/bulk")
+async def bulk_import_fragments(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(get_write_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
+) -> Any:
+    """
+    Массовый импорт фрагментов из тела в формате NDJSON.
+
+    Каждая строка - объект FragmentCreate. Тело читается потоком, фрагменты
+    сохраняются пачками по BULK_IMPORT_BATCH_SIZE в отдельных транзакциях.
+    Ответ - NDJSON: результат для каждой непустой строки
+    ({"line", "status": "created", "id"} или {"line", "status": "error",
+    "detail"}) и последней строкой {"summary": {...}}.
+    """
+    # Результаты копятся во временном файле: в памяти - не больше BULK_IMPORT_SPOOL_SIZE
+    results = tempfile.SpooledTemporaryFile(max_size=settings.BULK_IMPORT_SPOOL_SIZE)
+    summary = {"lines": 0, "created": 0, "failed": 0}
+    batch: List[Tuple[int, FragmentCreate]] = []
+
+    def write_result(result: Dict[str, Any]) -> None:
+        results.write(dumps_line(result))
+        summary["created" if result["status"] == "created" else "failed"] += 1
+
+    async def save_batch() -> None:
+        try:
+            ids = await fragment_crud.create_bulk(
+                db, fragments_create=[item for _, item in batch], author_id=current_user.id
+            )
+        except SQLAlchemyError as e:
+            for line_no, _ in batch:
+                write_result({"line": line_no, "status": "error", "detail": str(getattr(e, "orig", None) or e)})
+        else:
+            for (line_no, _), fragment_id in zip(batch, ids):
+                write_result({"line": line_no, "status": "created", "id": fragment_id})
+        batch.clear()
+
+    line_no = 0
+    async for line in iter_lines(request.stream(), settings.BULK_IMPORT_MAX_LINE_BYTES):
+        line_no += 1
+        if line is None:
+            write_result({"line": line_no, "status": "error", "detail": "Слишком длинная строка"})
+            continue
+        if not line.strip():
+            continue
+        try:
+            batch.append((line_no, FragmentCreate.model_validate_json(line)))
+        except ValidationError as e:
+            write_result({"line": line_no, "status": "error", "detail": _validation_detail(e)})
+            continue
+        if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            await save_batch()
+    if batch:
+        await save_batch()
+
+    summary["lines"] = summary["created"] + summary["failed"]
+    results.write(dumps_line({"summary": summary}))
+    results.seek(0)
+    return StreamingResponse(_iter_file(results), media_type="application/x-ndjson")
+
+
+@router.get("/export")
+async def export_fragments(
+    db: AsyncSession = Depends(get_read_db),
+    format: Literal["ndjson", "json.gz"] = "ndjson",
+    author_id: Optional[int] = None,
+    language: Optional[str] = None,
+    tag: Optional[str] = None,
+    liked_by_user: Optional[int] = None,
+    search: Optional[str] = None,
+    search_mode: Literal["fulltext", "code", "substring", "regex"] = "fulltext",
+    include_private: bool = True,
+    current_user: AuthPrincipal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Потоковая выгрузка фрагментов (только для администраторов).
+
+    Фильтры - как у списка фрагментов. Строки читаются из курсора БД пачками
+    по EXPORT_BATCH_SIZE, поэтому потребление памяти не зависит от объема.
+    format=ndjson - по одной записи на строку, format=json.gz - JSON-массив,
+    сжатый gzip. Записи совместимы с массовым импортом (/fragments/bulk).
+    """
+    try:
+        statement = await fragment_crud.export_query(
+            db,
+            filter_author_id=author_id,
+            filter_language=language,
+            filter_tag=tag,
+            filter_liked_by_user=liked_by_user,
+            search_query=search,
+            include_private=include_private,
+            search_mode=search_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    records = _export_records(db, statement)
+    if format == "json.gz":
+        return StreamingResponse(
+            gzip_json_array_chunks(records),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="fragments.json.gz"'},
+        )
+    return StreamingResponse(
+        ndjson_chunks(records),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="fragments.ndjson"'},
+    )
 
 
 @router.get("/", response_model=FragmentListResponse)
-def read_fragments(
+async def read_fragments(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 20,
     author_id: Optional[int] = None,
@@ -57,11 +185,45 @@ def read_fragments(
     tag: Optional[str] = None,
     liked_by_user: Optional[int] = None,
     search: Optional[str] = None,
+    search_mode: Literal["fulltext", "code", "substring", "regex"] = "fulltext",
+    sort: Literal["new", "relevance"] = "new",
     include_private: bool = False,
-    current_user: Optional[User] = Depends(get_current_active_user),
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    view: Literal["full", "summary"] = "full",
+    current_user: Optional[AuthPrincipal] = Depends(get_current_active_user),
 ) -> Any:
     """
     Получение списка фрагментов кода с возможностью фильтрации.
+
+    view=summary не загружает содержимое фрагментов: вместо content в ответе
+    content_preview (первые строки) и line_count.
+
+    Ответ содержит ETag: при совпадении с If-None-Match возвращается 304
+    без построения ответа.
+
+    Пагинация:
+    - pagination=offset (по умолчанию) - постранично через skip/limit,
+      общее количество total считается;
+    - pagination=cursor - переход по курсору без OFFSET: первая страница
+      запрашивается без cursor, следующая - с cursor из поля next_cursor
+      предыдущего ответа (next_cursor = null, если страниц больше нет).
+      Передача cursor сама по себе включает этот режим. По умолчанию total
+      не считается и возвращается как null.
+
+    include_total явно включает или отключает подсчет total в любом режиме.
+
+    sort=relevance вместе с search упорядочивает результаты по релевантности
+    поиска (только в режиме pagination=offset).
+
+    search_mode=code ищет по индексу идентификаторов: getUserById и
+    parse_config разбиваются на части, операторы вроде -> и :: сохраняются,
+    все слова запроса обязательны, релевантность - BM25.
+    search_mode=substring ищет точную подстроку в содержимом (например,
+    json.loads( ), search_mode=regex - регулярное выражение, содержащее
+    литерал от 3 символов, без вложенных повторений и обратных ссылок.
+    Регистр не учитывается.
     """
     # Получаем IP-адрес для анонимных пользователей
     # client_host = request.client.host if request.client else None
@@ -72,41 +234,87 @@ def read_fragments(
     # Получаем ID текущего пользователя (если есть)
     current_user_id = current_user.id if current_user else None
 
-    fragments, total = fragment_crud.get_multi(
-        db=db,
-        skip=skip,
-        limit=limit,
-        current_user_id=current_user_id,
-        filter_author_id=author_id,
-        filter_language=language,
-        filter_tag=tag,
-        filter_liked_by_user=liked_by_user,
-        search_query=search,
-        include_private=admin_view,
-    )
+    cursor_mode = pagination == "cursor" or cursor is not None
+    if include_total is None:
+        include_total = not cursor_mode
+
+    try:
+        fragments, total = await fragment_crud.get_multi(
+            db=db,
+            skip=skip,
+            # В режиме курсора берем одну лишнюю запись, чтобы узнать, есть ли еще страницы
+            limit=limit + 1 if cursor_mode else limit,
+            current_user_id=current_user_id,
+            filter_author_id=author_id,
+            filter_language=language,
+            filter_tag=tag,
+            filter_liked_by_user=liked_by_user,
+            search_query=search,
+            include_private=admin_view,
+            cursor=(cursor or "") if cursor_mode else None,
+            with_total=include_total,
+            sort=sort,
+            search_mode=search_mode,
+            summary=view == "summary",
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # Курсор следующей страницы (только в режиме курсора и если есть еще записи)
+    next_cursor = None
+    if cursor_mode and limit > 0 and len(fragments) > limit:
+        fragments = fragments[:limit]
+        next_cursor = fragment_crud.encode_cursor(fragments[-1]["fragment"])
+
+    # Версия страницы: параметры запроса, total, курсор и версии фрагментов
+    versions = [fragment_crud.fragment_version(fragment_data, current_user_id) for fragment_data in fragments]
+    etag = make_etag([
+        sorted(request.query_params.multi_items()),
+        total,
+        next_cursor,
+        [version["version"] for version in versions],
+    ])
+    headers = cache_headers(etag, _cache_control(all(version["is_public"] for version in versions)))
+    if is_not_modified(request.headers, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
     # Подготавливаем ответ
+    record = fragment_summary_record if view == "summary" else fragment_record
     fragment_responses = [
-        prepare_fragment_response(db, fragment_data, current_user_id)
+        record(fragment_data, current_user_id)
         for fragment_data in fragments
     ]
 
-    return {
-        "items": fragment_responses,
-        "total": total
-    }
+    return FastJSONResponse(
+        {
+            "items": fragment_responses,
+            "total": total,
+            "next_cursor": next_cursor
+        },
+        headers=headers,
+    )
 
 
 @router.get("/{fragment_id}", response_model=FragmentResponse)
-def read_fragment(
+async def read_fragment(
     *,
     request: Request,
     fragment_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    # Просмотр пишется в основную БД (соединение берется только при записи)
+    primary_db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[AuthPrincipal] = Depends(get_current_active_user),
 ) -> Any:
     """
     Получение фрагмента кода по ID.
+
+    Ответ содержит ETag и Last-Modified. Запрос с If-None-Match сначала
+    проверяет версию фрагмента без загрузки содержимого; если фрагмент не
+    изменился - ответ 304. If-Modified-Since не проверяется: Last-Modified
+    не учитывает счетчики. Просмотр учитывается в обоих случаях.
     """
     # Получаем IP-адрес для учета просмотров
     client_host = request.client.host if request.client else None
@@ -114,7 +322,20 @@ def read_fragment(
     # Получаем ID текущего пользователя (если есть)
     current_user_id = current_user.id if current_user else None
 
-    fragment_data = fragment_crud.get_by_id(
+    if "if-none-match" in request.headers:
+        version = await fragment_crud.get_version(
+            db, fragment_id=fragment_id, current_user_id=current_user_id
+        )
+        if version is not None:
+            etag = make_etag(version["version"])
+            if is_not_modified(request.headers, etag):
+                await _record_view(primary_db, fragment_id, current_user_id, client_host)
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=cache_headers(etag, _cache_control(version["is_public"]), version["last_modified"]),
+                )
+
+    fragment_data = await fragment_crud.get_by_id(
         db, fragment_id=fragment_id, current_user_id=current_user_id
     )
 
@@ -135,29 +356,65 @@ def read_fragment(
             detail="Нет доступа к этому фрагменту"
         )
 
-    # Учитываем просмотр
-    fragment_crud.add_view(
-        db,
-        fragment_id=fragment_id,
-        user_id=current_user_id,
-        ip_address=client_host
+    version = fragment_crud.fragment_version(fragment_data, current_user_id)
+    headers = cache_headers(
+        make_etag(version["version"]), _cache_control(version["is_public"]), version["last_modified"]
     )
 
-    return prepare_fragment_response(db, fragment_data, current_user_id)
+    # Ответ строится до учета просмотра: коммит просмотра сбрасывает
+    # загруженные связи, и автор с тегами загружались бы заново по одному
+    result = FastJSONResponse(fragment_record(fragment_data, current_user_id), headers=headers)
+    await _record_view(primary_db, fragment_id, current_user_id, client_host)
+    return result
+
+
+@router.get("/{fragment_id}/views", response_model=FragmentViewStats)
+async def read_fragment_views(
+    *,
+    fragment_id: int,
+    since: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
+) -> Any:
+    """
+    Статистика просмотров фрагмента по дням (только для автора и администраторов).
+    """
+    fragment_data = await fragment_crud.get_by_id(
+        db, fragment_id=fragment_id, current_user_id=current_user.id
+    )
+
+    if not fragment_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Фрагмент не найден"
+        )
+
+    fragment = fragment_data["fragment"]
+    if fragment.author_id != current_user.id and not bool(current_user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав для просмотра статистики"
+        )
+
+    items = await view_crud.get_daily_views(db, fragment_id=fragment_id, since=since)
+    return {
+        "items": items,
+        "total": sum(item["views"] for item in items)
+    }
 
 
 @router.put("/{fragment_id}", response_model=FragmentResponse)
-def update_fragment(
+async def update_fragment(
     *,
     fragment_id: int,
     fragment_in: FragmentUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Обновление фрагмента кода.
     """
-    fragment_data = fragment_crud.get_by_id(
+    fragment_data = await fragment_crud.get_by_id(
         db, fragment_id=fragment_id, current_user_id=current_user.id
     )
 
@@ -177,12 +434,12 @@ def update_fragment(
         )
 
     # Обновляем фрагмент
-    updated_fragment = fragment_crud.update(
+    updated_fragment = await fragment_crud.update(
         db, db_fragment=fragment, fragment_update=fragment_in
     )
 
     # Получаем обновленный фрагмент с дополнительной информацией
-    fragment_data = fragment_crud.get_by_id(
+    fragment_data = await fragment_crud.get_by_id(
         db, fragment_id=updated_fragment.id, current_user_id=current_user.id
     )
 
@@ -192,20 +449,20 @@ def update_fragment(
             detail="Фрагмент не найден"
         )
 
-    return prepare_fragment_response(db, fragment_data, current_user.id)
+    return FastJSONResponse(fragment_record(fragment_data, current_user.id))
 
 
 @router.delete("/{fragment_id}")
-def delete_fragment(
+async def delete_fragment(
     *,
     fragment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Удаление фрагмента кода.
     """
-    fragment_data = fragment_crud.get_by_id(
+    fragment_data = await fragment_crud.get_by_id(
         db, fragment_id=fragment_id, current_user_id=current_user.id
     )
 
@@ -225,48 +482,123 @@ def delete_fragment(
         )
 
     # Удаляем фрагмент
-    fragment_crud.delete(db, db_fragment=fragment)
+    await fragment_crud.delete(db, db_fragment=fragment)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 # Вспомогательная функция для подготовки ответа
-def prepare_fragment_response(db: Session, fragment_data: dict[str, Any], current_user_id: Optional[int]) -> FragmentResponse:
-    """Подготовка полного ответа с информацией о фрагменте"""
-    fragment = fragment_data["fragment"]
+def _validation_detail(error: ValidationError) -> str:
+    """Краткое описание ошибок проверки строки импорта"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'body'}: {item['msg']}"
+        for item in error.errors()
+    )
+
 
-    # Явно создаем объект UserPublic из модели User
-    author_data = UserPublic(
-        id=fragment.author.id,
-        username=fragment.author.username,
-        bio=fragment.author.bio,
-        created_at=fragment.author.created_at
+def _cache_control(is_public: bool) -> str:
+    """Политика кэширования ответа: настраиваемая для публичных фрагментов"""
+    return settings.PUBLIC_FRAGMENT_CACHE_CONTROL if is_public else PRIVATE_CACHE_CONTROL
+
+
+async def _record_view(
+    primary_db: AsyncSession, fragment_id: int, user_id: Optional[int], ip_address: Optional[str]
+) -> None:
+    """Учет просмотра фрагмента"""
+    # Повторный просмотр тем же пользователем (IP) в пределах окна не учитывается
+    if is_repeat_view(fragment_id, user_id=user_id, ip_address=ip_address):
+        return
+
+    # При запущенном буфере запись выполняется в фоне
+    if view_buffer.running:
+        view_buffer.record(fragment_id, user_id=user_id, ip_address=ip_address)
+        return
+
+    await fragment_crud.add_view(
+        primary_db,
+        fragment_id=fragment_id,
+        user_id=user_id,
+        ip_address=ip_address
     )
 
-    # Явно создаем список объектов TagResponse из моделей Tag
-    tags_data: List[TagResponse] = []
-    for tag in fragment.tags:
-        tag_response = TagResponse(
-            id=tag.id,
-            name=tag.name,
-            created_at=tag.created_at
-        )
-        tags_data.append(tag_response)
-
-    # Создаем объект FragmentResponse
-    return FragmentResponse(
-        id=fragment.id,
-        title=fragment.title,
-        content=fragment.content,
-        language=fragment.language,
-        description=fragment.description,
-        is_public=fragment.is_public,
-        author_id=fragment.author_id,
-        created_at=fragment.created_at,
-        updated_at=fragment.updated_at,
-        likes_count=fragment_data["likes_count"],
-        views_count=fragment_data["views_count"],
-        is_liked_by_current_user=fragment_data["is_liked_by_current_user"] if current_user_id else None,
-        author=author_data,
-        tags=tags_data
+
+async def _export_records(db: AsyncSession, statement: Select) -> AsyncIterator[Dict[str, Any]]:
+    """Записи выгрузки из серверного курсора БД"""
+    result = await db.stream(
+        statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
     )
+    async for fragment in result.scalars():
+        yield fragment_crud.export_record(fragment)
+
+
+def _iter_file(file: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Чтение файла частями с закрытием по завершении"""
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+def _author_and_tags(fragment: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Автор и теги фрагмента для ответа (поля UserPublic и TagResponse)"""
+    author = fragment.author
+    author_data = {
+        "id": author.id,
+        "username": author.username,
+        "bio": author.bio,
+        "created_at": author.created_at,
+    }
+    tags_data = [
+        {"name": tag.name, "id": tag.id, "created_at": tag.created_at, "usage_count": tag.usage_count}
+        for tag in fragment.tags
+    ]
+    return author_data, tags_data
+
+
+def fragment_record(fragment_data: Dict[str, Any], current_user_id: Optional[int]) -> Dict[str, Any]:
+    """Полный ответ о фрагменте (поля FragmentResponse) из загруженных строк.
+
+    Словарь кодируется FastJSONResponse без повторной проверки по схеме.
+    """
+    fragment = fragment_data["fragment"]
+    author_data, tags_data = _author_and_tags(fragment)
+    return {
+        "title": fragment.title,
+        "content": fragment.content,
+        "language": fragment.language,
+        "description": fragment.description,
+        "is_public": fragment.is_public,
+        "id": fragment.id,
+        "author_id": fragment.author_id,
+        "created_at": fragment.created_at,
+        "updated_at": fragment.updated_at,
+        "author": author_data,
+        "tags": tags_data,
+        "likes_count": fragment_data["likes_count"],
+        "views_count": fragment_data["views_count"],
+        "is_liked_by_current_user": fragment_data["is_liked_by_current_user"] if current_user_id else None,
+    }
+
+
+def fragment_summary_record(fragment_data: Dict[str, Any], current_user_id: Optional[int]) -> Dict[str, Any]:
+    """Краткий ответ о фрагменте (поля FragmentSummaryResponse), без содержимого"""
+    fragment = fragment_data["fragment"]
+    author_data, tags_data = _author_and_tags(fragment)
+    return {
+        "id": fragment.id,
+        "title": fragment.title,
+        "content_preview": fragment.content_preview,
+        "line_count": fragment.line_count,
+        "language": fragment.language,
+        "description": fragment.description,
+        "is_public": fragment.is_public,
+        "author_id": fragment.author_id,
+        "created_at": fragment.created_at,
+        "updated_at": fragment.updated_at,
+        "author": author_data,
+        "tags": tags_data,
+        "likes_count": fragment_data["likes_count"],
+        "views_count": fragment_data["views_count"],
+        "is_liked_by_current_user": fragment_data["is_liked_by_current_user"] if current_user_id else None,
+    }
@@ -1,28 +1,28 @@
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_active_user
-from app.core.database import get_db
-from app.crud import fragment as fragment_crud, like as like_crud
-from app.models.user import User
+from app.core.auth_cache import AuthPrincipal
+from app.core.database import get_write_db
+from app.crud.aio import fragment as fragment_crud, like as like_crud
 
 router = APIRouter()
 
 
 @router.post("/{fragment_id}")
-def like_fragment(
+async def like_fragment(
     *,
     fragment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Поставить лайк фрагменту кода.
     """
     # Проверяем, существует ли фрагмент
-    fragment_data = fragment_crud.get_by_id(
+    fragment_data = await fragment_crud.get_by_id(
         db, fragment_id=fragment_id, current_user_id=current_user.id
     )
 
@@ -46,23 +46,23 @@ def like_fragment(
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     # Добавляем лайк
-    like_crud.create(db, fragment_id=fragment_id, user_id=current_user.id)
+    await like_crud.create(db, fragment_id=fragment_id, user_id=current_user.id)
 
     return Response(status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/{fragment_id}")
-def unlike_fragment(
+async def unlike_fragment(
     *,
     fragment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Удалить лайк с фрагмента кода.
     """
     # Проверяем, существует ли фрагмент
-    fragment_data = fragment_crud.get_by_id(
+    fragment_data = await fragment_crud.get_by_id(
         db, fragment_id=fragment_id, current_user_id=current_user.id
     )
 
@@ -77,11 +77,11 @@ def unlike_fragment(
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     # Удаляем лайк
-    like = like_crud.get_by_fragment_and_user(
+    like = await like_crud.get_by_fragment_and_user(
         db, fragment_id=fragment_id, user_id=current_user.id
     )
 
     if like:
-        like_crud.delete(db, db_like=like)
+        await like_crud.delete(db, db_like=like)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,28 +1,31 @@
-from typing import Any, Optional
+from typing import Any, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_admin_user
-from app.core.database import get_db
-from app.crud import tag as tag_crud
-from app.models.user import User
-from app.schemas.tag import TagCreate, TagListResponse, TagResponse
+from app.core.auth_cache import AuthPrincipal
+from app.core.database import get_read_db, get_write_db
+from app.crud.aio import tag as tag_crud
+from app.schemas.tag import TagCreate, TagListResponse, TagResponse, TagSuggestResponse
 
 router = APIRouter()
 
 @router.get("/", response_model=TagListResponse)
-def read_tags(
-    db: Session = Depends(get_db),
+async def read_tags(
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
+    sort: Literal["name", "popular"] = "name",
 ) -> Any:
     """
     Получение списка тегов с возможностью поиска.
+
+    sort=popular упорядочивает теги по числу фрагментов (usage_count).
     """
-    tags, total = tag_crud.get_multi(
-        db=db, skip=skip, limit=limit, search=search
+    tags, total = await tag_crud.get_multi(
+        db=db, skip=skip, limit=limit, search=search, sort=sort
     )
 
     return {
@@ -31,45 +34,74 @@ def read_tags(
     }
 
 
+@router.get("/popular", response_model=List[TagResponse])
+async def read_popular_tags(
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Самые используемые теги (облако тегов).
+    """
+    return await tag_crud.get_popular(db, limit=limit)
+
+
+@router.get("/suggest", response_model=TagSuggestResponse)
+async def suggest_tags(
+    db: AsyncSession = Depends(get_read_db),
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+) -> Any:
+    """
+    Автодополнение тегов по префиксу имени, самые используемые - первыми.
+    """
+    suggestions = await tag_crud.suggest(db, prefix=prefix, limit=limit)
+    return {
+        "items": [
+            {"name": name, "usage_count": usage}
+            for name, usage in suggestions
+        ]
+    }
+
+
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
-def create_tag(
+async def create_tag(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     tag_in: TagCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthPrincipal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Создание нового тега (только для администраторов).
     """
     # Проверяем, существует ли уже тег с таким названием
-    existing_tag = tag_crud.get_by_name(db, name=tag_in.name)
+    existing_tag = await tag_crud.get_by_name(db, name=tag_in.name)
     if existing_tag:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Тег с таким названием уже существует"
         )
 
-    tag = tag_crud.create(db, tag_create=tag_in)
+    tag = await tag_crud.create(db, tag_create=tag_in)
     return tag
 
 
 @router.delete("/{tag_id}")
-def delete_tag(
+async def delete_tag(
     *,
     tag_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: AuthPrincipal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Удаление тега (только для администраторов).
     """
-    tag = tag_crud.get_by_id(db, tag_id=tag_id)
+    tag = await tag_crud.get_by_id(db, tag_id=tag_id)
     if not tag:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Тег не найден"
         )
 
-    tag_crud.delete(db, db_tag=tag)
+    await tag_crud.delete(db, db_tag=tag)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,28 +1,30 @@
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user, get_current_admin_user
-from app.core.database import get_db
+from app.core.auth_cache import AuthPrincipal
+from app.core.database import get_async_db, get_db
 from app.crud import user as user_crud
-from app.models.user import User
+from app.crud.aio import user as async_user_crud
 from app.schemas.user import UserCreate, UserPublic, UserUpdate
 
 router = APIRouter()
 
 
 @router.post("/", response_model=UserPublic, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: UserCreate,
 ) -> Any:
     """
     Регистрация нового пользователя.
     """
     # Проверяем, существует ли уже пользователь с таким email
-    user = user_crud.get_by_email(db, email=user_in.email)
+    user = await async_user_crud.get_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,7 +32,7 @@ def create_user(
         )
 
     # Проверяем, существует ли уже пользователь с таким username
-    user = user_crud.get_by_username(db, username=user_in.username)
+    user = await async_user_crud.get_by_username(db, username=user_in.username)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,33 +40,48 @@ def create_user(
         )
 
     # Создаем пользователя
-    user = user_crud.create(db, user_create=user_in)
+    user = await async_user_crud.create(db, user_create=user_in)
     return user
 
 
 @router.get("/me", response_model=UserPublic)
 def read_user_me(
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Получение информации о текущем пользователе.
     """
-    return current_user
+    # Зависимость возвращает только данные для проверки прав
+    user = user_crud.get_by_id(db, user_id=current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден",
+        )
+    return user
 
 
 @router.put("/me", response_model=UserPublic)
-def update_user_me(
+async def update_user_me(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthPrincipal = Depends(get_current_active_user),
 ) -> Any:
     """
     Обновление информации о текущем пользователе.
     """
+    db_user = await async_user_crud.get_by_id(db, user_id=current_user.id)
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден",
+        )
+
     # Проверка на уникальность email, если он изменяется
-    if user_in.email and user_in.email != current_user.email:
-        user = user_crud.get_by_email(db, email=user_in.email)
+    if user_in.email and user_in.email != db_user.email:
+        user = await async_user_crud.get_by_email(db, email=user_in.email)
         if user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,8 +89,8 @@ def update_user_me(
             )
 
     # Проверка на уникальность username, если он изменяется
-    if user_in.username and user_in.username != current_user.username:
-        user = user_crud.get_by_username(db, username=user_in.username)
+    if user_in.username and user_in.username != db_user.username:
+        user = await async_user_crud.get_by_username(db, username=user_in.username)
         if user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -81,7 +98,7 @@ def update_user_me(
             )
 
     # Обновляем пользователя
-    user = user_crud.update(db, db_user=current_user, user_update=user_in)
+    user = await async_user_crud.update(db, db_user=db_user, user_update=user_in)
     return user
 
 
@@ -106,7 +123,7 @@ def read_user_by_id(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthPrincipal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Удаление пользователя (только для администраторов).
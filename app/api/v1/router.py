@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import users, auth, fragments, tags, likes
+from app.api.v1.endpoints import users, auth, fragments, tags, likes, admin
 
 router = APIRouter()
 
@@ -10,3 +10,4 @@ router.include_router(users.router, prefix="/users", tags=["users"])
 router.include_router(fragments.router, prefix="/fragments", tags=["fragments"])
 router.include_router(tags.router, prefix="/tags", tags=["tags"])
 router.include_router(likes.router, prefix="/likes", tags=["likes"])
+router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.v1.endpoints.fragments import fragment_record
+from app.core.fast_json import FastJSONResponse
+from app.models.base import utcnow
+from app.models.fragment import Fragment
+from app.models.tag import Tag
+from app.models.user import User
+from app.schemas.fragment import FragmentListResponse, FragmentResponse
+from app.schemas.tag import TagResponse
+from app.schemas.user import UserPublic
+
+# Микробенчмарки без БД: данные строятся из несохраненных объектов моделей
+
+
+def _page(items: int) -> List[Dict[str, Any]]:
+    """Страница списка фрагментов (как ее возвращает crud.fragment.get_multi)"""
+    now = utcnow()
+    author = User(id=1, username="author", bio="Пишу код", created_at=now, updated_at=now)
+    tags = [Tag(id=i, name=f"tag{i}", created_at=now, usage_count=i * 10) for i in range(1, 4)]
+    page = []
+    for i in range(items):
+        fragment = Fragment(
+            title=f"Fragment {i}",
+            content="def handler(request):\n    return request.json()\n" * 20,
+            language="python",
+            description="Обработчик запроса",
+            is_public=True,
+        )
+        fragment.id = i + 1
+        fragment.author_id = author.id
+        fragment.created_at = fragment.updated_at = now - timedelta(minutes=i)
+        fragment.author = author
+        fragment.tags = tags
+        page.append({
+            "fragment": fragment,
+            "likes_count": i,
+            "views_count": i * 3,
+            "is_liked_by_current_user": i % 2 == 0,
+        })
+    return page
+
+
+def _pydantic_response(page: List[Dict[str, Any]], adapter: TypeAdapter) -> bytes:
+    """Прежний путь: схемы Pydantic вручную, проверка по response_model, json"""
+    items = []
+    for fragment_data in page:
+        fragment = fragment_data["fragment"]
+        items.append(FragmentResponse(
+            id=fragment.id,
+            title=fragment.title,
+            content=fragment.content,
+            language=fragment.language,
+            description=fragment.description,
+            is_public=fragment.is_public,
+            author_id=fragment.author_id,
+            created_at=fragment.created_at,
+            updated_at=fragment.updated_at,
+            likes_count=fragment_data["likes_count"],
+            views_count=fragment_data["views_count"],
+            is_liked_by_current_user=fragment_data["is_liked_by_current_user"],
+            author=UserPublic(
+                id=fragment.author.id,
+                username=fragment.author.username,
+                bio=fragment.author.bio,
+                created_at=fragment.author.created_at,
+            ),
+            tags=[
+                TagResponse(id=tag.id, name=tag.name, created_at=tag.created_at, usage_count=tag.usage_count)
+                for tag in fragment.tags
+            ],
+        ))
+    # Так FastAPI обрабатывает значение, возвращенное обработчиком
+    validated = adapter.validate_python(
+        {"items": items, "total": len(items), "next_cursor": None}, from_attributes=True
+    )
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def _fast_response(page: List[Dict[str, Any]]) -> bytes:
+    """Быстрый путь: словари из данных строк и FastJSONResponse"""
+    items = [fragment_record(fragment_data, current_user_id=1) for fragment_data in page]
+    return FastJSONResponse({"items": items, "total": len(items), "next_cursor": None}).body
+
+
+def _measure(render: Callable[[], bytes], rounds: int) -> float:
+    render()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    return (time.perf_counter() - start) / rounds
+
+
+def serialization(items: int = 100, rounds: int = 200) -> Dict[str, float]:
+    """Время сериализации страницы из items фрагментов, секунд на страницу"""
+    page = _page(items)
+    adapter = TypeAdapter(FragmentListResponse)
+    return {
+        "pydantic": _measure(lambda: _pydantic_response(page, adapter), rounds),
+        "fast": _measure(lambda: _fast_response(page), rounds),
+    }
@@ -0,0 +1,200 @@
+# app/cli.py
+"""Служебные команды обслуживания базы данных.
+
+Запуск: python -m app.cli <команда> [параметры]
+
+При обновлении существующей БД сначала выполняется migrate (добавляет
+новые колонки и индексы), затем пересчетные команды, например
+reconcile-counters для заполнения денормализованных счетчиков.
+"""
+import argparse
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.migrations import upgrade_schema
+from app.core.security import calibrate_bcrypt_rounds
+from app.crud import content as content_crud
+from app.crud import fragment as fragment_crud
+from app.crud import tag as tag_crud
+from app.crud import trigram as trigram_crud
+from app.crud import view as view_crud
+
+
+def migrate(args: argparse.Namespace) -> None:
+    """Добавление недостающих таблиц, колонок и индексов"""
+    applied = upgrade_schema(engine)
+    for step in applied:
+        print(step)
+    print(f"Выполнено шагов: {len(applied)}")
+
+
+def reconcile_counters(args: argparse.Namespace) -> None:
+    """Пересчет денормализованных счетчиков лайков и просмотров"""
+    db = SessionLocal()
+    try:
+        fixed = fragment_crud.reconcile_counters(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Исправлено фрагментов: {fixed}")
+
+
+def reconcile_tag_usage(args: argparse.Namespace) -> None:
+    """Пересчет числа использований тегов"""
+    db = SessionLocal()
+    try:
+        fixed = tag_crud.reconcile_usage(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Исправлено тегов: {fixed}")
+
+
+def rebuild_trigrams(args: argparse.Namespace) -> None:
+    """Построение индекса триграмм для существующих фрагментов"""
+    db = SessionLocal()
+    try:
+        processed = trigram_crud.rebuild(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Обработано фрагментов: {processed}")
+
+
+def compress_content(args: argparse.Namespace) -> None:
+    """Сжатие содержимого существующих фрагментов по текущим настройкам"""
+    db = SessionLocal()
+    try:
+        rewritten = content_crud.compress_content(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Перезаписано строк: {rewritten}")
+
+
+def dedup_content(args: argparse.Namespace) -> None:
+    """Перенос содержимого фрагментов в content_blobs и удаление неиспользуемого"""
+    db = SessionLocal()
+    try:
+        migrated = content_crud.migrate_inline(db, batch_size=args.batch_size)
+        removed = content_crud.collect_garbage(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Перенесено фрагментов: {migrated}")
+    print(f"Удалено неиспользуемого содержимого: {removed}")
+
+
+def fill_previews(args: argparse.Namespace) -> None:
+    """Заполнение превью фрагментов для списков view=summary"""
+    db = SessionLocal()
+    try:
+        filled = fragment_crud.fill_previews(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Обработано фрагментов: {filled}")
+
+
+def compact_views(args: argparse.Namespace) -> None:
+    """Свертка старых просмотров в суточные сводки"""
+    db = SessionLocal()
+    try:
+        compacted = view_crud.compact_views(
+            db, older_than_days=args.older_than_days, batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+    print(f"Свернуто просмотров: {compacted}")
+
+
+def calibrate_bcrypt(args: argparse.Namespace) -> None:
+    """Подбор стоимости bcrypt под целевое время хеширования"""
+    rounds, timings = calibrate_bcrypt_rounds(args.target_ms / 1000)
+    for cost, seconds in timings.items():
+        print(f"cost={cost}: {seconds * 1000:.0f} мс")
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+
+def bench_serialization(args: argparse.Namespace) -> None:
+    """Сравнение сериализации страницы фрагментов через схемы Pydantic и быстрого пути"""
+    # Импорт здесь: бенчмарк загружает модули API
+    from app import benchmarks
+
+    timings = benchmarks.serialization(items=args.items, rounds=args.rounds)
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds * 1000:.2f} мс на страницу из {args.items}")
+    print(f"Ускорение: {timings['pydantic'] / timings['fast']:.1f}x")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Построение парсера аргументов командной строки"""
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_migrate = subparsers.add_parser(
+        "migrate", help="Добавить в существующую БД новые колонки и индексы"
+    )
+    parser_migrate.set_defaults(func=migrate)
+
+    parser_counters = subparsers.add_parser(
+        "reconcile-counters", help="Пересчитать likes_count/views_count фрагментов"
+    )
+    parser_counters.add_argument("--batch-size", type=int, default=1000)
+    parser_counters.set_defaults(func=reconcile_counters)
+
+    parser_tags = subparsers.add_parser(
+        "reconcile-tag-usage", help="Пересчитать usage_count тегов"
+    )
+    parser_tags.add_argument("--batch-size", type=int, default=1000)
+    parser_tags.set_defaults(func=reconcile_tag_usage)
+
+    parser_trigrams = subparsers.add_parser(
+        "rebuild-trigrams", help="Построить индекс триграмм для поиска подстрок"
+    )
+    parser_trigrams.add_argument("--batch-size", type=int, default=500)
+    parser_trigrams.set_defaults(func=rebuild_trigrams)
+
+    parser_compress = subparsers.add_parser(
+        "compress-content", help="Сжать содержимое фрагментов по CONTENT_COMPRESSION"
+    )
+    parser_compress.add_argument("--batch-size", type=int, default=500)
+    parser_compress.set_defaults(func=compress_content)
+
+    parser_dedup = subparsers.add_parser(
+        "dedup-content", help="Перенести содержимое фрагментов в общее хранилище content_blobs"
+    )
+    parser_dedup.add_argument("--batch-size", type=int, default=500)
+    parser_dedup.set_defaults(func=dedup_content)
+
+    parser_previews = subparsers.add_parser(
+        "fill-previews", help="Заполнить превью и число строк фрагментов"
+    )
+    parser_previews.add_argument("--batch-size", type=int, default=500)
+    parser_previews.set_defaults(func=fill_previews)
+
+    parser_views = subparsers.add_parser(
+        "compact-views", help="Свернуть старые просмотры в суточные сводки"
+    )
+    parser_views.add_argument("--older-than-days", type=int, default=settings.VIEW_RETENTION_DAYS)
+    parser_views.add_argument("--batch-size", type=int, default=500)
+    parser_views.set_defaults(func=compact_views)
+
+    parser_bcrypt = subparsers.add_parser(
+        "calibrate-bcrypt", help="Подобрать BCRYPT_ROUNDS для этой машины"
+    )
+    parser_bcrypt.add_argument("--target-ms", type=float, default=250.0)
+    parser_bcrypt.set_defaults(func=calibrate_bcrypt)
+
+    parser_bench = subparsers.add_parser(
+        "bench-serialization", help="Сравнить скорость сериализации списка фрагментов"
+    )
+    parser_bench.add_argument("--items", type=int, default=100)
+    parser_bench.add_argument("--rounds", type=int, default=200)
+    parser_bench.set_defaults(func=bench_serialization)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Кэш минимальных данных аутентифицированного пользователя: избавляет
+# от запроса к БД на каждый запрос с токеном. Хранится в памяти процесса,
+# поэтому изменения из других процессов видны не позже чем через TTL.
+
+
+@dataclass(frozen=True)
+class AuthPrincipal:
+    """Аутентифицированный пользователь: только поля, нужные для проверки прав"""
+    id: int
+    is_active: bool
+    is_admin: bool
+
+    @classmethod
+    def from_user(cls, user: Any) -> "AuthPrincipal":
+        return cls(id=user.id, is_active=bool(user.is_active), is_admin=bool(user.is_admin))
+
+
+class PrincipalCache:
+    """LRU-кэш с ограничением времени жизни записей"""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, AuthPrincipal]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, user_id: int) -> Optional[AuthPrincipal]:
+        """Данные пользователя из кэша (None - промах)"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: AuthPrincipal) -> None:
+        """Сохранение данных пользователя"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[principal.id] = (self._clock() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Удаление записи пользователя"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Очистка кэша и счетчиков"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Общий кэш процесса
+principal_cache = PrincipalCache(
+    ttl=settings.AUTH_CACHE_TTL,
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+)
@@ -0,0 +1,159 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class BloomFilter:
+    """Фильтр Блума на битовом массиве с двойным хешированием"""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Некорректные параметры фильтра Блума")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Оптимальные размер массива и число хеш-функций
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Добавление ключа; True, если ключ, вероятно, уже был в фильтре"""
+        present = True
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self._bits[pos >> 3] & mask:
+                present = False
+                self._bits[pos >> 3] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+
+class RotatingBloomFilter:
+    """Фильтр Блума с окном по времени из двух поколений.
+
+    Каждые window секунд текущее поколение становится предыдущим, а
+    предыдущее отбрасывается. Ключ считается виденным, если он есть в
+    любом поколении, поэтому повтор распознается не меньше window и не
+    больше 2 * window секунд после первого появления.
+
+    Поколение также сменяется досрочно, когда в нем capacity ключей:
+    переполненный фильтр дает ложные срабатывания намного чаще error_rate.
+    При потоке больше capacity ключей за окно повтор распознается меньше
+    window секунд, но доля ложных срабатываний не превышает 2 * error_rate.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        capacity: int,
+        error_rate: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous: Optional[BloomFilter] = None
+        self._rotated_at = clock()
+
+        # Метрики
+        self.checked = 0
+        self.suppressed = 0
+        self.rotations = 0
+        self.capacity_rotations = 0
+
+    def _rotate_if_needed(self) -> None:
+        now = self._clock()
+        elapsed = now - self._rotated_at
+        full = self._current.count >= self.capacity
+        if elapsed < self.window and not full:
+            return
+        if elapsed < self.window:
+            self.capacity_rotations += 1
+        # Если прошло больше двух окон, предыдущее поколение тоже устарело
+        self._previous = self._current if elapsed < 2 * self.window else None
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at = now
+        self.rotations += 1
+
+    def check_and_add(self, key: str) -> bool:
+        """Отметка ключа; True, если ключ уже встречался в пределах окна"""
+        with self._lock:
+            self._rotate_if_needed()
+            self.checked += 1
+            seen = self._current.add(key)
+            if not seen and self._previous is not None and key in self._previous:
+                seen = True
+            if seen:
+                self.suppressed += 1
+            return seen
+
+    def clear(self) -> None:
+        """Сброс всех поколений"""
+        with self._lock:
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._previous = None
+            self._rotated_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики фильтра"""
+        with self._lock:
+            memory = self._current.memory_bytes * (2 if self._previous is not None else 1)
+            return {
+                "window": self.window,
+                "capacity": self.capacity,
+                "error_rate": self.error_rate,
+                "current_items": self._current.count,
+                "memory_bytes": memory,
+                "checked": self.checked,
+                "suppressed": self.suppressed,
+                "rotations": self.rotations,
+                "capacity_rotations": self.capacity_rotations,
+            }
+
+
+# Фильтр повторных просмотров: ключ - фрагмент и пользователь (или IP)
+view_dedup = RotatingBloomFilter(
+    window=settings.VIEW_DEDUP_WINDOW,
+    capacity=settings.VIEW_DEDUP_CAPACITY,
+    error_rate=settings.VIEW_DEDUP_ERROR_RATE,
+)
+
+
+def is_repeat_view(
+    fragment_id: int,
+    user_id: Optional[int] = None,
+    ip_address: Optional[str] = None
+) -> bool:
+    """Проверка повторного просмотра в пределах окна (с отметкой текущего)"""
+    if not settings.VIEW_DEDUP_ENABLED:
+        return False
+    if user_id is not None:
+        key = f"{fragment_id}:u:{user_id}"
+    elif ip_address:
+        key = f"{fragment_id}:ip:{ip_address}"
+    else:
+        return False
+    return view_dedup.check_and_add(key)
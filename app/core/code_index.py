@@ -0,0 +1,207 @@
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Инвертированный индекс фрагментов с разбором идентификаторов кода.
+# Хранится в памяти процесса; списки вхождений - отсортированные массивы
+# array('I') с идентификаторами фрагментов и параллельные массивы частот.
+
+# Многосимвольные операторы, которые сохраняются как отдельные токены
+OPERATORS = (
+    "...", "<=>", "**=", "//=", ">>=", "<<=", "===", "!==",
+    "->", "=>", "::", "==", "!=", "<=", ">=", "&&", "||", "**", "//",
+    "<<", ">>", ":=", "??", "?.", "++", "--", "+=", "-=", "*=", "/=",
+)
+
+_TOKEN_RE = re.compile(
+    r"[A-Za-z_][A-Za-z0-9_]*|\d+|"
+    + "|".join(re.escape(op) for op in OPERATORS)
+)
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбиение текста на токены с учетом camelCase и snake_case.
+
+    Идентификатор дает сам себя и свои части: getUserById -> getuserbyid,
+    get, user, by, id; parse_config -> parse_config, parse, config.
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        if not (token[0].isalpha() or token[0] == "_"):
+            tokens.append(token)
+            continue
+        tokens.append(token.lower())
+        parts = [
+            part.lower()
+            for chunk in token.split("_") if chunk
+            for part in _CAMEL_RE.findall(chunk)
+        ]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class _Postings:
+    """Список вхождений термина: отсортированные ID фрагментов и частоты"""
+    __slots__ = ("ids", "tfs")
+
+    def __init__(self) -> None:
+        self.ids = array("I")
+        self.tfs = array("I")
+
+    def add(self, doc_id: int, tf: int) -> None:
+        # Новые фрагменты почти всегда получают наибольший ID - добавление в конец
+        if not self.ids or self.ids[-1] < doc_id:
+            self.ids.append(doc_id)
+            self.tfs.append(tf)
+            return
+        pos = bisect_left(self.ids, doc_id)
+        self.ids.insert(pos, doc_id)
+        self.tfs.insert(pos, tf)
+
+    def remove(self, doc_id: int) -> None:
+        pos = bisect_left(self.ids, doc_id)
+        if pos < len(self.ids) and self.ids[pos] == doc_id:
+            del self.ids[pos]
+            del self.tfs[pos]
+
+    def tf(self, doc_id: int) -> int:
+        pos = bisect_left(self.ids, doc_id)
+        if pos < len(self.ids) and self.ids[pos] == doc_id:
+            return self.tfs[pos]
+        return 0
+
+
+class CodeIndex:
+    """Инвертированный индекс с ранжированием BM25 и AND-семантикой запросов"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.built = False
+        # Версия данных, по которым построен индекс (задается вызывающим кодом)
+        self.version: Any = None
+        self._lock = threading.RLock()
+        self._postings: Dict[str, _Postings] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Добавление или замена документа в индексе"""
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = _Postings()
+                postings.add(doc_id, tf)
+            length = sum(counts.values())
+            self._doc_terms[doc_id] = tuple(counts)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id: int) -> None:
+        """Удаление документа из индекса"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.remove(doc_id)
+            if not postings.ids:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def doc_ids(self) -> Set[int]:
+        """ID документов в индексе"""
+        with self._lock:
+            return set(self._doc_lengths)
+
+    def add_many(self, documents: Iterable[Tuple[int, str]]) -> None:
+        """Добавление или замена нескольких документов"""
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def refresh(
+        self, documents: Iterable[Tuple[int, str]], removed: Iterable[int], version: Any
+    ) -> None:
+        """Применение изменений, внесенных в обход add/remove (другими
+        процессами), и отметка индекса построенным по версии данных version"""
+        self.add_many(documents)
+        for doc_id in removed:
+            self.remove(doc_id)
+        self.version = version
+        self.built = True
+
+    def clear(self) -> None:
+        """Очистка индекса"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+            self.built = False
+            self.version = None
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Поиск документов, содержащих все термины запроса.
+
+        Возвращает пары (ID, оценка BM25) по убыванию оценки.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings: List[_Postings] = []
+            for term in terms:
+                term_postings = self._postings.get(term)
+                if term_postings is None:
+                    return []
+                postings.append(term_postings)
+
+            # Пересечение начинаем с самого короткого списка
+            postings.sort(key=lambda p: len(p.ids))
+            candidates: Iterable[int] = postings[0].ids
+            for other in postings[1:]:
+                candidates = [doc_id for doc_id in candidates if other.tf(doc_id)]
+                if not candidates:
+                    return []
+
+            n_docs = len(self._doc_lengths)
+            avg_length = self._total_length / n_docs if n_docs else 0.0
+            idfs = [
+                math.log(1 + (n_docs - len(p.ids) + 0.5) / (len(p.ids) + 0.5))
+                for p in postings
+            ]
+
+            results: List[Tuple[int, float]] = []
+            for doc_id in candidates:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                score = 0.0
+                for idf, term_postings in zip(idfs, postings):
+                    tf = term_postings.tf(doc_id)
+                    score += idf * tf * (self.k1 + 1) / (tf + norm)
+                results.append((doc_id, score))
+
+        results.sort(key=lambda item: (-item[1], -item[0]))
+        return results[:limit] if limit is not None else results
+
+
+# Общий индекс процесса
+code_index = CodeIndex()
@@ -0,0 +1,124 @@
+import base64
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+
+from app.core.concurrency import run_blocking
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен: без пакета доступен только zlib
+    zstandard = None
+
+# Сжатие больших текстов при хранении в колонке Text. Сжатое значение
+# хранится как маркер кодека и base64 сжатых байтов:
+#   "\x01zlib:<base64>" или "\x01zstd:<base64>".
+# Текст, который сам начинается с маркера, хранится как "\x01raw:<текст>",
+# поэтому любое сохраненное значение декодируется однозначно. Внешние
+# хранилища (register_reader) хранят в колонке ссылку "\x01<имя>:<ссылка>".
+
+COMPRESSED_PREFIX = "\x01"
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("Для сжатия zstd нужен пакет zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("Для чтения содержимого, сжатого zstd, нужен пакет zstandard")
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+# Кодеки: имя -> (сжатие, распаковка)
+CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (zlib.compress, zlib.decompress),
+    "zstd": (_zstd_compress, _zstd_decompress),
+}
+
+
+# Внешние хранилища: имя -> чтение текста по ссылке
+_READERS: Dict[str, Callable[[str], str]] = {}
+
+
+def register_reader(name: str, reader: Callable[[str], str]) -> None:
+    """Регистрация внешнего хранилища, на которое ссылаются сохраненные значения"""
+    _READERS[name] = reader
+
+
+def is_encoded(stored: str) -> bool:
+    """Значение хранится с маркером кодека"""
+    return stored.startswith(COMPRESSED_PREFIX)
+
+
+def encode_text(value: str, codec: Optional[str], min_bytes: int) -> str:
+    """Значение для хранения: сжатое, если текст не короче min_bytes байт
+    и сжатие уменьшает его размер"""
+    if codec and codec in CODECS:
+        data = value.encode("utf-8")
+        if len(data) >= min_bytes:
+            compress = CODECS[codec][0]
+            encoded = f"{COMPRESSED_PREFIX}{codec}:" + base64.b64encode(compress(data)).decode("ascii")
+            if len(encoded) < len(data):
+                return encoded
+    if is_encoded(value):
+        return f"{COMPRESSED_PREFIX}raw:{value}"
+    return value
+
+
+def decode_text(stored: str) -> str:
+    """Исходный текст из сохраненного значения"""
+    if not is_encoded(stored):
+        return stored
+    codec, _, payload = stored[len(COMPRESSED_PREFIX):].partition(":")
+    if codec == "raw":
+        return payload
+    if codec in _READERS:
+        return _READERS[codec](payload)
+    if codec not in CODECS:
+        raise ValueError(f"Неизвестный кодек содержимого: {codec}")
+    decompress = CODECS[codec][1]
+    return decompress(base64.b64decode(payload)).decode("utf-8")
+
+
+def encode_content(value: str) -> str:
+    """Значение для хранения по текущим настройкам сжатия"""
+    codec = settings.CONTENT_COMPRESSION
+    return encode_text(value, None if codec == "none" else codec, settings.CONTENT_COMPRESSION_MIN_BYTES)
+
+
+class EncodedText(TypeDecorator):
+    """Текст, записываемый уже закодированным и декодируемый при чтении.
+
+    Сравнения в SQL (LIKE, =) выполняются с сохраненным значением, поэтому
+    для сжатых строк они не совпадают с исходным текстом.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_result_value(self, value: Optional[str], dialect: Any) -> Optional[str]:
+        if value is None or not is_encoded(value):
+            return value
+        # Распаковка и чтение pack-файла - вне потока цикла событий
+        return run_blocking(decode_text, value)
+
+    def coerce_compared_value(self, op: Any, value: Any) -> Any:
+        # Литералы в сравнениях передаются как есть, без сжатия
+        return Text()
+
+
+class CompressedText(EncodedText):
+    """Текст, прозрачно сжимаемый при записи и распаковываемый при чтении"""
+
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect: Any) -> Optional[str]:
+        if value is None:
+            return None
+        return encode_content(value)
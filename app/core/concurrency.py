@@ -0,0 +1,22 @@
+import asyncio
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+T = TypeVar("T")
+
+
+def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполнение блокирующей работы (CPU, файловый ввод-вывод) из кода CRUD.
+
+    Синхронный код внутри AsyncSession.run_sync выполняется в потоке цикла
+    событий. Там функция запускается в пуле потоков, а результат ожидается
+    через greenlet SQLAlchemy (как ввод-вывод асинхронного драйвера), не
+    блокируя цикл. Вне run_sync функция вызывается напрямую.
+
+    Функция не должна захватывать блокировки, которые удерживает вызывающий
+    код: пока она выполняется, цикл событий обслуживает другие запросы.
+    """
+    if in_greenlet():
+        return await_only(asyncio.to_thread(fn, *args, **kwargs))
+    return fn(*args, **kwargs)
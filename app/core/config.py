@@ -1,6 +1,6 @@
 from pydantic import MySQLDsn, field_validator, ValidationInfo, ConfigDict
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 import secrets
 
 class Settings(BaseSettings):
@@ -44,9 +44,76 @@ class Settings(BaseSettings):
             path=path,
         ))
 
+    # Реплики только для чтения (пусто - все запросы идут в основную БД)
+    DATABASE_REPLICA_URLS: list[str] = []
+    # Секунды после записи, в течение которых пользователь читает с основной БД
+    READ_YOUR_WRITES_WINDOW: float = 5.0
+
+    # Пул соединений (для каждого движка)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10  # Соединений сверх DB_POOL_SIZE под пиковую нагрузку
+    DB_POOL_TIMEOUT: float = 30.0  # Секунды ожидания свободного соединения
+    DB_POOL_RECYCLE: int = 1800  # Секунды; MySQL закрывает простаивающие соединения
+    DB_POOL_PRE_PING: bool = True  # Проверка соединения перед выдачей из пула
+
     # Настройки JWT
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # 30 минут
     ALGORITHM: str = "HS256"
+    # Массовый импорт фрагментов (NDJSON)
+    BULK_IMPORT_BATCH_SIZE: int = 500  # Фрагментов в одной транзакции
+    BULK_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+    BULK_IMPORT_SPOOL_SIZE: int = 1024 * 1024  # Результаты сверх этого объема пишутся на диск
+
+    # Сжатие содержимого фрагментов при хранении (none - без сжатия;
+    # zstd требует пакет zstandard). Существующие строки - команда compress-content
+    CONTENT_COMPRESSION: Literal["none", "zlib", "zstd"] = "none"
+    CONTENT_COMPRESSION_MIN_BYTES: int = 4096  # Более короткие тексты не сжимаются
+    # Хранилище содержимого: database - колонка content_blobs.content,
+    # pack - локальные pack-файлы в CONTENT_PACK_DIR (одна машина)
+    CONTENT_STORE: Literal["database", "pack"] = "database"
+    CONTENT_PACK_DIR: str = "data/content"
+    CONTENT_PACK_SYNC_DELAY: float = 0.0  # Секунды ожидания перед общим fsync
+    # Интервал сжатия pack-файлов фоновым потоком, секунды (0 - отключено)
+    CONTENT_PACK_COMPACT_INTERVAL: float = 3600.0
+    CONTENT_PACK_COMPACT_MIN_GARBAGE: float = 0.5  # Доля мертвых данных для сжатия
+
+    # Превью содержимого для списков (view=summary): первые строки текста
+    CONTENT_PREVIEW_LINES: int = 5
+    CONTENT_PREVIEW_MAX_CHARS: int = 500
+
+    # Cache-Control ответов с публичными фрагментами (ответы с приватными -
+    # "private, no-cache"); кэши различают ответы по заголовку Authorization
+    PUBLIC_FRAGMENT_CACHE_CONTROL: str = "public, max-age=0, must-revalidate"
+
+    # Выгрузка фрагментов: строк, читаемых из курсора БД за раз
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Построение индекса автодополнения тегов при запуске (иначе - при первом запросе)
+    TAG_INDEX_WARMUP: bool = True
+    # Интервал пересчета usage_count тегов фоновым потоком, секунды (0 - отключен)
+    TAG_USAGE_RECONCILE_INTERVAL: float = 3600.0
+
+    # Пароли: стоимость bcrypt (подбирается командой calibrate-bcrypt)
+    BCRYPT_ROUNDS: int = 12
+    # Пул процессов для bcrypt (0 - в потоке запроса)
+    PASSWORD_POOL_WORKERS: int = 2
+    PASSWORD_POOL_MAX_PENDING: int = 32  # Сверх этого - ответ 503
+    # Кэш пользователей для проверки токенов (0 - кэш отключен)
+    AUTH_CACHE_TTL: float = 60.0  # Секунды
+    AUTH_CACHE_MAX_SIZE: int = 10000
+
+    # Буферизация просмотров: запись в БД фоновым потоком пачками
+    VIEW_BUFFER_ENABLED: bool = True
+    VIEW_BUFFER_MAX_SIZE: int = 10000  # Переполнение - просмотр отбрасывается
+    VIEW_BUFFER_BATCH_SIZE: int = 500
+    VIEW_BUFFER_FLUSH_INTERVAL: float = 1.0  # Секунды
+    # Подавление повторных просмотров одним пользователем/IP (фильтр Блума)
+    VIEW_DEDUP_ENABLED: bool = True
+    VIEW_DEDUP_WINDOW: float = 1800.0  # Секунды
+    VIEW_DEDUP_CAPACITY: int = 1_000_000  # Ключей в одном поколении фильтра
+    VIEW_DEDUP_ERROR_RATE: float = 0.01  # Доля ложных срабатываний
+    # Просмотры старше этого срока сворачиваются в суточные сводки (compact-views)
+    VIEW_RETENTION_DAYS: int = 30
 
     # Настройки CORS
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:8080", "http://localhost:3000"]
@@ -0,0 +1,275 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.compression import COMPRESSED_PREFIX, decode_text, encode_content, register_reader
+from app.core.config import settings
+
+# Хранилища содержимого content_blobs. Значение колонки content - то, что
+# вернул put(): сам текст (возможно сжатый) для хранилища в БД или ссылка
+# "\x01pack:<поколение>:<смещение>:<длина>" на запись в pack-файле.
+#
+# Pack-файлы (content-<поколение>.pack) только дописываются. Запись - заголовок
+# (RECORD_HEADER: метка, длина, SHA-256) и текст в UTF-8; ссылка указывает на
+# начало текста. Файлы читаются через mmap без копирования. Дописывание
+# защищено блокировкой файла, поэтому pack-каталог могут использовать
+# несколько процессов на одной машине. Сжатие (compact_pack) переписывает
+# живые записи в новое поколение; старые поколения удаляются следующим сжатием.
+
+PACK_CODEC = "pack"
+RECORD_HEADER = struct.Struct("<2sI32s")
+RECORD_MAGIC = b"CB"
+_PACK_NAME = re.compile(r"content-(\d+)\.pack$")
+
+
+class ContentStore:
+    """Хранилище содержимого"""
+
+    name = ""
+
+    def put(self, text: str) -> str:
+        """Сохранение текста; возвращает значение для колонки content"""
+        raise NotImplementedError
+
+    def convert(self, stored: str) -> str:
+        """Значение колонки content после переноса в это хранилище"""
+        return self.put(decode_text(stored))
+
+    def sync(self) -> None:
+        """Гарантия сохранности записанного перед коммитом транзакции"""
+
+
+class DatabaseContentStore(ContentStore):
+    """Текст хранится в колонке content (со сжатием по CONTENT_COMPRESSION)"""
+
+    name = "database"
+
+    def put(self, text: str) -> str:
+        return encode_content(text)
+
+    def convert(self, stored: str) -> str:
+        # Перезапись идемпотентна: сжатие зависит только от текста и настроек
+        return encode_content(decode_text(stored))
+
+
+class PackContentStore(ContentStore):
+    """Текст хранится в pack-файлах, в колонке - ссылка на запись.
+
+    fsync выполняется не на каждую запись, а перед коммитом транзакции;
+    одновременные коммиты объединяются в один fsync (групповой коммит).
+    sync_delay - пауза перед fsync, за которую успевают дописать другие потоки.
+    """
+
+    name = PACK_CODEC
+
+    def __init__(self, directory: str, sync_delay: float = 0.0) -> None:
+        self.directory = directory
+        self.sync_delay = sync_delay
+        self._lock = threading.Lock()
+        self._sync_done = threading.Condition(threading.Lock())
+        self._fd: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._generation = 0
+        # Позиция конца записанных и сохраненных fsync данных текущего поколения
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._maps_lock = threading.Lock()
+
+        # Метрики
+        self.appends = 0
+        self.syncs = 0
+
+    def path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"content-{generation}.pack")
+
+    def generations(self) -> List[int]:
+        """Поколения pack-файлов в каталоге по возрастанию"""
+        if not os.path.isdir(self.directory):
+            return []
+        found = (_PACK_NAME.match(name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in found if match)
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        generation, offset = self.append(data, hashlib.sha256(data).digest())
+        return f"{COMPRESSED_PREFIX}{PACK_CODEC}:{generation}:{offset}:{len(data)}"
+
+    def convert(self, stored: str) -> str:
+        if stored.startswith(f"{COMPRESSED_PREFIX}{PACK_CODEC}:"):
+            return stored
+        return self.put(decode_text(stored))
+
+    def append(self, data: bytes, digest: bytes) -> Tuple[int, int]:
+        """Дописывание записи; возвращает (поколение, смещение текста)"""
+        record = RECORD_HEADER.pack(RECORD_MAGIC, len(data), digest) + data
+        with self._lock, self._file_lock():
+            fd = self._open_for_append()
+            # Другой процесс мог начать новые поколения (сжатие), а промежуточные
+            # уже удалить; проверка под блокировкой файла - rotate ее тоже берет
+            latest = max(self.generations(), default=self._generation)
+            if latest > self._generation:
+                fd = self._switch(latest)
+            start = os.lseek(fd, 0, os.SEEK_END)
+            os.write(fd, record)
+            self._written = start + len(record)
+            self.appends += 1
+            return self._generation, start + RECORD_HEADER.size
+
+    def rotate(self) -> int:
+        """Начало нового поколения: последующие записи идут в новый файл"""
+        with self._lock, self._file_lock():
+            self._open_for_append()
+            generation = max(self.generations() + [self._generation]) + 1
+            self._switch(generation)
+            return generation
+
+    def sync(self) -> None:
+        """fsync текущего поколения, общий для одновременно коммитящих потоков"""
+        with self._sync_done:
+            generation, target = self._generation, self._written
+            # При смене поколения прежний файл уже сохранен (_switch)
+            while self._generation == generation and self._synced < target:
+                if self._syncing:
+                    self._sync_done.wait()
+                    continue
+                self._syncing = True
+                self._sync_done.release()
+                try:
+                    if self.sync_delay:
+                        time.sleep(self.sync_delay)
+                    with self._lock:
+                        fd, synced_generation, end = self._fd, self._generation, self._written
+                        if fd is not None:
+                            os.fsync(fd)
+                            self.syncs += 1
+                finally:
+                    self._sync_done.acquire()
+                    self._syncing = False
+                    self._sync_done.notify_all()
+                if synced_generation == self._generation:
+                    self._synced = max(self._synced, end)
+
+    def read(self, generation: int, offset: int, length: int) -> memoryview:
+        """Срез текста записи в отображенном файле (без копирования)"""
+        view = memoryview(self._map(generation, offset + length))
+        return view[offset:offset + length]
+
+    def read_text(self, locator: str) -> str:
+        generation, offset, length = (int(part) for part in locator.split(":"))
+        view = self.read(generation, offset, length)
+        try:
+            return str(view, "utf-8")
+        finally:
+            view.release()
+
+    def record_digest(self, generation: int, offset: int) -> bytes:
+        """SHA-256 из заголовка записи (для проверки ссылок)"""
+        start = offset - RECORD_HEADER.size
+        header = self.read(generation, start, RECORD_HEADER.size)
+        try:
+            magic, _, digest = RECORD_HEADER.unpack(header)
+        finally:
+            header.release()
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"Нет записи по смещению {offset} в поколении {generation}")
+        return digest
+
+    def remove_generations(self, below: int) -> List[int]:
+        """Удаление файлов поколений младше below"""
+        removed = []
+        for generation in self.generations():
+            if generation >= below:
+                break
+            with self._maps_lock:
+                # Отображение закрывается при освобождении последнего среза
+                self._maps.pop(generation, None)
+            os.remove(self.path(generation))
+            removed.append(generation)
+        return removed
+
+    def disk_bytes(self) -> int:
+        """Суммарный размер pack-файлов"""
+        return sum(os.path.getsize(self.path(generation)) for generation in self.generations())
+
+    def close(self) -> None:
+        with self._lock:
+            for fd in (self._fd, self._lock_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._fd = self._lock_fd = None
+        with self._maps_lock:
+            self._maps.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Метрики хранилища"""
+        return {
+            "generation": self._generation,
+            "appends": self.appends,
+            "syncs": self.syncs,
+        }
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # Блокировка дописывания между процессами
+        if self._lock_fd is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_fd = os.open(
+                os.path.join(self.directory, "content.lock"), os.O_CREAT | os.O_RDWR, 0o644
+            )
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open_for_append(self) -> int:
+        if self._fd is None:
+            generations = self.generations()
+            self._switch(generations[-1] if generations else 1)
+        assert self._fd is not None
+        return self._fd
+
+    def _switch(self, generation: int) -> int:
+        # Предыдущее поколение сохраняется на диск до перехода: его записи
+        # больше не попадут под sync() текущего поколения
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+        self._fd = os.open(self.path(generation), os.O_CREAT | os.O_RDWR | os.O_APPEND, 0o644)
+        self._generation = generation
+        self._written = self._synced = os.lseek(self._fd, 0, os.SEEK_END)
+        return self._fd
+
+    def _map(self, generation: int, end: int) -> mmap.mmap:
+        with self._maps_lock:
+            mapped = self._maps.get(generation)
+            if mapped is None or len(mapped) < end:
+                # Файл вырос после отображения - отображаем заново; старое
+                # отображение живет, пока на него ссылаются выданные срезы
+                with open(self.path(generation), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(mapped) < end:
+                    raise ValueError(f"Запись за концом pack-файла поколения {generation}")
+                self._maps[generation] = mapped
+            return mapped
+
+
+database_store = DatabaseContentStore()
+pack_store = PackContentStore(settings.CONTENT_PACK_DIR, sync_delay=settings.CONTENT_PACK_SYNC_DELAY)
+
+# Ссылки на pack-файлы читаются при любом выбранном хранилище
+register_reader(PACK_CODEC, pack_store.read_text)
+
+
+def get_content_store() -> ContentStore:
+    """Хранилище для нового содержимого (CONTENT_STORE)"""
+    return pack_store if settings.CONTENT_STORE == PACK_CODEC else database_store
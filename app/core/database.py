@@ -1,20 +1,114 @@
+from typing import Any, Dict, Tuple, Type
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
 from app.core.config import settings
+from app.core.db_routing import DatabaseRouter, request_principal
+from app.core.pool_metrics import PoolMetrics, instrumented_pool
 
 # Создание URL подключения к базе данных
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# Асинхронные драйверы для синхронных URL
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def make_async_url(url: str) -> str:
+    """Преобразование URL подключения к асинхронному драйверу"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Нет асинхронного драйвера для {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Пулы соединений по именам: движок и метрики ожидания
+_pools: Dict[str, Tuple[Engine, PoolMetrics]] = {}
+
+
+def pool_options(url: str, pool_class: Type[Pool], metrics: PoolMetrics) -> Dict[str, Any]:
+    """Параметры пула соединений из настроек"""
+    parsed = make_url(url)
+    # SQLite в памяти использует пул одного соединения, размеры к нему неприменимы
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": instrumented_pool(pool_class, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_pooled_engine(name: str, url: str) -> Engine:
+    """Создание синхронного движка с учетом метрик пула"""
+    metrics = PoolMetrics()
+    db_engine = create_engine(url, **pool_options(url, QueuePool, metrics))
+    _pools[name] = (db_engine, metrics)
+    return db_engine
+
+
+def create_pooled_async_engine(name: str, url: str) -> AsyncEngine:
+    """Создание асинхронного движка с учетом метрик пула"""
+    async_url = make_async_url(url)
+    metrics = PoolMetrics()
+    db_engine = create_async_engine(
+        async_url, **pool_options(async_url, AsyncAdaptedQueuePool, metrics)
+    )
+    _pools[name] = (db_engine.sync_engine, metrics)
+    return db_engine
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Текущие метрики всех пулов соединений"""
+    return {
+        name: metrics.snapshot(db_engine.pool)
+        for name, (db_engine, metrics) in _pools.items()
+    }
+
+
 # Создание движка SQLAlchemy
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, # pyright: ignore
-)
+engine = create_pooled_engine("primary", SQLALCHEMY_DATABASE_URL) # pyright: ignore
+
+# Асинхронный движок для асинхронных эндпоинтов
+async_engine = create_pooled_async_engine("primary_async", SQLALCHEMY_DATABASE_URL) # pyright: ignore
 
 # Создание сессии
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронная сессия: объекты не сбрасываются при коммите, так как
+# ленивая загрузка вне run_sync в асинхронном коде недоступна
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Реплики только для чтения
+replica_engines = [
+    create_pooled_async_engine(f"replica_{i}", url)
+    for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+
+# Маршрутизация чтения между основной БД и репликами
+db_router = DatabaseRouter(
+    AsyncSessionLocal,
+    [
+        async_sessionmaker(bind=replica, autoflush=False, expire_on_commit=False)
+        for replica in replica_engines
+    ],
+    window=settings.READ_YOUR_WRITES_WINDOW,
+)
+
 # Базовый класс для моделей SQLAlchemy
 Base = declarative_base()
 
@@ -25,3 +119,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Функция для получения асинхронной сессии БД
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Сессия для чтения: реплика, либо основная БД сразу после записи пользователя
+async def get_read_db(request: Request):
+    session_factory = db_router.for_read(request_principal(request))
+    async with session_factory() as db:
+        yield db
+
+# Сессия для записи: основная БД; отмечает запись пользователя
+async def get_write_db(request: Request):
+    principal = request_principal(request)
+    db_router.mark_write(principal)
+    try:
+        async with db_router.for_write()() as db:
+            yield db
+    finally:
+        # Окно отсчитывается и от завершения записи
+        db_router.mark_write(principal)
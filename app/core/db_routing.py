@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+
+# Маршрутизация чтения между основной БД и репликами. Пользователь, недавно
+# выполнивший запись, читает с основной БД, пока реплики могут отставать.
+
+# При таком числе отслеживаемых пользователей истекшие записи вычищаются
+_PRUNE_THRESHOLD = 10000
+
+
+def request_principal(request: Request) -> Optional[str]:
+    """Идентификатор пользователя из токена запроса (если токен валиден)"""
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+
+class DatabaseRouter:
+    """Выбор фабрики сессий для чтения и записи"""
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replicas: Sequence[async_sessionmaker] = (),
+        window: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._recent_writes: Dict[str, float] = {}
+        self._next_replica = 0
+
+    def mark_write(self, principal: Optional[str]) -> None:
+        """Отметка записи: чтение пользователя идет с основной БД до конца окна"""
+        if principal is None or not self.replicas:
+            return
+        now = self._clock()
+        with self._lock:
+            if len(self._recent_writes) >= _PRUNE_THRESHOLD:
+                self._recent_writes = {
+                    key: deadline
+                    for key, deadline in self._recent_writes.items()
+                    if deadline > now
+                }
+            self._recent_writes[principal] = now + self.window
+
+    def reads_from_primary(self, principal: Optional[str]) -> bool:
+        """Должен ли пользователь читать с основной БД"""
+        if not self.replicas:
+            return True
+        if principal is None:
+            return False
+        with self._lock:
+            deadline = self._recent_writes.get(principal)
+            if deadline is None:
+                return False
+            if deadline <= self._clock():
+                del self._recent_writes[principal]
+                return False
+            return True
+
+    def for_read(self, principal: Optional[str]) -> async_sessionmaker:
+        """Фабрика сессий для чтения: реплики по кругу"""
+        if self.reads_from_primary(principal):
+            return self.primary
+        with self._lock:
+            replica = self.replicas[self._next_replica % len(self.replicas)]
+            self._next_replica += 1
+        return replica
+
+    def for_write(self) -> async_sessionmaker:
+        """Фабрика сессий для записи"""
+        return self.primary
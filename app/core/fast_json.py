@@ -0,0 +1,36 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без пакета используется json
+    orjson = None
+
+# Быстрая сериализация ответов: словари из данных строк кодируются сразу в
+# байты (orjson, если установлен), без повторной проверки по response_model.
+# Даты кодируются в ISO 8601, как в ответах через схемы Pydantic.
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(value: Any) -> bytes:
+    """JSON в UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON-ответ, кодируемый dumps; содержимое не проверяется по схеме"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,50 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Optional
+
+# Условные запросы (RFC 9110): сильный ETag из версии представления.
+# Версия - небольшой набор значений (ID, updated_at, счетчики), поэтому ETag
+# вычисляется без построения и сериализации ответа. Last-Modified
+# отправляется для справки, но If-Modified-Since не проверяется: дата не
+# учитывает счетчики, и 304 по ней отдавал бы устаревшие лайки и просмотры.
+
+# Ответы с приватными фрагментами не сохраняются общими кэшами
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(version: Any) -> str:
+    """Сильный ETag по версии представления (значения, сериализуемые в JSON)"""
+    data = json.dumps(version, default=str, separators=(",", ":")).encode("utf-8")
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадение ETag с заголовком If-None-Match (слабое сравнение, как в RFC)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def format_http_date(value: datetime) -> str:
+    """Дата для Last-Modified (колонки DateTime хранят UTC без часового пояса)"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(headers: Any, etag: str) -> bool:
+    """Проверка условного запроса по If-None-Match"""
+    return etag_matches(headers.get("if-none-match"), etag)
+
+
+def cache_headers(
+    etag: str, cache_control: str, last_modified: Optional[datetime] = None
+) -> Dict[str, str]:
+    """Заголовки валидаторов и политики кэширования ответа"""
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
@@ -0,0 +1,84 @@
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from app.core.database import Base
+from app.crud.search import setup_search
+
+# Индексы, замененные новыми (имя таблицы -> имена индексов)
+OBSOLETE_INDEXES = {
+    # Индекс с другим направлением сортировки usage_count
+    "tags": ["ix_tags_usage_count_name"],
+}
+
+
+def upgrade_schema(bind: Engine) -> List[str]:
+    """Приведение существующей БД к текущим моделям.
+
+    create_all создает только отсутствующие таблицы, поэтому новые колонки
+    и индексы существующих таблиц добавляются здесь (в MySQL также
+    меняется collation колонок, если она задана в модели). Колонки NOT NULL должны
+    иметь server_default, иначе их нельзя добавить к заполненной таблице.
+    Индексы из OBSOLETE_INDEXES удаляются после создания замены.
+    Возвращает список выполненных шагов.
+    """
+    import app.models  # noqa: F401  Регистрируем все модели в метаданных
+
+    applied: List[str] = []
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    preparer = bind.dialect.identifier_preparer
+
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {c["name"]: c for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    # Collation (MySQL) влияет на сравнение и уникальность значений
+                    wanted = getattr(column.type.dialect_impl(bind.dialect), "collation", None)
+                    current = getattr(existing_columns[column.name]["type"], "collation", None)
+                    if bind.dialect.name == "mysql" and wanted and wanted != current:
+                        column_ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                        statement = f"ALTER TABLE {preparer.format_table(table)} MODIFY COLUMN {column_ddl}"
+                        connection.execute(text(statement))
+                        applied.append(statement)
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(
+                        f"Колонку {table.name}.{column.name} нельзя добавить без server_default"
+                    )
+                column_ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                statement = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}"
+                connection.execute(text(statement))
+                applied.append(statement)
+
+    # Новые таблицы и индексы существующих таблиц
+    Base.metadata.create_all(bind=bind)
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            applied.append(f"CREATE TABLE {table.name}")
+            continue
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=bind)
+                applied.append(f"CREATE INDEX {index.name}")
+        for name in OBSOLETE_INDEXES.get(table.name, []):
+            if name in existing_indexes:
+                statement = f"DROP INDEX {preparer.quote(name)}"
+                if bind.dialect.name == "mysql":
+                    statement += f" ON {preparer.format_table(table)}"
+                with bind.begin() as connection:
+                    connection.execute(text(statement))
+                applied.append(f"DROP INDEX {name}")
+
+    # Полнотекстовый индекс (FULLTEXT в MySQL, FTS5 в SQLite)
+    if setup_search(bind):
+        applied.append("CREATE SEARCH INDEX")
+
+    return applied
@@ -0,0 +1,80 @@
+import json
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+# Потоковый JSON: разбор построчного JSON (NDJSON) частями без чтения тела
+# целиком и сериализация записей по одной (NDJSON или JSON-массив с gzip).
+
+# Размер части потокового ответа
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[Optional[bytes]]:
+    """Строки потока байтов без символа перевода строки.
+
+    В памяти держится не больше одной строки: строка длиннее max_line_bytes
+    пропускается до следующего перевода строки, вместо нее выдается None.
+    """
+    buffer = bytearray()
+    skipping = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start:end]
+                yield bytes(buffer) if len(buffer) <= max_line_bytes else None
+            buffer.clear()
+            start = end + 1
+        if not skipping:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                buffer.clear()
+                skipping = True
+                yield None
+    if buffer and not skipping:
+        yield bytes(buffer)
+
+
+def dumps_line(record: Any) -> bytes:
+    """Запись в виде строки NDJSON"""
+    return json.dumps(record, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+async def ndjson_chunks(
+    records: AsyncIterable[Any], chunk_size: int = STREAM_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Записи в формате NDJSON, сгруппированные в части около chunk_size байт"""
+    buffer = bytearray()
+    async for record in records:
+        buffer += dumps_line(record)
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def gzip_json_array_chunks(
+    records: AsyncIterable[Any], chunk_size: int = STREAM_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Записи в виде JSON-массива, сжатого gzip на лету"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = bytearray(b"[")
+    separator = b""
+    async for record in records:
+        buffer += separator + json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+        separator = b","
+        if len(buffer) >= chunk_size:
+            compressed = compressor.compress(bytes(buffer))
+            buffer.clear()
+            if compressed:
+                yield compressed
+    buffer += b"]"
+    yield compressor.compress(bytes(buffer)) + compressor.flush()
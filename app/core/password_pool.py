@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+
+# Хеширование и проверка паролей bcrypt в отдельном пуле процессов:
+# вычисления не занимают GIL и потоки, обслуживающие остальные запросы,
+# а очередь ограничена - при переполнении запрос сразу получает отказ.
+
+T = TypeVar("T")
+
+
+class PasswordPoolBusy(Exception):
+    """Очередь пула паролей переполнена"""
+
+
+class PasswordWorkerPool:
+    """Пул процессов с ограничением числа ожидающих задач"""
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Выполнение функции в пуле; PasswordPoolBusy при переполнении очереди"""
+        executor = self._acquire()
+        try:
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            self._release()
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        """Асинхронный run: результат ожидается без блокировки цикла событий"""
+        executor = self._acquire()
+        try:
+            if executor is None:
+                return await asyncio.to_thread(fn, *args)
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            self._release()
+
+    def _acquire(self) -> Optional[Executor]:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy("Слишком много одновременных операций с паролями")
+            self._pending += 1
+            return self._get_executor()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def _get_executor(self) -> Optional[Executor]:
+        # workers = 0 - выполнение в вызывающем потоке (run_async - в пуле потоков)
+        if self._executor is None and self.workers > 0:
+            # spawn: fork процесса с работающими потоками небезопасен
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Остановка процессов пула"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики пула"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+# Общий пул процесса
+password_pool = PasswordWorkerPool(
+    workers=settings.PASSWORD_POOL_WORKERS,
+    max_pending=settings.PASSWORD_POOL_MAX_PENDING,
+)
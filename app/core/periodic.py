@@ -0,0 +1,104 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.content import compact_pack
+from app.crud.tag import reconcile_usage
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Фоновый поток, выполняющий задачу обслуживания БД с заданным интервалом.
+
+    Каждый запуск получает отдельную сессию; ошибка запуска записывается
+    в лог и не останавливает поток.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[Session], Any],
+        session_factory: Callable[[], Session],
+        interval: float,
+    ) -> None:
+        self.name = name
+        self.job = job
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Метрики
+        self.runs = 0
+        self.failures = 0
+        self.last_result: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запуск фонового потока"""
+        if self.running or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановка фонового потока"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> Any:
+        """Однократное выполнение задачи"""
+        db = self.session_factory()
+        try:
+            self.last_result = self.job(db)
+        except Exception:
+            self.failures += 1
+            logger.exception("Ошибка фоновой задачи %s", self.name)
+            return None
+        finally:
+            db.close()
+        self.runs += 1
+        return self.last_result
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики задачи"""
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_result": self.last_result,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+# Исправление расхождений usage_count тегов
+tag_usage_reconciler = PeriodicJob(
+    "tag-usage-reconciler",
+    reconcile_usage,
+    SessionLocal,
+    interval=settings.TAG_USAGE_RECONCILE_INTERVAL,
+)
+
+
+# Сжатие pack-файлов содержимого (CONTENT_STORE=pack)
+content_pack_compactor = PeriodicJob(
+    "content-pack-compactor",
+    lambda db: compact_pack(db, min_garbage=settings.CONTENT_PACK_COMPACT_MIN_GARBAGE),
+    SessionLocal,
+    interval=settings.CONTENT_PACK_COMPACT_INTERVAL,
+)
@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+# Метрики пула соединений: время ожидания соединения при checkout,
+# число тайм-аутов и текущее заполнение пула.
+
+
+class PoolMetrics:
+    """Накопительные метрики ожидания соединений одного пула"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def observe(self, wait: float, timed_out: bool = False) -> None:
+        """Учет одного обращения к пулу"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def reset(self) -> None:
+        """Сброс накопленных значений"""
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Метрики ожидания вместе с текущим состоянием пула"""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            stats: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                in_use=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return stats
+
+
+def instrumented_pool(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """Подкласс пула, замеряющий время получения соединения.
+
+    Подкласс сохраняется при пересоздании пула (Pool.recreate).
+    """
+
+    class InstrumentedPool(base):  # type: ignore[valid-type, misc]
+        def _do_get(self):  # type: ignore[no-untyped-def]
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.observe(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.observe(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = InstrumentedPool.__qualname__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
@@ -1,12 +1,31 @@
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.password_pool import password_pool
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def _crypt_context(rounds: int) -> CryptContext:
+    """Контекст bcrypt с заданной стоимостью"""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+pwd_context = _crypt_context(settings.BCRYPT_ROUNDS)
+
+# Функции ниже выполняются в процессах пула: стоимость передается явно,
+# чтобы не зависеть от настроек дочернего процесса
+
+def _hash_password(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+def _verify_password(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _crypt_context(rounds).verify_and_update(password, hashed_password)
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -28,10 +47,52 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Проверка пароля
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Проверка пароля и новый хеш, если стоимость bcrypt изменилась
+    """
+    return password_pool.run(
+        _verify_password, plain_password, hashed_password, settings.BCRYPT_ROUNDS
+    )
 
 def get_password_hash(password: str) -> str:
     """
     Хеширование пароля
     """
-    return pwd_context.hash(password)
+    return password_pool.run(_hash_password, password, settings.BCRYPT_ROUNDS)
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Асинхронная проверка пароля для асинхронных обработчиков
+    """
+    return await password_pool.run_async(
+        _verify_password, plain_password, hashed_password, settings.BCRYPT_ROUNDS
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Асинхронное хеширование пароля для асинхронных обработчиков
+    """
+    return await password_pool.run_async(_hash_password, password, settings.BCRYPT_ROUNDS)
+
+def calibrate_bcrypt_rounds(
+    target_seconds: float, min_rounds: int = 10, max_rounds: int = 16
+) -> Tuple[int, Dict[int, float]]:
+    """
+    Подбор стоимости bcrypt: наибольшая, при которой хеширование на текущей
+    машине укладывается в target_seconds. Возвращает стоимость и замеры.
+    """
+    timings: Dict[int, float] = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        start = time.perf_counter()
+        _hash_password("calibration-password", rounds)
+        timings[rounds] = time.perf_counter() - start
+        if timings[rounds] > target_seconds:
+            break
+        chosen = rounds
+    return chosen, timings
@@ -0,0 +1,90 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+# Индекс имен тегов для автодополнения: отсортированный список имен
+# (диапазон по префиксу находится двоичным поиском) и число использований
+# каждого тега для ранжирования. Хранится в памяти процесса.
+
+
+class TagIndex:
+    """Поиск тегов по префиксу с ранжированием по числу использований"""
+
+    def __init__(self) -> None:
+        self.built = False
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._names: List[str] = []
+        self._usage: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str, usage: int = 0) -> None:
+        """Добавление тега; для существующего тега число использований не меняется"""
+        with self._lock:
+            if name in self._usage:
+                return
+            insort(self._names, name)
+            self._usage[name] = usage
+
+    def add_many(self, names: Iterable[str]) -> None:
+        """Добавление новых тегов"""
+        with self._lock:
+            for name in names:
+                self.add(name)
+
+    def remove(self, name: str) -> None:
+        """Удаление тега"""
+        with self._lock:
+            if self._usage.pop(name, None) is None:
+                return
+            del self._names[bisect_left(self._names, name)]
+
+    def set_usage(self, name: str, usage: int) -> None:
+        """Обновление числа использований тега"""
+        with self._lock:
+            if name in self._usage:
+                self._usage[name] = usage
+
+    def adjust_usage(self, name: str, delta: int) -> None:
+        """Изменение числа использований тега на delta"""
+        with self._lock:
+            if name in self._usage:
+                self._usage[name] = max(self._usage[name] + delta, 0)
+
+    def build(self, tags: Iterable[Tuple[str, int]]) -> None:
+        """Первичное заполнение индекса парами (имя, число использований)"""
+        with self._build_lock:
+            if self.built:
+                return
+            # Данные читаются до блокировки, чтобы не задерживать поиск
+            items = list(tags)
+            with self._lock:
+                for name, usage in items:
+                    self._usage[name] = usage
+                self._names = sorted(self._usage)
+                self.built = True
+
+    def clear(self) -> None:
+        """Очистка индекса"""
+        with self._lock:
+            self._names = []
+            self._usage.clear()
+            self.built = False
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Теги с заданным префиксом: пары (имя, число использований).
+
+        Сортировка по убыванию числа использований, затем по имени.
+        """
+        with self._lock:
+            start = bisect_left(self._names, prefix)
+            end = bisect_left(self._names, prefix + "\U0010ffff", lo=start)
+            candidates = ((name, self._usage[name]) for name in self._names[start:end])
+            return heapq.nsmallest(limit, candidates, key=lambda item: (-item[1], item[0]))
+
+
+# Общий индекс процесса
+tag_index = TagIndex()
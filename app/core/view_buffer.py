@@ -0,0 +1,180 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.fragment import add_views_bulk
+from app.models.base import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """Буфер просмотров с отложенной записью.
+
+    Просмотры складываются в ограниченную очередь и записываются фоновым
+    потоком многострочными INSERT, когда набирается batch_size записей или
+    проходит flush_interval секунд. При переполнении очереди просмотр
+    отбрасывается, чтобы запрос на чтение никогда не ждал записи.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Метрики
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.last_flush_lag = 0.0  # Возраст самого старого события в последней пачке, с
+        self.max_flush_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запуск фонового потока записи"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="view-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановка потока с записью всех накопленных просмотров"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def record(
+        self,
+        fragment_id: int,
+        user_id: Optional[int] = None,
+        ip_address: Optional[str] = None
+    ) -> bool:
+        """Постановка просмотра в очередь; False, если очередь переполнена"""
+        event = {
+            "fragment_id": fragment_id,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "created_at": utcnow(),
+            "enqueued": time.monotonic(),
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+        with self._stats_lock:
+            self.recorded += 1
+        return True
+
+    def flush(self) -> int:
+        """Синхронная запись всех накопленных просмотров"""
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики буфера"""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "last_flush_lag": round(self.last_flush_lag, 3),
+            "max_flush_lag": round(self.max_flush_lag, 3),
+        }
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        """Ожидание пачки: до batch_size событий или до истечения интервала"""
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> int:
+        lag = time.monotonic() - min(event["enqueued"] for event in batch)
+        self.last_flush_lag = lag
+        self.max_flush_lag = max(self.max_flush_lag, lag)
+
+        rows = [
+            {key: event[key] for key in ("fragment_id", "user_id", "ip_address", "created_at")}
+            for event in batch
+        ]
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                written = add_views_bulk(db, rows)
+            except Exception:
+                db.rollback()
+                self.failed += len(batch)
+                logger.exception("Не удалось записать %d просмотров", len(batch))
+                return 0
+            finally:
+                db.close()
+            self.written += written
+        return written
+
+
+def create_view_buffer() -> ViewBuffer:
+    """Буфер просмотров с параметрами из настроек"""
+    return ViewBuffer(
+        SessionLocal,
+        max_size=settings.VIEW_BUFFER_MAX_SIZE,
+        batch_size=settings.VIEW_BUFFER_BATCH_SIZE,
+        flush_interval=settings.VIEW_BUFFER_FLUSH_INTERVAL,
+    )
+
+
+# Общий буфер процесса (запускается при старте приложения)
+view_buffer = create_view_buffer()
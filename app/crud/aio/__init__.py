@@ -0,0 +1,22 @@
+"""Асинхронные версии функций app.crud.
+
+Каждая функция выполняет синхронную реализацию через AsyncSession.run_sync:
+ORM-код остается общим, а ввод-вывод драйвера выполняется асинхронно.
+Синхронный код при этом работает в потоке цикла событий, поэтому тяжелая
+работа (разбор текстов, распаковка, проверка регулярных выражений, файловый
+ввод-вывод) выносится в пул потоков через app.core.concurrency.run_blocking.
+"""
+import functools
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+
+def to_async(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Асинхронная обертка CRUD-функции, принимающая AsyncSession"""
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args: Any, **kwargs: Any) -> T:
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return wrapper
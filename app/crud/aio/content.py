@@ -0,0 +1,4 @@
+from app.crud import content as sync_crud
+from app.crud.aio import to_async
+
+stats = to_async(sync_crud.stats)
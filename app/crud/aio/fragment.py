@@ -0,0 +1,17 @@
+from app.crud import fragment as sync_crud
+from app.crud.aio import to_async
+
+get_by_id = to_async(sync_crud.get_by_id)
+get_multi = to_async(sync_crud.get_multi)
+get_version = to_async(sync_crud.get_version)
+export_query = to_async(sync_crud.export_query)
+create = to_async(sync_crud.create)
+create_bulk = to_async(sync_crud.create_bulk)
+update = to_async(sync_crud.update)
+delete = to_async(sync_crud.delete)
+add_view = to_async(sync_crud.add_view)
+
+# Функции без обращения к БД
+encode_cursor = sync_crud.encode_cursor
+export_record = sync_crud.export_record
+fragment_version = sync_crud.fragment_version
@@ -0,0 +1,6 @@
+from app.crud import like as sync_crud
+from app.crud.aio import to_async
+
+get_by_fragment_and_user = to_async(sync_crud.get_by_fragment_and_user)
+create = to_async(sync_crud.create)
+delete = to_async(sync_crud.delete)
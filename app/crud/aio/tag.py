@@ -0,0 +1,12 @@
+from app.crud import tag as sync_crud
+from app.crud.aio import to_async
+
+get_by_id = to_async(sync_crud.get_by_id)
+get_by_name = to_async(sync_crud.get_by_name)
+get_multi = to_async(sync_crud.get_multi)
+get_popular = to_async(sync_crud.get_popular)
+create = to_async(sync_crud.create)
+get_or_create = to_async(sync_crud.get_or_create)
+get_or_create_tags = to_async(sync_crud.get_or_create_tags)
+delete = to_async(sync_crud.delete)
+suggest = to_async(sync_crud.suggest)
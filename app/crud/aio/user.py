@@ -0,0 +1,50 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_password_hash_async, verify_and_update_password_async
+from app.crud import user as sync_crud
+from app.crud.aio import to_async
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+
+get_by_id = to_async(sync_crud.get_by_id)
+get_by_email = to_async(sync_crud.get_by_email)
+get_by_username = to_async(sync_crud.get_by_username)
+update_password_hash = to_async(sync_crud.update_password_hash)
+delete = to_async(sync_crud.delete)
+
+# Хеширование и проверка паролей ожидаются через пул паролей вне run_sync:
+# цикл событий не блокируется на время работы bcrypt
+
+
+async def authenticate(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Аутентификация пользователя"""
+    user = await get_by_email(db, email=email)
+    if not user:
+        return None
+    verified, new_hash = await verify_and_update_password_async(password, str(user.hashed_password))
+    if not verified:
+        return None
+    # Стоимость bcrypt изменилась - сохраняем хеш с новой стоимостью
+    if new_hash:
+        await update_password_hash(db, user, new_hash)
+    return user
+
+
+async def create(db: AsyncSession, user_create: UserCreate) -> User:
+    """Создание нового пользователя"""
+    hashed_password = await get_password_hash_async(user_create.password)
+    return await db.run_sync(
+        lambda session: sync_crud.create(session, user_create, hashed_password=hashed_password)
+    )
+
+
+async def update(db: AsyncSession, db_user: User, user_update: UserUpdate) -> User:
+    """Обновление пользователя"""
+    hashed_password = None
+    if user_update.password:
+        hashed_password = await get_password_hash_async(user_update.password)
+    return await db.run_sync(
+        lambda session: sync_crud.update(session, db_user, user_update, hashed_password=hashed_password)
+    )
@@ -0,0 +1,5 @@
+from app.crud import view as sync_crud
+from app.crud.aio import to_async
+
+get_daily_views = to_async(sync_crud.get_daily_views)
+count_views = to_async(sync_crud.count_views)
@@ -0,0 +1,397 @@
+import hashlib
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import Text, bindparam, case, delete, event, exists, func, insert, select, type_coerce, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+from app.core.compression import COMPRESSED_PREFIX, decode_text
+from app.core.concurrency import run_blocking
+from app.core.content_store import PACK_CODEC, database_store, get_content_store, pack_store
+from app.models.content import ContentBlob
+from app.models.fragment import Fragment
+
+# Хранилище содержимого фрагментов с адресацией по хешу: одинаковые тексты
+# хранятся одной строкой content_blobs, ref_count - число ссылающихся
+# фрагментов. Строка удаляется, когда на нее не остается ссылок. Сам текст
+# хранит хранилище содержимого (CONTENT_STORE): колонка или pack-файл.
+
+PACK_PREFIX = f"{COMPRESSED_PREFIX}{PACK_CODEC}:"
+
+# Сессия дописала pack-файл: перед коммитом данные сохраняются на диск
+_PACK_SYNC_KEY = "content_pack_sync"
+
+
+@event.listens_for(Session, "before_commit")
+def _sync_pack(session: Session) -> None:
+    if session.info.pop(_PACK_SYNC_KEY, False):
+        # fsync и пауза группового коммита - вне потока цикла событий
+        run_blocking(pack_store.sync)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pack_sync(session: Session) -> None:
+    # Записи отмененной транзакции остаются в pack-файле мусором до сжатия
+    session.info.pop(_PACK_SYNC_KEY, None)
+
+
+def _put(db: Session, text: str) -> str:
+    store = get_content_store()
+    if store is pack_store:
+        db.info[_PACK_SYNC_KEY] = True
+    return store.put(text)
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 текста (hex)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _insert_ignore(db: Session) -> Insert:
+    """INSERT, пропускающий содержимое, уже добавленное параллельным запросом"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(ContentBlob).on_conflict_do_nothing(index_elements=["hash"])
+    if dialect == "postgresql":
+        return postgresql.insert(ContentBlob).on_conflict_do_nothing(index_elements=["hash"])
+    if dialect == "mysql":
+        return mysql.insert(ContentBlob).prefix_with("IGNORE")
+    return insert(ContentBlob)
+
+
+def _change_refs(db: Session, blob_counts: Dict[Any, int], key: Any, sign: int) -> None:
+    """Изменение ref_count; строки с одинаковым изменением - одним UPDATE"""
+    by_count: Dict[int, List[Any]] = {}
+    for value, count in blob_counts.items():
+        by_count.setdefault(count, []).append(value)
+    for count, values in by_count.items():
+        db.execute(
+            update(ContentBlob)
+            .where(key.in_(values))
+            .values(ref_count=ContentBlob.ref_count + sign * count)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def acquire(db: Session, texts: List[str]) -> List[int]:
+    """Ссылки на содержимое для списка текстов (без коммита).
+
+    Новое содержимое записывается в хранилище и вставляется одним
+    многострочным INSERT с пропуском конфликтов (параллельная вставка того же
+    текста), ref_count увеличивается на число ссылок.
+    Возвращает ID строк content_blobs в порядке текстов.
+    """
+    if not texts:
+        return []
+    hashes = [content_hash(text) for text in texts]
+    by_hash = dict(zip(hashes, texts))
+    pending = Counter(hashes)
+    ids: Dict[str, int] = {}
+
+    while pending:
+        # В хранилище записывается только новое содержимое
+        existing = set(
+            db.execute(select(ContentBlob.hash).where(ContentBlob.hash.in_(pending))).scalars()
+        )
+        missing = [value for value in pending if value not in existing]
+        if missing:
+            db.execute(
+                _insert_ignore(db),
+                [
+                    {
+                        "hash": value,
+                        "content": _put(db, by_hash[value]),
+                        "size": len(by_hash[value].encode("utf-8")),
+                    }
+                    for value in missing
+                ]
+            )
+        _change_refs(db, pending, ContentBlob.hash, sign=1)
+        found = dict(
+            db.execute(
+                select(ContentBlob.hash, ContentBlob.id).where(ContentBlob.hash.in_(pending))
+            ).all()
+        )
+        ids.update(found)
+        # Строка, удаленная параллельным освобождением между проверкой и
+        # UPDATE, ссылку не получила - добавляем ее заново
+        pending = Counter({value: count for value, count in pending.items() if value not in found})
+
+    return [ids[value] for value in hashes]
+
+
+def release(db: Session, blob_ids: Iterable[Optional[int]]) -> None:
+    """Освобождение ссылок на содержимое (без коммита).
+
+    Вызывается после того, как фрагменты перестали ссылаться на содержимое.
+    Строки без ссылок удаляются; NOT EXISTS защищает от удаления при
+    расхождении ref_count с фактическими ссылками.
+    """
+    counts = Counter(blob_id for blob_id in blob_ids if blob_id is not None)
+    if not counts:
+        return
+    _change_refs(db, counts, ContentBlob.id, sign=-1)
+    _delete_unreferenced(db, ContentBlob.id.in_(counts))
+
+
+def _delete_unreferenced(db: Session, *criteria: Any) -> int:
+    result = db.execute(
+        delete(ContentBlob)
+        .where(
+            ContentBlob.ref_count <= 0,
+            ~exists().where(Fragment.content_blob_id == ContentBlob.id),
+            *criteria
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def migrate_inline(db: Session, batch_size: int = 500) -> int:
+    """Перенос содержимого, хранящегося в строках фрагментов, в content_blobs.
+
+    Выполняется пачками по batch_size фрагментов, каждая пачка - отдельная
+    транзакция, поэтому перенос можно прервать и продолжить.
+    Возвращает количество перенесенных фрагментов.
+    """
+    table = Fragment.__table__
+    # Текст читается из колонки строки фрагмента, а не из выражения Fragment.content
+    inline_content = type_coerce(table.c.content, Text)
+    link = (
+        update(table)
+        .where(table.c.id == bindparam("fragment_id"))
+        .values(
+            content_blob_id=bindparam("blob_id"),
+            content="",
+            # Перенос - не изменение фрагмента
+            updated_at=table.c.updated_at
+        )
+    )
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, inline_content)
+            .where(table.c.id > last_id, table.c.content_blob_id.is_(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        blob_ids = acquire(db, [decode_text(stored) for _, stored in rows])
+        db.execute(
+            link,
+            [
+                {"fragment_id": fragment_id, "blob_id": blob_id}
+                for (fragment_id, _), blob_id in zip(rows, blob_ids)
+            ]
+        )
+        db.commit()
+        migrated += len(rows)
+        last_id = rows[-1][0]
+
+    return migrated
+
+
+def collect_garbage(db: Session, batch_size: int = 1000) -> int:
+    """Пересчет ref_count по фрагментам и удаление содержимого без ссылок.
+
+    Возвращает количество удаленных строк content_blobs.
+    """
+    actual = (
+        select(func.count(Fragment.id))
+        .where(Fragment.content_blob_id == ContentBlob.id)
+        .scalar_subquery()
+    )
+    last_id = 0
+    while True:
+        ids = list(
+            db.execute(
+                select(ContentBlob.id)
+                .where(ContentBlob.id > last_id)
+                .order_by(ContentBlob.id)
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not ids:
+            break
+        # Подсчет и запись одним UPDATE, как в reconcile_counters
+        db.execute(
+            update(ContentBlob)
+            .where(ContentBlob.id.in_(ids), ContentBlob.ref_count != actual)
+            .values(ref_count=actual)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        last_id = ids[-1]
+
+    removed = _delete_unreferenced(db)
+    db.commit()
+    return removed
+
+
+def stats(db: Session) -> Dict[str, Any]:
+    """Статистика дедупликации содержимого"""
+    fragments, inline = db.execute(
+        select(
+            func.count(Fragment.id),
+            func.coalesce(func.sum(case((Fragment.content_blob_id.is_(None), 1), else_=0)), 0),
+        )
+    ).one()
+    blobs, stored_bytes, referenced_bytes = db.execute(
+        select(
+            func.count(ContentBlob.id),
+            func.coalesce(func.sum(ContentBlob.size), 0),
+            func.coalesce(func.sum(ContentBlob.size * ContentBlob.ref_count), 0),
+        )
+    ).one()
+    return {
+        "fragments": fragments,
+        "inline_fragments": inline,
+        "blobs": blobs,
+        "stored_bytes": stored_bytes,
+        "referenced_bytes": referenced_bytes,
+        # Во сколько раз меньше хранится, чем без дедупликации
+        "dedup_ratio": round(referenced_bytes / stored_bytes, 3) if stored_bytes else 1.0,
+    }
+
+
+def _recompress(
+    db: Session, table: Any, batch_size: int, convert: Callable[[str], str], **values: Any
+) -> int:
+    # Сохраненные значения читаются и пишутся как есть, в обход CompressedText
+    stored_content = type_coerce(table.c.content, Text)
+    rewrite = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(content=bindparam("stored", type_=Text), **values)
+    )
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, stored_content)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        changed = []
+        for row_id, stored in rows:
+            new_stored = convert(stored)
+            if new_stored != stored:
+                changed.append({"row_id": row_id, "stored": new_stored})
+        if changed:
+            db.execute(rewrite, changed)
+        db.commit()
+        rewritten += len(changed)
+        last_id = rows[-1][0]
+
+    return rewritten
+
+
+def compress_content(db: Session, batch_size: int = 500) -> int:
+    """Перезапись содержимого по текущим настройкам хранения пачками.
+
+    Переносит строки content_blobs в текущее хранилище (CONTENT_STORE) и
+    сжимает или распаковывает содержимое в БД по CONTENT_COMPRESSION, в том
+    числе еще не перенесенное содержимое фрагментов.
+    Возвращает количество перезаписанных строк.
+    """
+    store = get_content_store()
+
+    def convert(stored: str) -> str:
+        if store is pack_store and not stored.startswith(PACK_PREFIX):
+            db.info[_PACK_SYNC_KEY] = True
+        return store.convert(stored)
+
+    fragments = Fragment.__table__
+    return (
+        _recompress(db, ContentBlob.__table__, batch_size, convert)
+        # Сжатие - не изменение фрагмента
+        + _recompress(
+            db, fragments, batch_size, database_store.convert, updated_at=fragments.c.updated_at
+        )
+    )
+
+
+def compact_pack(db: Session, min_garbage: float = 0.0, batch_size: int = 500) -> Optional[Dict[str, Any]]:
+    """Сжатие pack-файлов: перенос живых записей в новое поколение.
+
+    Выполняется, если доля данных без ссылок не меньше min_garbage.
+    Файлы поколений, перенесенных предыдущим сжатием, удаляются: читатели,
+    получившие старую ссылку до его коммита, успевают дочитать. Возвращает
+    метрики сжатия или None, если сжатие не требовалось.
+    """
+    disk_bytes = pack_store.disk_bytes()
+    if not disk_bytes:
+        return None
+    live_bytes = db.execute(
+        select(func.coalesce(func.sum(ContentBlob.size), 0))
+        .where(type_coerce(ContentBlob.content, Text).startswith(PACK_PREFIX, autoescape=True))
+    ).scalar()
+    # Заголовок записи не учитывается: оценка с запасом в сторону сжатия
+    garbage = 1 - live_bytes / disk_bytes
+    if garbage < min_garbage:
+        return None
+
+    previous = pack_store.generations()[-1]
+    generation = pack_store.rotate()
+
+    table = ContentBlob.__table__
+    stored_content = type_coerce(table.c.content, Text)
+    relink = (
+        update(table)
+        .where(table.c.id == bindparam("blob_id"), stored_content == bindparam("old"))
+        .values(content=bindparam("new", type_=Text))
+    )
+    moved = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.hash, stored_content)
+            .where(table.c.id > last_id, stored_content.startswith(PACK_PREFIX, autoescape=True))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        changes = []
+        for blob_id, blob_hash, stored in rows:
+            old_generation, offset, length = (int(part) for part in stored[len(PACK_PREFIX):].split(":"))
+            if old_generation >= generation:
+                continue
+            digest = pack_store.record_digest(old_generation, offset)
+            if digest.hex() != blob_hash:
+                raise ValueError(f"Запись pack-файла не совпадает с содержимым {blob_id}")
+            data = pack_store.read(old_generation, offset, length)
+            try:
+                new_generation, new_offset = pack_store.append(bytes(data), digest)
+            finally:
+                data.release()
+            changes.append({
+                "blob_id": blob_id,
+                "old": stored,
+                "new": f"{PACK_PREFIX}{new_generation}:{new_offset}:{length}",
+            })
+        if changes:
+            db.info[_PACK_SYNC_KEY] = True
+            # Условие по старой ссылке: строку могли удалить или перенести параллельно
+            db.execute(relink, changes)
+        db.commit()
+        moved += len(changes)
+        last_id = rows[-1][0]
+
+    removed = pack_store.remove_generations(below=previous)
+    return {
+        "generation": generation,
+        "moved": moved,
+        "removed_generations": len(removed),
+        "garbage": round(garbage, 3),
+    }
@@ -1,14 +1,76 @@
-from typing import List, Optional, Tuple, Dict, Any
-from sqlalchemy import func, and_, or_
-from sqlalchemy.orm import Session
-
-from app.models.fragment import Fragment
+import base64
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple, Dict, Any
+from sqlalchemy import Select, case, func, and_, or_, distinct, exists, insert, literal, select, text
+from sqlalchemy import update as sql_update
+from sqlalchemy.orm import Query, Session, aliased, defer, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.base import utcnow
+from app.models.fragment import Fragment, summarize_content
 from app.models.tag import Tag, fragment_tag_association
 from app.models.like import Like
-from app.models.view import View
-# from app.models.user import User
+from app.models.view import View, ViewRollup
+from app.models.user import User
 from app.schemas.fragment import FragmentCreate, FragmentUpdate
+from app.crud import content as content_crud
+from app.crud import tag as tag_crud
 from app.crud.tag import get_or_create_tags
+from app.crud.search import apply_search
+from app.crud import trigram as trigram_crud
+from app.crud import view as view_crud
+from app.core.code_index import code_index
+from app.core.concurrency import run_blocking
+
+# Максимум результатов поиска по коду, передаваемых в SQL-запрос
+CODE_SEARCH_MAX_RESULTS = 1000
+# Запас при догрузке изменений в индекс кода (см. ensure_code_index)
+CODE_INDEX_SYNC_MARGIN = timedelta(minutes=1)
+
+
+def _user_liked_column(current_user_id: Optional[int]):
+    """Признак лайка текущего пользователя (EXISTS по уникальному индексу)"""
+    if current_user_id is None:
+        return literal(False).label("user_liked")
+    # Алиас, чтобы подзапрос не коррелировал с соединением по лайкам в get_multi
+    user_like = aliased(Like)
+    return (
+        exists()
+        .where(user_like.fragment_id == Fragment.id, user_like.user_id == current_user_id)
+        .label("user_liked")
+    )
+
+
+def _response_load_options() -> List[Any]:
+    """Пакетная загрузка автора и тегов для ответа (без N+1 запросов)"""
+    # Автор - many-to-one, JOIN не размножает строки; теги - одним
+    # дополнительным запросом IN на всю страницу
+    return [joinedload(Fragment.author), selectinload(Fragment.tags)]
+
+
+def _fill_missing_previews(db: Session, fragments: List[Fragment]) -> None:
+    """Превью фрагментов, записанных до появления превью (одним запросом)"""
+    missing = {fragment.id: fragment for fragment in fragments if fragment.line_count is None}
+    if not missing:
+        return
+    rows = db.execute(select(Fragment.id, Fragment.content).where(Fragment.id.in_(missing)))
+    for fragment_id, content in rows:
+        preview, line_count = summarize_content(content)
+        # Значения только для ответа: строка не помечается измененной
+        set_committed_value(missing[fragment_id], "content_preview", preview)
+        set_committed_value(missing[fragment_id], "line_count", line_count)
+
+
+def _to_fragment_data(fragment: Fragment, user_liked: Any) -> Dict[str, Any]:
+    """Формирование словаря с фрагментом и счетчиками"""
+    return {
+        "fragment": fragment,
+        "likes_count": fragment.likes_count or 0,
+        "views_count": fragment.views_count or 0,
+        "is_liked_by_current_user": bool(user_liked)
+    }
 
 
 def get_by_id(
@@ -18,16 +80,9 @@ def get_by_id(
 ) -> Optional[Dict[str, Any]]:
     """Получение фрагмента по ID с дополнительной информацией"""
     query = (
-        db.query(
-            Fragment,
-            func.count(Like.id).label("likes_count"),
-            func.count(View.id).label("views_count"),
-            func.count(Like.id).filter(Like.user_id == current_user_id).label("user_liked")
-        )
-        .outerjoin(Like, Like.fragment_id == Fragment.id)
-        .outerjoin(View, View.fragment_id == Fragment.id)
+        db.query(Fragment, _user_liked_column(current_user_id))
+        .options(*_response_load_options())
         .filter(Fragment.id == fragment_id)
-        .group_by(Fragment.id)
     )
 
     result = query.first()
@@ -35,20 +90,97 @@ def get_by_id(
     if not result:
         return None
 
-    fragment, likes_count, views_count, user_liked = result
+    fragment, user_liked = result
 
     # Проверка доступа: либо фрагмент публичный, либо текущий пользователь - автор
     if not fragment.is_public and (current_user_id is None or fragment.author_id != current_user_id):
         return None
 
+    return _to_fragment_data(fragment, user_liked)
+
+
+def _version(
+    fragment_id: int,
+    is_public: bool,
+    updated_at: Optional[datetime],
+    likes_count: Optional[int],
+    views_count: Optional[int],
+    user_liked: Optional[bool],
+    author_updated_at: Optional[datetime],
+    tags_usage: Optional[int],
+) -> Dict[str, Any]:
+    """Версия представления фрагмента для ETag, время изменения для
+    Last-Modified и признак публичности для Cache-Control"""
+    times = [value for value in (updated_at, author_updated_at) if value is not None]
     return {
-        "fragment": fragment,
-        "likes_count": likes_count,
-        "views_count": views_count,
-        "is_liked_by_current_user": bool(user_liked)
+        "version": [
+            fragment_id, updated_at, likes_count or 0, views_count or 0,
+            user_liked, author_updated_at, tags_usage or 0,
+        ],
+        "last_modified": max(times) if times else None,
+        "is_public": bool(is_public),
     }
 
 
+def fragment_version(fragment_data: Dict[str, Any], current_user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Версия загруженного фрагмента (см. get_version)"""
+    fragment = fragment_data["fragment"]
+    return _version(
+        fragment.id,
+        fragment.is_public,
+        fragment.updated_at,
+        fragment_data["likes_count"],
+        fragment_data["views_count"],
+        fragment_data["is_liked_by_current_user"] if current_user_id else None,
+        fragment.author.updated_at,
+        sum(tag.usage_count or 0 for tag in fragment.tags),
+    )
+
+
+def get_version(
+    db: Session,
+    fragment_id: int,
+    current_user_id: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Версия фрагмента без загрузки содержимого, автора и тегов.
+
+    Изменение тегов фрагмента обновляет updated_at, счетчики и число
+    использований тегов входят в версию, поэтому она меняется вместе
+    с ответом get_by_id. None - фрагмент не найден или недоступен.
+    """
+    tags_usage = (
+        select(func.sum(Tag.usage_count))
+        .join(fragment_tag_association, fragment_tag_association.c.tag_id == Tag.id)
+        .where(fragment_tag_association.c.fragment_id == Fragment.id)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        select(
+            Fragment.id,
+            Fragment.is_public,
+            Fragment.author_id,
+            Fragment.updated_at,
+            Fragment.likes_count,
+            Fragment.views_count,
+            _user_liked_column(current_user_id),
+            User.updated_at,
+            tags_usage,
+        )
+        .join(User, User.id == Fragment.author_id)
+        .where(Fragment.id == fragment_id)
+    ).first()
+
+    # Те же правила доступа, что и в get_by_id
+    if row is None or (not row.is_public and (current_user_id is None or row.author_id != current_user_id)):
+        return None
+
+    return _version(
+        row[0], row[1], row[3], row[4], row[5],
+        bool(row[6]) if current_user_id else None,
+        row[7], row[8],
+    )
+
+
 def get_multi(
     db: Session,
     skip: int = 0,
@@ -59,21 +191,94 @@ def get_multi(
     filter_tag: Optional[str] = None,
     filter_liked_by_user: Optional[int] = None,
     search_query: Optional[str] = None,
-    include_private: bool = False
-) -> Tuple[List[Dict[str, Any]], int]:
-    """Получение списка фрагментов с пагинацией и фильтрацией"""
+    include_private: bool = False,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    sort: str = "new",
+    search_mode: str = "fulltext",
+    summary: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Получение списка фрагментов с пагинацией и фильтрацией.
+
+    Если передан cursor, вместо OFFSET используется переход по ключу
+    (created_at, id); пустая строка означает первую страницу.
+    При with_total=False общее количество не считается и возвращается None.
+    sort="relevance" вместе с search_query упорядочивает результаты
+    по релевантности полнотекстового поиска.
+    search_mode="code" ищет по индексу идентификаторов кода (BM25,
+    все термины запроса обязательны), не более CODE_SEARCH_MAX_RESULTS.
+    search_mode="substring" и "regex" ищут подстроку или регулярное
+    выражение в содержимом через индекс триграмм.
+    summary=True не загружает содержимое: вместо него в ответе превью
+    content_preview и число строк line_count.
+    """
+    if sort == "relevance" and cursor is not None:
+        raise ValueError("Сортировка по релевантности не поддерживает курсор")
+
     # Базовый запрос
-    query = (
-        db.query(
-            Fragment,
-            func.count(Like.id).label("likes_count"),
-            func.count(View.id).label("views_count"),
-            func.count(Like.id).filter(Like.user_id == current_user_id).label("user_liked")
-        )
-        .outerjoin(Like, Like.fragment_id == Fragment.id)
-        .outerjoin(View, View.fragment_id == Fragment.id)
+    query = db.query(Fragment, _user_liked_column(current_user_id))
+    query, relevance = _apply_filters(
+        db,
+        query,
+        current_user_id=current_user_id,
+        filter_author_id=filter_author_id,
+        filter_language=filter_language,
+        filter_tag=filter_tag,
+        filter_liked_by_user=filter_liked_by_user,
+        search_query=search_query,
+        include_private=include_private,
+        search_mode=search_mode,
     )
 
+    # Получаем общее количество результатов
+    total = (
+        query.with_entities(func.count(distinct(Fragment.id))).scalar()
+        if with_total else None
+    )
+
+    # Применяем пагинацию и получаем результаты
+    if sort == "relevance" and relevance is not None:
+        query = query.order_by(relevance)
+    query = query.order_by(Fragment.created_at.desc(), Fragment.id.desc())
+    if cursor is not None:
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Fragment.created_at < created_at,
+                    and_(Fragment.created_at == created_at, Fragment.id < last_id)
+                )
+            )
+    else:
+        query = query.offset(skip)
+    query = query.options(*_response_load_options())
+    if summary:
+        query = query.options(defer(Fragment._content), defer(Fragment.inline_content))
+    results = query.limit(limit).all()
+    if summary:
+        _fill_missing_previews(db, [fragment for fragment, _ in results])
+
+    fragments: List[Dict[str, Any]] = [
+        _to_fragment_data(fragment, user_liked)
+        for fragment, user_liked in results
+    ]
+
+    return fragments, total
+
+
+def _apply_filters(
+    db: Session,
+    query: Query,
+    current_user_id: Optional[int] = None,
+    filter_author_id: Optional[int] = None,
+    filter_language: Optional[str] = None,
+    filter_tag: Optional[str] = None,
+    filter_liked_by_user: Optional[int] = None,
+    search_query: Optional[str] = None,
+    include_private: bool = False,
+    search_mode: str = "fulltext"
+) -> Tuple[Query, Optional[Any]]:
+    """Фильтры видимости, атрибутов и поиска; возвращает запрос и выражение релевантности"""
     # Учитываем приватные фрагменты
     if not include_private:
         # Показываем только публичные фрагменты + приватные фрагменты текущего пользователя
@@ -118,32 +323,92 @@ def get_multi(
             )
         )
 
-    if search_query:
-        search = f"%{search_query}%"
-        query = query.filter(
-            or_(
-                Fragment.title.ilike(search),
-                Fragment.description.ilike(search),
-                Fragment.content.ilike(search)
+    relevance = None
+    if search_query and search_mode == "code":
+        ensure_code_index(db)
+        hits = code_index.search(search_query, limit=CODE_SEARCH_MAX_RESULTS)
+        ids = [doc_id for doc_id, _ in hits]
+        query = query.filter(Fragment.id.in_(ids))
+        if ids:
+            relevance = case(
+                {doc_id: position for position, doc_id in enumerate(ids)},
+                value=Fragment.id
             )
-        )
+    elif search_query and search_mode == "substring":
+        query = trigram_crud.apply_substring_search(query, search_query)
+    elif search_query and search_mode == "regex":
+        query = trigram_crud.apply_regex_search(db, query, search_query)
+    elif search_query:
+        query, relevance = apply_search(query, search_query)
 
-    # Получаем общее количество результатов
-    total = query.group_by(Fragment.id).count()
+    return query, relevance
 
-    # Применяем пагинацию и получаем результаты
-    results = query.group_by(Fragment.id).order_by(Fragment.created_at.desc()).offset(skip).limit(limit).all()
 
-    fragments: List[Dict[str, Any]] = []
-    for fragment, likes_count, views_count, user_liked in results:
-        fragments.append({
-            "fragment": fragment,
-            "likes_count": likes_count,
-            "views_count": views_count,
-            "is_liked_by_current_user": bool(user_liked)
-        })
+def encode_cursor(fragment: Fragment) -> str:
+    """Курсор, указывающий на позицию сразу после фрагмента"""
+    raw = json.dumps([fragment.created_at.isoformat(), fragment.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-    return fragments, total
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Разбор курсора; ValueError, если курсор поврежден"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, fragment_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(fragment_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Некорректный курсор") from e
+
+
+def export_query(
+    db: Session,
+    filter_author_id: Optional[int] = None,
+    filter_language: Optional[str] = None,
+    filter_tag: Optional[str] = None,
+    filter_liked_by_user: Optional[int] = None,
+    search_query: Optional[str] = None,
+    include_private: bool = True,
+    search_mode: str = "fulltext"
+) -> Select:
+    """Запрос выгрузки фрагментов с фильтрами get_multi, по возрастанию ID.
+
+    Возвращает оператор SELECT для потокового чтения (yield_per).
+    """
+    query, _ = _apply_filters(
+        db,
+        db.query(Fragment),
+        filter_author_id=filter_author_id,
+        filter_language=filter_language,
+        filter_tag=filter_tag,
+        filter_liked_by_user=filter_liked_by_user,
+        search_query=search_query,
+        include_private=include_private,
+        search_mode=search_mode,
+    )
+    return (
+        query.options(*_response_load_options())
+        .order_by(Fragment.id)
+        .statement
+    )
+
+
+def export_record(fragment: Fragment) -> Dict[str, Any]:
+    """Запись выгрузки; совместима с форматом массового импорта"""
+    return {
+        "id": fragment.id,
+        "title": fragment.title,
+        "content": fragment.content,
+        "language": fragment.language,
+        "description": fragment.description,
+        "is_public": fragment.is_public,
+        "tags": [tag.name for tag in fragment.tags],
+        "author_id": fragment.author_id,
+        "author": fragment.author.username,
+        "likes_count": fragment.likes_count,
+        "views_count": fragment.views_count,
+        "created_at": fragment.created_at.isoformat(),
+        "updated_at": fragment.updated_at.isoformat(),
+    }
 
 
 def create(
@@ -152,10 +417,14 @@ def create(
     author_id: int
 ) -> Fragment:
     """Создание нового фрагмента"""
-    # Создаем новый фрагмент
+    # Создаем новый фрагмент; одинаковое содержимое хранится одной копией
+    [blob_id] = content_crud.acquire(db, [fragment_create.content])
+    preview, line_count = summarize_content(fragment_create.content)
     db_fragment = Fragment(
         title=fragment_create.title,
-        content=fragment_create.content,
+        content_blob_id=blob_id,
+        content_preview=preview,
+        line_count=line_count,
         language=fragment_create.language,
         description=fragment_create.description,
         is_public=fragment_create.is_public,
@@ -163,17 +432,107 @@ def create(
     )
     db.add(db_fragment)
     db.flush()
+    trigram_crud.index_fragment(db, db_fragment.id, fragment_create.content)
 
     # Добавляем теги, если они указаны
+    usage_deltas: Dict[str, int] = {}
     if fragment_create.tags:
         tags = get_or_create_tags(db, fragment_create.tags)
         db_fragment.tags = tags
+        usage_deltas = tag_crud.change_usage(db, added=tags, removed=[])
 
     db.commit()
     db.refresh(db_fragment)
+    code_index.add(db_fragment.id, _code_index_text(db_fragment))
+    tag_crud.apply_usage_to_index(usage_deltas)
     return db_fragment
 
 
+def create_bulk(
+    db: Session,
+    fragments_create: List[FragmentCreate],
+    author_id: int
+) -> List[int]:
+    """Создание пачки фрагментов в одной транзакции.
+
+    Теги всех фрагментов разрешаются одним вызовом get_or_create_tags,
+    фрагменты, связи с тегами и триграммы вставляются многострочными INSERT.
+    Возвращает ID созданных фрагментов в порядке входных данных.
+    """
+    if not fragments_create:
+        return []
+    try:
+        names = [name for item in fragments_create for name in (item.tags or [])]
+        # get_or_create_tags возвращает теги в порядке нормализованных имен
+        tags_by_name = dict(zip(tag_crud.normalize_names(names), get_or_create_tags(db, names)))
+        blob_ids = content_crud.acquire(db, [item.content for item in fragments_create])
+        ids = _insert_fragments(db, fragments_create, blob_ids, author_id)
+
+        associations = []
+        used_tags: List[Tag] = []
+        for fragment_id, item in zip(ids, fragments_create):
+            fragment_tags = [tags_by_name[name] for name in tag_crud.normalize_names(item.tags or [])]
+            used_tags.extend(fragment_tags)
+            associations.extend({"fragment_id": fragment_id, "tag_id": tag.id} for tag in fragment_tags)
+        if associations:
+            db.execute(insert(fragment_tag_association), associations)
+        trigram_crud.index_new_fragments(
+            db, [(fragment_id, item.content) for fragment_id, item in zip(ids, fragments_create)]
+        )
+        usage_deltas = tag_crud.change_usage(db, added=used_tags, removed=[])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for fragment_id, item in zip(ids, fragments_create):
+        code_index.add(fragment_id, _code_index_text(item))
+    tag_crud.apply_usage_to_index(usage_deltas)
+    return ids
+
+
+def _insert_fragments(
+    db: Session, fragments_create: List[FragmentCreate], blob_ids: List[int], author_id: int
+) -> List[int]:
+    """Вставка строк фрагментов с получением их ID в порядке входных данных"""
+    summaries = [summarize_content(item.content) for item in fragments_create]
+    rows = [
+        {
+            "title": item.title,
+            "content_blob_id": blob_id,
+            "content_preview": preview,
+            "line_count": line_count,
+            "language": item.language,
+            "description": item.description,
+            "is_public": item.is_public,
+            "author_id": author_id,
+        }
+        for item, blob_id, (preview, line_count) in zip(fragments_create, blob_ids, summaries)
+    ]
+    # Многострочный INSERT ... RETURNING (SQLite, PostgreSQL, MariaDB). Порядок
+    # строк RETURNING не гарантирован, но автоинкрементные ID внутри вставки
+    # возрастают в порядке VALUES, поэтому отсортированные ID соответствуют
+    # входным данным. sort_by_parameter_order на SQLite вставлял бы по строке.
+    dialect = db.get_bind().dialect
+    if dialect.insert_executemany_returning:
+        return sorted(db.scalars(insert(Fragment).returning(Fragment.id), rows))
+    if dialect.name == "mysql":
+        # MySQL без RETURNING: один многострочный INSERT. LAST_INSERT_ID() -
+        # ID первой строки; InnoDB выделяет ID для INSERT с известным числом
+        # строк подряд (при любом innodb_autoinc_lock_mode) с шагом
+        # auto_increment_increment
+        result = db.execute(insert(Fragment).values(rows))
+        if result.rowcount != len(rows):
+            raise RuntimeError("Вставлены не все фрагменты пачки")
+        step = db.execute(text("SELECT @@auto_increment_increment")).scalar_one()
+        return [result.lastrowid + i * step for i in range(len(rows))]
+    # Прочие БД без RETURNING: ID новых строк известны после вставки через ORM
+    db_fragments = [Fragment(**row) for row in rows]
+    db.add_all(db_fragments)
+    db.flush()
+    return [db_fragment.id for db_fragment in db_fragments]
+
+
 def update(
     db: Session,
     db_fragment: Fragment,
@@ -182,33 +541,114 @@ def update(
     """Обновление фрагмента"""
     update_data = fragment_update.model_dump(exclude_unset=True)
 
-    # Обрабатываем теги отдельно
+    # Обрабатываем теги и содержимое отдельно
     tags = None
     if "tags" in update_data:
         tags = update_data.pop("tags")
+    content = update_data.pop("content", None)
 
     # Обновляем остальные поля
     for key, value in update_data.items():
         setattr(db_fragment, key, value)
 
+    released_blob_id = None
+    if content is not None and content != db_fragment.content:
+        released_blob_id = db_fragment.content_blob_id
+        [db_fragment.content_blob_id] = content_crud.acquire(db, [content])
+        db_fragment.inline_content = ""
+        db_fragment.content_preview, db_fragment.line_count = summarize_content(content)
+        trigram_crud.index_fragment(db, db_fragment.id, content)
+
     # Обновляем теги, если они были указаны
+    usage_deltas: Dict[str, int] = {}
     if tags is not None:
+        old_tags = {tag.id: tag for tag in db_fragment.tags}
         new_tags = get_or_create_tags(db, tags)
+        new_ids = {tag.id for tag in new_tags}
         db_fragment.tags = new_tags
+        # Связи не обновляют строку фрагмента, а от updated_at зависит его версия
+        if new_ids != set(old_tags):
+            db_fragment.updated_at = utcnow()
+        usage_deltas = tag_crud.change_usage(
+            db,
+            added=[tag for tag in new_tags if tag.id not in old_tags],
+            removed=[tag for tag_id, tag in old_tags.items() if tag_id not in new_ids]
+        )
 
     db.add(db_fragment)
+    # Старое содержимое освобождается после того, как фрагмент перестал на него ссылаться
+    db.flush()
+    content_crud.release(db, [released_blob_id])
     db.commit()
     db.refresh(db_fragment)
+    code_index.add(db_fragment.id, _code_index_text(db_fragment))
+    tag_crud.apply_usage_to_index(usage_deltas)
     return db_fragment
 
 
 def delete(db: Session, db_fragment: Fragment) -> bool:
     """Удаление фрагмента"""
+    fragment_id = db_fragment.id
+    blob_id = db_fragment.content_blob_id
+    trigram_crud.remove_fragment(db, fragment_id)
+    view_crud.delete_for_fragment(db, fragment_id)
+    usage_deltas = tag_crud.change_usage(db, added=[], removed=db_fragment.tags)
     db.delete(db_fragment)
+    db.flush()
+    content_crud.release(db, [blob_id])
     db.commit()
+    code_index.remove(fragment_id)
+    tag_crud.apply_usage_to_index(usage_deltas)
     return True
 
 
+def _code_index_text(fragment: Any) -> str:
+    """Текст фрагмента для индекса кода"""
+    return "\n".join(filter(None, (fragment.title, fragment.description, fragment.content)))
+
+
+def _code_index_batches(db: Session, *criteria: Any) -> Iterator[List[Tuple[int, str]]]:
+    """Документы индекса кода пачками по 1000 фрагментов"""
+    result = db.execute(
+        select(Fragment.id, Fragment.title, Fragment.description, Fragment.content)
+        .where(*criteria)
+        .execution_options(yield_per=1000)
+    )
+    for partition in result.partitions():
+        yield [(row.id, _code_index_text(row)) for row in partition]
+
+
+def ensure_code_index(db: Session) -> None:
+    """Построение индекса кода и догрузка изменений других процессов.
+
+    Версия данных - число фрагментов и наибольший updated_at. При ее
+    изменении в индекс заново добавляются фрагменты, измененные не раньше
+    CODE_INDEX_SYNC_MARGIN до прошлой версии (запас на транзакции, которые
+    закоммичены позже), и удаляются отсутствующие в БД. Разбор текстов
+    выполняется в пуле потоков.
+    """
+    version = tuple(db.execute(select(func.count(Fragment.id), func.max(Fragment.updated_at))).one())
+    if code_index.built and code_index.version == version:
+        return
+    if not code_index.built:
+        # Одновременные первые запросы могут построить индекс дважды - результат тот же
+        for batch in _code_index_batches(db):
+            run_blocking(code_index.add_many, batch)
+        code_index.refresh([], [], version)
+        return
+
+    _, synced_until = code_index.version
+    criteria = []
+    if synced_until is not None:
+        criteria.append(Fragment.updated_at >= synced_until - CODE_INDEX_SYNC_MARGIN)
+    documents = [document for batch in _code_index_batches(db, *criteria) for document in batch]
+    removed: List[int] = []
+    if len(code_index.doc_ids() | {doc_id for doc_id, _ in documents}) != version[0]:
+        existing = set(db.execute(select(Fragment.id)).scalars())
+        removed = [doc_id for doc_id in code_index.doc_ids() if doc_id not in existing]
+    run_blocking(code_index.refresh, documents, removed, version)
+
+
 def add_view(
     db: Session,
     fragment_id: int,
@@ -222,6 +662,128 @@ def add_view(
         ip_address=ip_address
     )
     db.add(view)
+    increment_counter(db, fragment_id, Fragment.views_count)
     db.commit()
     db.refresh(view)
     return view
+
+
+def add_views_bulk(db: Session, views: List[Dict[str, Any]]) -> int:
+    """Запись пачки просмотров одним многострочным INSERT.
+
+    Просмотры удаленных фрагментов пропускаются. Возвращает число записанных.
+    """
+    fragment_ids = {view["fragment_id"] for view in views}
+    existing = set(
+        db.execute(select(Fragment.id).where(Fragment.id.in_(fragment_ids))).scalars()
+    )
+    rows = [view for view in views if view["fragment_id"] in existing]
+    if not rows:
+        return 0
+
+    db.execute(insert(View), rows)
+    per_fragment = Counter(view["fragment_id"] for view in rows)
+    for fragment_id, count in per_fragment.items():
+        increment_counter(db, fragment_id, Fragment.views_count, delta=count)
+    db.commit()
+    return len(rows)
+
+
+def increment_counter(db: Session, fragment_id: int, counter: Any, delta: int = 1) -> None:
+    """Атомарное изменение счетчика фрагмента (без коммита)"""
+    # updated_at сохраняется явно: лайк или просмотр не изменяет сам фрагмент
+    db.query(Fragment).filter(Fragment.id == fragment_id).update(
+        {counter: counter + delta, Fragment.updated_at: Fragment.updated_at},
+        synchronize_session=False
+    )
+
+
+def reconcile_counters(db: Session, batch_size: int = 1000) -> int:
+    """Пересчет likes_count/views_count по исходным таблицам пачками.
+
+    Возвращает количество исправленных фрагментов.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = [
+            row[0] for row in
+            db.query(Fragment.id)
+            .filter(Fragment.id > last_id)
+            .order_by(Fragment.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+
+        # Пересчет одним UPDATE с коррелированными подзапросами: подсчет и запись
+        # выполняются в одном операторе, поэтому конкурентный лайк или просмотр
+        # не теряется между COUNT и записью
+        actual_likes = (
+            select(func.count(Like.id))
+            .where(Like.fragment_id == Fragment.id)
+            .scalar_subquery()
+        )
+        # Просмотры - несвернутые записи плюс суточные сводки
+        actual_views = (
+            select(func.count(View.id))
+            .where(View.fragment_id == Fragment.id)
+            .scalar_subquery()
+            + select(func.coalesce(func.sum(ViewRollup.views), 0))
+            .where(ViewRollup.fragment_id == Fragment.id)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            sql_update(Fragment)
+            .where(
+                Fragment.id.in_(ids),
+                or_(
+                    Fragment.likes_count != actual_likes,
+                    Fragment.views_count != actual_views
+                )
+            )
+            .values(
+                likes_count=actual_likes,
+                views_count=actual_views,
+                updated_at=Fragment.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        fixed += result.rowcount
+
+        db.commit()
+        last_id = ids[-1]
+
+    return fixed
+
+
+def fill_previews(db: Session, batch_size: int = 500) -> int:
+    """Заполнение превью и числа строк фрагментов, записанных до их появления.
+
+    Возвращает количество обработанных фрагментов.
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Fragment.id, Fragment.content)
+            .where(Fragment.id > last_id, Fragment.line_count.is_(None))
+            .order_by(Fragment.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for fragment_id, content in rows:
+            preview, line_count = summarize_content(content)
+            # updated_at сохраняется: превью - не изменение фрагмента
+            db.execute(
+                sql_update(Fragment)
+                .where(Fragment.id == fragment_id)
+                .values(content_preview=preview, line_count=line_count, updated_at=Fragment.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        filled += len(rows)
+        last_id = rows[-1][0]
+    return filled
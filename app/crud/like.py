@@ -1,7 +1,9 @@
 from typing import Optional
 from sqlalchemy.orm import Session
 
+from app.models.fragment import Fragment
 from app.models.like import Like
+from app.crud.fragment import increment_counter
 
 
 def get_by_fragment_and_user(
@@ -27,12 +29,13 @@ def create(
     if existing_like:
         return existing_like
 
-    # Создаем новый лайк
+    # Создаем новый лайк и увеличиваем счетчик в той же транзакции
     db_like = Like(
         fragment_id=fragment_id,
         user_id=user_id
     )
     db.add(db_like)
+    increment_counter(db, fragment_id, Fragment.likes_count)
     db.commit()
     db.refresh(db_like)
     return db_like
@@ -40,6 +43,8 @@ def create(
 
 def delete(db: Session, db_like: Like) -> bool:
     """Удалить лайк"""
+    fragment_id = db_like.fragment_id
     db.delete(db_like)
+    increment_counter(db, fragment_id, Fragment.likes_count, delta=-1)
     db.commit()
     return True
@@ -0,0 +1,198 @@
+import re
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table, text, union
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Query
+
+from app.core.compression import decode_text
+from app.models.content import ContentBlob
+from app.models.fragment import Fragment
+
+# Полнотекстовый поиск по title/description/content:
+# - MySQL: индексы FULLTEXT фрагментов и content_blobs и MATCH ... AGAINST;
+# - SQLite: виртуальная таблица FTS5 с внешним содержимым, синхронизируемая триггерами;
+#   текст берется из content_blobs (или из строки фрагмента до переноса)
+#   и распаковывается функцией fragment_text;
+# - прочие СУБД: ILIKE без ранжирования.
+# В MySQL и прочих СУБД индексируется хранимое значение, поэтому сжатое
+# содержимое (CONTENT_COMPRESSION) и записи pack-файлов (CONTENT_STORE=pack)
+# по тексту не находятся, поиск по title/description работает как прежде.
+
+FULLTEXT_INDEX_NAME = "ft_fragments_search"
+BLOB_FULLTEXT_INDEX_NAME = "ft_content_blobs_search"
+FTS_TABLE_NAME = "fragments_fts"
+FTS_TRIGGERS = ("fragments_fts_ai", "fragments_fts_ad", "fragments_fts_au")
+
+fts_table = table(FTS_TABLE_NAME, column("rowid"), column("rank"))
+
+
+def _text(row: str) -> str:
+    """Текст строки фрагмента в триггере: из content_blobs или из самой строки.
+
+    Содержимое освобождается после изменения или удаления фрагмента,
+    поэтому для old оно еще существует.
+    """
+    return (
+        f"fragment_text(COALESCE((SELECT content FROM content_blobs "
+        f"WHERE id = {row}.content_blob_id), {row}.content))"
+    )
+
+
+_SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE_NAME} USING fts5(
+        title, description, content, content='fragments', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS fragments_fts_ai AFTER INSERT ON fragments BEGIN
+        INSERT INTO {FTS_TABLE_NAME}(rowid, title, description, content)
+        VALUES (new.id, new.title, new.description, {_text("new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS fragments_fts_ad AFTER DELETE ON fragments BEGIN
+        INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, title, description, content)
+        VALUES ('delete', old.id, old.title, old.description, {_text("old")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS fragments_fts_au
+        AFTER UPDATE OF title, description, content, content_blob_id ON fragments BEGIN
+        INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, title, description, content)
+        VALUES ('delete', old.id, old.title, old.description, {_text("old")});
+        INSERT INTO {FTS_TABLE_NAME}(rowid, title, description, content)
+        VALUES (new.id, new.title, new.description, {_text("new")});
+    END""",
+]
+
+# Индексирование существующих строк ('rebuild' FTS5 прочитал бы сжатые значения)
+_SQLITE_FILL = (
+    f"INSERT INTO {FTS_TABLE_NAME}(rowid, title, description, content) "
+    f"SELECT id, title, description, {_text('fragments')} FROM fragments"
+)
+
+_MYSQL_SETUP = {
+    "fragments": (
+        FULLTEXT_INDEX_NAME,
+        f"ALTER TABLE fragments ADD FULLTEXT INDEX {FULLTEXT_INDEX_NAME} (title, description, content)",
+    ),
+    "content_blobs": (
+        BLOB_FULLTEXT_INDEX_NAME,
+        f"ALTER TABLE content_blobs ADD FULLTEXT INDEX {BLOB_FULLTEXT_INDEX_NAME} (content)",
+    ),
+}
+
+
+def setup_search(bind: Any) -> bool:
+    """Создание поискового индекса, если его еще нет.
+
+    Возвращает True, если индекс был создан.
+    """
+    if isinstance(bind, Engine):
+        with bind.begin() as connection:
+            return setup_search(connection)
+
+    connection: Connection = bind
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE_NAME}
+        ).first()
+        # Триггеры пересоздаются, чтобы в существующих БД они распаковывали содержимое
+        for trigger in FTS_TRIGGERS:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        for statement in _SQLITE_SETUP:
+            connection.execute(text(statement))
+        if not exists:
+            # Индексируем уже существующие строки
+            connection.execute(text(_SQLITE_FILL))
+        return not exists
+    if dialect == "mysql":
+        created = False
+        for table_name, (index_name, statement) in _MYSQL_SETUP.items():
+            exists = connection.execute(
+                text(f"SHOW INDEX FROM {table_name} WHERE Key_name = :name"), {"name": index_name}
+            ).first()
+            if not exists:
+                connection.execute(text(statement))
+                created = True
+        return created
+    return False
+
+
+def _fragment_text(value: Any) -> Any:
+    return decode_text(value) if isinstance(value, str) else value
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection: Any, connection_record: Any) -> None:
+    # Функция нужна триггерам FTS5 в каждом соединении SQLite
+    # (включая адаптер aiosqlite); у драйверов MySQL create_function нет
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function("fragment_text", 1, _fragment_text, deterministic=True)
+
+
+def _after_create(target: Any, connection: Connection, **kw: Any) -> None:
+    setup_search(connection)
+
+
+# Индекс создается вместе с таблицей фрагментов (create_all)
+event.listen(Fragment.__table__, "after_create", _after_create)
+event.listen(
+    Fragment.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE_NAME}").execute_if(dialect="sqlite"),
+)
+
+
+def _fts5_query(search_query: str) -> Optional[str]:
+    """Запрос FTS5 из пользовательской строки: все слова, каждое в кавычках"""
+    words = re.findall(r"\w+", search_query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+def apply_search(query: Query, search_query: str) -> Tuple[Query, Optional[Any]]:
+    """Добавление условия полнотекстового поиска к запросу фрагментов.
+
+    Возвращает запрос и выражение ORDER BY, ставящее наиболее релевантные
+    фрагменты первыми (None, если СУБД не поддерживает ранжирование).
+    """
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        fts_query = _fts5_query(search_query)
+        if fts_query is not None:
+            query = query.join(fts_table, fts_table.c.rowid == Fragment.id).filter(
+                literal_column(FTS_TABLE_NAME).op("MATCH")(fts_query)
+            )
+            # rank в FTS5 - значение bm25(), чем меньше, тем релевантнее
+            return query, fts_table.c.rank
+
+    if dialect == "mysql":
+        # Содержимое до переноса - в строке фрагмента, после - в content_blobs.
+        # Отбор - объединение ID из двух MATCH: каждый читает свой индекс
+        # FULLTEXT (сумма MATCH в WHERE индекс не использует); релевантность
+        # считается только для отобранных строк
+        fragment_match = match(
+            Fragment.title, Fragment.description, Fragment.inline_content, against=search_query
+        ).in_natural_language_mode()
+        blob_match = match(ContentBlob.content, against=search_query).in_natural_language_mode()
+        matched_ids = union(
+            select(Fragment.id).where(fragment_match),
+            select(Fragment.id)
+            .join(ContentBlob, ContentBlob.id == Fragment.content_blob_id)
+            .where(blob_match),
+        )
+        query = query.outerjoin(ContentBlob, ContentBlob.id == Fragment.content_blob_id).filter(
+            Fragment.id.in_(select(matched_ids.subquery().c.id))
+        )
+        relevance = fragment_match + func.coalesce(blob_match, 0)
+        return query, relevance.desc()
+
+    search = f"%{search_query}%"
+    query = query.filter(
+        or_(
+            Fragment.title.ilike(search),
+            Fragment.description.ilike(search),
+            Fragment.content.ilike(search)
+        )
+    )
+    return query, None
@@ -1,9 +1,34 @@
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
 
-from app.models.tag import Tag
+from app.core.tag_index import tag_index
+from app.models.tag import Tag, fragment_tag_association
 from app.schemas.tag import TagCreate
 
+# Теги, созданные в незакоммиченной транзакции: попадают в индекс
+# автодополнения только после коммита
+_PENDING_TAGS_KEY = "tag_index_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _index_pending_tags(session: Session) -> None:
+    names = session.info.pop(_PENDING_TAGS_KEY, None)
+    if names:
+        tag_index.add_many(names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_tags(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS_KEY, None)
+
+
+def _index_after_commit(db: Session, names: Iterable[str]) -> None:
+    db.info.setdefault(_PENDING_TAGS_KEY, set()).update(names)
+
 
 def get_by_id(db: Session, tag_id: int) -> Optional[Tag]:
     """Получение тега по ID"""
@@ -19,24 +44,44 @@ def get_multi(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    sort: str = "name"
 ) -> Tuple[List[Tag], int]:
-    """Получение списка тегов с пагинацией и поиском"""
+    """Получение списка тегов с пагинацией и поиском.
+
+    sort: name - по имени, popular - по числу фрагментов (по убыванию).
+    """
     query = db.query(Tag)
 
     if search:
         query = query.filter(Tag.name.ilike(f"%{search}%"))
 
     total = query.count()
-    tags = query.order_by(Tag.name).offset(skip).limit(limit).all()
+    if sort == "popular":
+        query = query.order_by(Tag.usage_count.desc(), Tag.name)
+    else:
+        query = query.order_by(Tag.name)
+    tags = query.offset(skip).limit(limit).all()
 
     return tags, total
 
 
+def get_popular(db: Session, limit: int = 20) -> List[Tag]:
+    """Самые используемые теги (облако тегов)"""
+    return (
+        db.query(Tag)
+        .filter(Tag.usage_count > 0)
+        .order_by(Tag.usage_count.desc(), Tag.name)
+        .limit(limit)
+        .all()
+    )
+
+
 def create(db: Session, tag_create: TagCreate) -> Tag:
     """Создание нового тега"""
     db_tag = Tag(name=tag_create.name)
     db.add(db_tag)
+    _index_after_commit(db, [tag_create.name])
     db.commit()
     db.refresh(db_tag)
     return db_tag
@@ -51,23 +96,155 @@ def get_or_create(db: Session, name: str) -> Tag:
     db_tag = Tag(name=name)
     db.add(db_tag)
     db.flush()
+    _index_after_commit(db, [name])
     return db_tag
 
 
-def get_or_create_tags(db: Session, tag_names: List[str]) -> List[Tag]:
-    """Получение или создание списка тегов"""
-    tags: List[Tag] = []
-    for name in tag_names:
-        name = name.strip().lower()
-        if name:  # Проверяем, что имя тега не пустое
-            tag = get_or_create(db, name=name)
-            tags.append(tag)
+def normalize_names(tag_names: Iterable[str]) -> List[str]:
+    """Имена тегов в нижнем регистре без пустых и повторов (порядок сохраняется)"""
+    names = (_name_key(name) for name in tag_names)
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _name_key(name: str) -> str:
+    return name.strip().lower()
+
 
-    return tags
+def _insert_ignore(db: Session) -> Insert:
+    """INSERT, пропускающий теги, уже созданные параллельным запросом"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(Tag).on_conflict_do_nothing(index_elements=["name"])
+    if dialect == "postgresql":
+        return postgresql.insert(Tag).on_conflict_do_nothing(index_elements=["name"])
+    if dialect == "mysql":
+        return mysql.insert(Tag).prefix_with("IGNORE")
+    return insert(Tag)
+
+
+def get_or_create_tags(db: Session, tag_names: List[str]) -> List[Tag]:
+    """Получение или создание списка тегов (без коммита).
+
+    Существующие теги выбираются одним запросом, недостающие вставляются
+    одним многострочным INSERT с пропуском конфликтов и перечитываются.
+    """
+    names = normalize_names(tag_names)
+    if not names:
+        return []
+
+    # Ключи - нормализованные имена: при регистронезависимом сравнении
+    # (collation MySQL) запрос может вернуть тег, сохраненный как "Python"
+    tags: Dict[str, Tag] = {
+        _name_key(tag.name): tag for tag in db.query(Tag).filter(Tag.name.in_(names))
+    }
+    missing = [name for name in names if name not in tags]
+    if missing:
+        db.execute(_insert_ignore(db), [{"name": name} for name in missing])
+        _index_after_commit(db, missing)
+        # Перечитываем: часть тегов могла быть вставлена другим запросом
+        for tag in db.query(Tag).filter(Tag.name.in_(missing)):
+            tags[_name_key(tag.name)] = tag
+
+    return [tags[name] for name in names]
 
 
 def delete(db: Session, db_tag: Tag) -> bool:
     """Удаление тега"""
+    name = db_tag.name
     db.delete(db_tag)
     db.commit()
+    tag_index.remove(name)
     return True
+
+
+def change_usage(db: Session, added: Iterable[Tag], removed: Iterable[Tag]) -> Dict[str, int]:
+    """Изменение usage_count тегов при смене тегов фрагментов (без коммита).
+
+    Тег может встречаться несколько раз (несколько фрагментов). Теги с
+    одинаковым изменением обновляются одним UPDATE. Возвращает изменения
+    по именам тегов для обновления индекса после коммита.
+    """
+    deltas: Dict[str, int] = {}
+    tag_ids: Dict[str, int] = {}
+    for delta, tags in ((1, added), (-1, removed)):
+        for tag in tags:
+            deltas[tag.name] = deltas.get(tag.name, 0) + delta
+            tag_ids[tag.name] = tag.id
+
+    by_delta: Dict[int, List[int]] = {}
+    for name, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(tag_ids[name])
+    for delta, ids in by_delta.items():
+        db.execute(
+            update(Tag)
+            .where(Tag.id.in_(ids))
+            # updated_at не меняется: счетчик - не изменение самого тега
+            .values(usage_count=Tag.usage_count + delta, updated_at=Tag.updated_at)
+        )
+    return deltas
+
+
+def apply_usage_to_index(deltas: Dict[str, int]) -> None:
+    """Перенос закоммиченных изменений usage_count в индекс автодополнения"""
+    for name, delta in deltas.items():
+        tag_index.adjust_usage(name, delta)
+
+
+def reconcile_usage(db: Session, batch_size: int = 1000) -> int:
+    """Пересчет usage_count по таблице fragment_tag пачками.
+
+    Возвращает количество исправленных тегов.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = [
+            row[0] for row in
+            db.query(Tag.id)
+            .filter(Tag.id > last_id)
+            .order_by(Tag.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+
+        # Подсчет и запись в одном UPDATE, как и для счетчиков фрагментов
+        actual = (
+            select(func.count())
+            .select_from(fragment_tag_association)
+            .where(fragment_tag_association.c.tag_id == Tag.id)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            update(Tag)
+            .where(Tag.id.in_(ids), Tag.usage_count != actual)
+            .values(usage_count=actual, updated_at=Tag.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        fixed += result.rowcount
+
+        db.commit()
+        last_id = ids[-1]
+
+    # Индекс автодополнения перестраивается с исправленными значениями
+    if fixed:
+        tag_index.clear()
+    return fixed
+
+
+def ensure_tag_index(db: Session) -> None:
+    """Построение индекса автодополнения, если он еще не построен"""
+    if tag_index.built:
+        return
+    tag_index.build(db.query(Tag.name, Tag.usage_count).yield_per(1000))
+
+
+def suggest(db: Session, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+    """Теги по префиксу имени: пары (имя, число использований)"""
+    ensure_tag_index(db)
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+    return tag_index.search(prefix, limit=limit)
@@ -0,0 +1,373 @@
+import re
+import time
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Text, delete, func, insert, or_, select, type_coerce
+from sqlalchemy.orm import Query, Session
+
+from app.core.compression import COMPRESSED_PREFIX, decode_text
+from app.core.concurrency import run_blocking
+from app.models.fragment import Fragment
+from app.models.trigram import fragment_trigram
+
+# Поиск подстрок и простых регулярных выражений по содержимому фрагментов:
+# сначала пересечение списков триграмм дает небольшой набор кандидатов,
+# затем кандидаты проверяются точным сравнением.
+
+# Максимум кандидатов, проверяемых регулярным выражением в приложении
+REGEX_MAX_CANDIDATES = 5000
+# Ограничения регулярных выражений против катастрофического перебора:
+# длина, число повторений и время проверки кандидатов (секунды)
+REGEX_MAX_LENGTH = 256
+REGEX_MAX_REPEATS = 8
+REGEX_TIME_LIMIT = 2.0
+# Максимум сжатых кандидатов, распаковываемых при поиске подстроки
+SUBSTRING_MAX_DECODED = 5000
+
+_OCTAL_RE = re.compile(r"[0-7]{0,2}")
+_REPEAT_RE = re.compile(r"\{(\d*)(,?)(\d*)\}")
+# Длина аргумента экранированных последовательностей \xhh, \uhhhh, \Uhhhhhhhh
+_ESCAPE_ARGS = {"x": 2, "u": 4, "U": 8}
+
+
+def trigrams(text: str) -> Set[str]:
+    """Множество триграмм текста в нижнем регистре"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_fragment(db: Session, fragment_id: int, content: str) -> None:
+    """Обновление триграмм фрагмента (без коммита)"""
+    new = trigrams(content)
+    existing = set(
+        db.execute(
+            select(fragment_trigram.c.trigram)
+            .where(fragment_trigram.c.fragment_id == fragment_id)
+        ).scalars()
+    )
+
+    removed = existing - new
+    if removed:
+        db.execute(
+            delete(fragment_trigram).where(
+                fragment_trigram.c.fragment_id == fragment_id,
+                fragment_trigram.c.trigram.in_(removed)
+            )
+        )
+    added = new - existing
+    if added:
+        db.execute(
+            insert(fragment_trigram),
+            [{"trigram": trigram, "fragment_id": fragment_id} for trigram in added]
+        )
+
+
+def index_new_fragments(db: Session, fragments: Iterable[Tuple[int, str]]) -> None:
+    """Триграммы новых фрагментов одним многострочным INSERT (без коммита)"""
+    rows = [
+        {"trigram": trigram, "fragment_id": fragment_id}
+        for fragment_id, content in fragments
+        for trigram in trigrams(content)
+    ]
+    if rows:
+        db.execute(insert(fragment_trigram), rows)
+
+
+def remove_fragment(db: Session, fragment_id: int) -> None:
+    """Удаление триграмм фрагмента (без коммита)"""
+    db.execute(delete(fragment_trigram).where(fragment_trigram.c.fragment_id == fragment_id))
+
+
+def rebuild(db: Session, batch_size: int = 500) -> int:
+    """Построение триграмм для всех фрагментов пачками.
+
+    Возвращает количество обработанных фрагментов.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Fragment.id, Fragment.content)
+            .filter(Fragment.id > last_id)
+            .order_by(Fragment.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for fragment_id, content in rows:
+            index_fragment(db, fragment_id, content)
+        db.commit()
+        processed += len(rows)
+        last_id = rows[-1][0]
+    return processed
+
+
+def _candidates(required: Iterable[str]) -> Optional[Query]:
+    """Подзапрос ID фрагментов, содержащих все триграммы"""
+    wanted: Set[str] = set()
+    for literal in required:
+        wanted |= trigrams(literal)
+    if not wanted:
+        return None
+    return (
+        select(fragment_trigram.c.fragment_id)
+        .where(fragment_trigram.c.trigram.in_(wanted))
+        .group_by(fragment_trigram.c.fragment_id)
+        .having(func.count(fragment_trigram.c.trigram) == len(wanted))
+    )
+
+
+def apply_substring_search(query: Query, needle: str) -> Query:
+    """Фильтр по подстроке содержимого (без учета регистра).
+
+    Сжатые кандидаты проверяются в приложении, не больше
+    SUBSTRING_MAX_DECODED; иначе ValueError.
+    """
+    candidates = _candidates([needle])
+    if candidates is not None:
+        query = query.filter(Fragment.id.in_(candidates))
+    # Точная проверка; для строк короче трех символов - обычный ILIKE
+    exact = Fragment.content.icontains(needle, autoescape=True)
+
+    # Сжатое содержимое SQL сравнить не может - проверяем его в приложении
+    encoded = select(Fragment.id, _stored_content()).where(
+        Fragment.content.startswith(COMPRESSED_PREFIX, autoescape=True)
+    )
+    if candidates is not None:
+        encoded = encoded.where(Fragment.id.in_(candidates))
+    rows = query.session.execute(encoded.limit(SUBSTRING_MAX_DECODED + 1)).all()
+    if len(rows) > SUBSTRING_MAX_DECODED:
+        raise ValueError("Слишком общий запрос: уточните подстроку")
+    lowered = needle.lower()
+    matched = run_blocking(_matching_ids, rows, lambda content: lowered in content.lower())
+    if matched:
+        return query.filter(or_(exact, Fragment.id.in_(matched)))
+    return query.filter(exact)
+
+
+def _stored_content() -> Any:
+    """Содержимое в виде, сохраненном в БД (без распаковки при чтении)"""
+    return type_coerce(Fragment.content, Text)
+
+
+def _matching_ids(
+    rows: Sequence[Any], predicate: Callable[[str], Any], deadline: Optional[float] = None
+) -> List[int]:
+    """ID строк (id, сохраненное содержимое), текст которых удовлетворяет
+    predicate. Выполняется в пуле потоков (распаковка и проверка - CPU)"""
+    matched = []
+    for fragment_id, stored in rows:
+        if predicate(decode_text(stored)):
+            matched.append(fragment_id)
+        if deadline is not None and time.monotonic() > deadline:
+            raise ValueError("Слишком долгая проверка регулярного выражения: уточните его")
+    return matched
+
+
+class _Node:
+    """Элемент разобранного выражения: символ (char), группа (group),
+    проверка контекста (lookaround) или прочее (other)"""
+    __slots__ = ("kind", "value", "min", "max")
+
+    def __init__(self, kind: str, value: Any = None) -> None:
+        self.kind = kind
+        self.value = value
+        self.min = 1
+        self.max: Optional[int] = 1
+
+    @property
+    def repeats(self) -> bool:
+        return self.max is None or self.max > 1
+
+
+def _parse(pattern: str) -> List[List[_Node]]:
+    """Упрощенный разбор выражения, уже проверенного re.compile:
+    альтернативы верхнего уровня из последовательностей элементов.
+
+    Классы символов, якоря и последовательности вроде \\d - прочие элементы.
+    Обратные ссылки, условные группы и режим (?x) дают ValueError.
+    """
+    pos = 0
+
+    def sequence() -> List[List[_Node]]:
+        nonlocal pos
+        branches: List[List[_Node]] = [[]]
+        while pos < len(pattern) and pattern[pos] != ")":
+            if pattern[pos] == "|":
+                branches.append([])
+                pos += 1
+                continue
+            node = atom()
+            if node is not None:
+                repeat(node)
+                branches[-1].append(node)
+        return branches
+
+    def atom() -> Optional[_Node]:
+        nonlocal pos
+        char = pattern[pos]
+        pos += 1
+        if char == "(":
+            return group()
+        if char == "[":
+            # "]" сразу после "[" или "[^" - символ класса
+            if pattern.startswith("^", pos):
+                pos += 1
+            if pattern.startswith("]", pos):
+                pos += 1
+            while pattern[pos] != "]":
+                pos += 2 if pattern[pos] == "\\" else 1
+            pos += 1
+            return _Node("other")
+        if char == "\\":
+            escaped = pattern[pos]
+            pos += 1
+            if escaped in "123456789":
+                raise ValueError("Обратные ссылки в регулярном выражении не поддерживаются")
+            if escaped == "N":
+                pos = pattern.index("}", pos) + 1
+            elif escaped == "0":
+                pos = _OCTAL_RE.match(pattern, pos).end()
+            pos += _ESCAPE_ARGS.get(escaped, 0)
+            return _Node("other") if escaped.isalnum() else _Node("char", escaped)
+        if char in ".^$":
+            return _Node("other")
+        return _Node("char", char)
+
+    def group() -> Optional[_Node]:
+        nonlocal pos
+        kind = "group"
+        if pattern.startswith("?", pos):
+            if pattern.startswith(("?P=", "?("), pos):
+                raise ValueError("Обратные ссылки в регулярном выражении не поддерживаются")
+            if pattern.startswith("?#", pos):
+                pos = pattern.index(")", pos) + 1
+                return None
+            if pattern.startswith("?P<", pos):
+                pos = pattern.index(">", pos) + 1
+            elif pattern.startswith(("?=", "?!"), pos):
+                kind = "lookaround"
+                pos += 2
+            elif pattern.startswith(("?<=", "?<!"), pos):
+                kind = "lookaround"
+                pos += 3
+            else:
+                # Флаги: (?i) для всего выражения или (?i:...) для группы
+                end = pos + 1
+                while pattern[end] not in ":)":
+                    end += 1
+                if "x" in pattern[pos + 1:end].partition("-")[0]:
+                    raise ValueError("Режим (?x) в регулярном выражении не поддерживается")
+                pos = end + 1
+                if pattern[end] == ")":
+                    return None
+        node = _Node(kind, sequence())
+        pos += 1
+        return node
+
+    def repeat(node: _Node) -> None:
+        nonlocal pos
+        if pos >= len(pattern):
+            return
+        char = pattern[pos]
+        if char in "*+?":
+            node.min, node.max = {"*": (0, None), "+": (1, None), "?": (0, 1)}[char]
+            pos += 1
+        elif char == "{":
+            match = _REPEAT_RE.match(pattern, pos)
+            # "{" не в форме {m}, {m,n}, {,n}, {m,} - обычный символ
+            if match is None or not (match.group(1) or match.group(2)):
+                return
+            low, comma, high = match.groups()
+            node.min = int(low or 0)
+            node.max = int(high) if high else (None if comma else node.min)
+            pos = match.end()
+        else:
+            return
+        # Ленивые и захватывающие повторения
+        if pos < len(pattern) and pattern[pos] in "?+":
+            pos += 1
+
+    return sequence()
+
+
+def _check_complexity(branches: List[List[_Node]]) -> None:
+    """Отказ от выражений с экспоненциальным перебором: вложенных повторений
+    и альтернатив внутри повторения; число повторений ограничено"""
+    repeats = 0
+
+    def walk(branches: List[List[_Node]], in_repeat: bool) -> None:
+        nonlocal repeats
+        for nodes in branches:
+            for node in nodes:
+                if node.repeats:
+                    repeats += 1
+                    if in_repeat:
+                        raise ValueError("Вложенные повторения в регулярном выражении не поддерживаются")
+                if node.kind in ("group", "lookaround"):
+                    if node.repeats and len(node.value) > 1:
+                        raise ValueError("Альтернативы внутри повторения не поддерживаются")
+                    walk(node.value, in_repeat or node.repeats)
+
+    walk(branches, False)
+    if repeats > REGEX_MAX_REPEATS:
+        raise ValueError(f"Слишком много повторений в регулярном выражении (не больше {REGEX_MAX_REPEATS})")
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Литеральные фрагменты, обязательные для совпадения с выражением"""
+    literals: List[str] = []
+
+    def walk(nodes: List[_Node]) -> None:
+        run: List[str] = []
+        for node in nodes:
+            if node.kind == "char" and node.min >= 1:
+                run.append(node.value)
+                if node.max == 1:
+                    continue
+            literals.append("".join(run))
+            run = []
+            if node.kind == "group" and node.min >= 1 and len(node.value) == 1:
+                walk(node.value[0])
+        literals.append("".join(run))
+
+    branches = _parse(pattern)
+    if len(branches) == 1:
+        walk(branches[0])
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+def apply_regex_search(db: Session, query: Query, pattern: str) -> Query:
+    """Фильтр по регулярному выражению (без учета регистра).
+
+    Выражение должно содержать литерал не короче трех символов вне
+    альтернатив и необязательных частей и укладываться в ограничения
+    сложности (REGEX_MAX_LENGTH, REGEX_MAX_REPEATS, без вложенных
+    повторений и обратных ссылок); иначе ValueError.
+    """
+    if len(pattern) > REGEX_MAX_LENGTH:
+        raise ValueError(f"Регулярное выражение длиннее {REGEX_MAX_LENGTH} символов")
+    try:
+        compiled = re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Некорректное регулярное выражение: {e}") from e
+    _check_complexity(_parse(pattern))
+    literals = required_literals(pattern)
+
+    candidates = _candidates(literals)
+    if candidates is None:
+        raise ValueError("Регулярное выражение должно содержать литерал длиной от 3 символов")
+
+    rows = db.execute(
+        select(Fragment.id, _stored_content())
+        .where(Fragment.id.in_(candidates))
+        .limit(REGEX_MAX_CANDIDATES + 1)
+    ).all()
+    if len(rows) > REGEX_MAX_CANDIDATES:
+        raise ValueError("Слишком общее регулярное выражение")
+
+    matched = run_blocking(
+        _matching_ids, rows, compiled.search, deadline=time.monotonic() + REGEX_TIME_LIMIT
+    )
+    return query.filter(Fragment.id.in_(matched))
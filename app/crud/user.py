@@ -2,7 +2,8 @@ from typing import Optional
 
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.auth_cache import principal_cache
+from app.core.security import get_password_hash, verify_and_update_password
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -27,17 +28,27 @@ def authenticate(db: Session, email: str, password: str) -> Optional[User]:
     user = get_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, str(user.hashed_password)):
+    verified, new_hash = verify_and_update_password(password, str(user.hashed_password))
+    if not verified:
         return None
+    # Стоимость bcrypt изменилась - сохраняем хеш с новой стоимостью
+    if new_hash:
+        update_password_hash(db, user, new_hash)
     return user
 
 
-def create(db: Session, user_create: UserCreate) -> User:
-    """Создание нового пользователя"""
+def update_password_hash(db: Session, db_user: User, hashed_password: str) -> None:
+    """Сохранение хеша пароля, пересчитанного с новой стоимостью bcrypt"""
+    db_user.hashed_password = hashed_password
+    db.commit()
+
+
+def create(db: Session, user_create: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Создание нового пользователя (hashed_password - заранее вычисленный хеш)"""
     db_user = User(
         username=user_create.username,
         email=user_create.email,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=hashed_password or get_password_hash(user_create.password),
         bio=user_create.bio,
         is_active=user_create.is_active,
     )
@@ -47,13 +58,16 @@ def create(db: Session, user_create: UserCreate) -> User:
     return db_user
 
 
-def update(db: Session, db_user: User, user_update: UserUpdate) -> User:
-    """Обновление пользователя"""
+def update(
+    db: Session, db_user: User, user_update: UserUpdate, hashed_password: Optional[str] = None
+) -> User:
+    """Обновление пользователя (hashed_password - заранее вычисленный хеш нового пароля)"""
     update_data = user_update.model_dump(exclude_unset=True)
 
     # Если передан пароль, хешируем его
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        password = update_data.pop("password")
+        update_data["hashed_password"] = hashed_password or get_password_hash(password)
 
     for key, value in update_data.items():
         setattr(db_user, key, value)
@@ -61,11 +75,15 @@ def update(db: Session, db_user: User, user_update: UserUpdate) -> User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    # Права и активность могли измениться
+    principal_cache.invalidate(db_user.id)
     return db_user
 
 
 def delete(db: Session, db_user: User) -> bool:
     """Удаление пользователя"""
+    user_id = db_user.id
     db.delete(db_user)
     db.commit()
+    principal_cache.invalidate(user_id)
     return True
@@ -0,0 +1,153 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, distinct, func, select
+from sqlalchemy.orm import Session
+
+from app.models.base import utcnow
+from app.models.view import View, ViewRollup
+
+
+def _as_date(value: Any) -> date:
+    """Приведение результата DATE() к date (SQLite возвращает строку)"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def compact_views(db: Session, older_than_days: int = 30, batch_size: int = 500) -> int:
+    """Свертка просмотров старше N суток в суточные сводки с удалением исходных строк.
+
+    Обрабатывает фрагменты пачками, каждая пачка - отдельная транзакция,
+    поэтому задачу можно прерывать и запускать повторно.
+    Возвращает количество свернутых просмотров.
+    """
+    cutoff = datetime.combine(utcnow().date() - timedelta(days=older_than_days), time.min)
+    # Верхняя граница ID, чтобы не затронуть просмотры, записанные во время работы
+    max_id = db.execute(select(func.max(View.id))).scalar()
+    if max_id is None:
+        return 0
+
+    compacted = 0
+    last_fragment_id = 0
+    while True:
+        fragment_ids = list(
+            db.execute(
+                select(View.fragment_id)
+                .where(
+                    View.created_at < cutoff,
+                    View.id <= max_id,
+                    View.fragment_id > last_fragment_id
+                )
+                .group_by(View.fragment_id)
+                .order_by(View.fragment_id)
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not fragment_ids:
+            break
+
+        old_views = (
+            View.fragment_id.in_(fragment_ids),
+            View.created_at < cutoff,
+            View.id <= max_id,
+        )
+        day = func.date(View.created_at)
+        aggregates = db.execute(
+            select(
+                View.fragment_id,
+                day.label("day"),
+                func.count(View.id),
+                func.count(distinct(View.user_id)),
+                func.count(distinct(View.ip_address)),
+            )
+            .where(*old_views)
+            .group_by(View.fragment_id, day)
+        ).all()
+
+        for fragment_id, view_day, views, unique_users, unique_ips in aggregates:
+            rollup = db.get(ViewRollup, (fragment_id, _as_date(view_day)))
+            if rollup is None:
+                db.add(ViewRollup(
+                    fragment_id=fragment_id,
+                    day=_as_date(view_day),
+                    views=views,
+                    unique_users=unique_users,
+                    unique_ips=unique_ips,
+                ))
+            else:
+                # Досвертка опоздавших просмотров: уникальные значения
+                # суммируются и могут быть завышены
+                rollup.views += views
+                rollup.unique_users += unique_users
+                rollup.unique_ips += unique_ips
+            compacted += views
+
+        db.execute(delete(View).where(*old_views).execution_options(synchronize_session=False))
+        db.commit()
+        last_fragment_id = fragment_ids[-1]
+
+    return compacted
+
+
+def count_views(db: Session, fragment_id: int) -> int:
+    """Общее число просмотров: сводки плюс несвернутый хвост"""
+    rolled_up = db.execute(
+        select(func.coalesce(func.sum(ViewRollup.views), 0))
+        .where(ViewRollup.fragment_id == fragment_id)
+    ).scalar()
+    raw = db.execute(
+        select(func.count(View.id)).where(View.fragment_id == fragment_id)
+    ).scalar()
+    return int(rolled_up) + int(raw)
+
+
+def get_daily_views(
+    db: Session,
+    fragment_id: int,
+    since: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Просмотры фрагмента по дням из сводок и несвернутых записей"""
+    days: Dict[date, Dict[str, Any]] = {}
+
+    rollups = select(ViewRollup).where(ViewRollup.fragment_id == fragment_id)
+    if since is not None:
+        rollups = rollups.where(ViewRollup.day >= since)
+    for rollup in db.execute(rollups).scalars():
+        days[rollup.day] = {
+            "day": rollup.day,
+            "views": rollup.views,
+            "unique_users": rollup.unique_users,
+            "unique_ips": rollup.unique_ips,
+        }
+
+    day = func.date(View.created_at)
+    raw = (
+        select(
+            day,
+            func.count(View.id),
+            func.count(distinct(View.user_id)),
+            func.count(distinct(View.ip_address)),
+        )
+        .where(View.fragment_id == fragment_id)
+        .group_by(day)
+    )
+    if since is not None:
+        raw = raw.where(View.created_at >= datetime.combine(since, time.min))
+    for view_day, views, unique_users, unique_ips in db.execute(raw).all():
+        stats = days.setdefault(
+            _as_date(view_day),
+            {"day": _as_date(view_day), "views": 0, "unique_users": 0, "unique_ips": 0},
+        )
+        stats["views"] += views
+        stats["unique_users"] += unique_users
+        stats["unique_ips"] += unique_ips
+
+    return [days[key] for key in sorted(days)]
+
+
+def delete_for_fragment(db: Session, fragment_id: int) -> None:
+    """Удаление сводок просмотров фрагмента (без коммита)"""
+    db.execute(delete(ViewRollup).where(ViewRollup.fragment_id == fragment_id))
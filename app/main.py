@@ -1,17 +1,49 @@
 # app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.api.v1.router import router as api_router
-from app.core.database import engine
+from app.core.database import SessionLocal, engine
 from app.core.database import Base
+from app.core.content_store import pack_store
+from app.core.periodic import content_pack_compactor, tag_usage_reconciler
+from app.core.password_pool import PasswordPoolBusy, password_pool
+from app.core.view_buffer import view_buffer
+from app.crud.tag import ensure_tag_index
 import app.models  # Импортируем все модели для создания таблиц
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых задач приложения"""
+    if settings.VIEW_BUFFER_ENABLED:
+        view_buffer.start()
+    if settings.TAG_INDEX_WARMUP:
+        db = SessionLocal()
+        try:
+            ensure_tag_index(db)
+        finally:
+            db.close()
+    tag_usage_reconciler.start()
+    content_pack_compactor.start()
+    yield
+    # Дописываем накопленные просмотры перед завершением
+    view_buffer.stop()
+    tag_usage_reconciler.stop()
+    content_pack_compactor.stop()
+    pack_store.close()
+    password_pool.shutdown()
+
+
 # Создание экземпляра приложения FastAPI
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Настройка CORS
@@ -24,6 +56,15 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy) -> JSONResponse:
+    """Очередь операций с паролями переполнена - просим повторить позже"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
 # Подключение API роутеров
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -1,6 +1,8 @@
 from app.models.user import User
+from app.models.content import ContentBlob
 from app.models.fragment import Fragment
 from app.models.like import Like
-from app.models.view import View
+from app.models.view import View, ViewRollup
 from app.models.tag import Tag
+from app.models.trigram import fragment_trigram
 from app.core.database import Base
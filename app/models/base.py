@@ -1,8 +1,17 @@
+from datetime import datetime, timezone
+
 from sqlalchemy import Column, Integer, DateTime
-from sqlalchemy.sql import func
+
+
+def utcnow() -> datetime:
+    """Текущее время UTC без часового пояса (формат колонок DateTime)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class BaseModel(object):
     """Базовая модель с общими полями"""
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Время задается на стороне приложения, чтобы точность значений
+    # не зависела от СУБД (CURRENT_TIMESTAMP в SQLite - без микросекунд)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String
+
+from app.core.compression import EncodedText
+from app.core.database import Base
+
+
+class ContentBlob(Base):
+    """Содержимое фрагментов, общее для фрагментов с одинаковым текстом"""
+    __tablename__ = "content_blobs"
+
+    id = Column(Integer, primary_key=True)
+    # SHA-256 текста (hex)
+    hash = Column(String(64), nullable=False, unique=True)
+    # Значение, записанное хранилищем содержимого (app.core.content_store):
+    # текст, сжатый текст или ссылка на pack-файл
+    content = Column(EncodedText, nullable=False)
+    # Размер текста в байтах UTF-8 (для статистики без чтения содержимого)
+    size = Column(Integer, nullable=False)
+    # Число фрагментов, ссылающихся на содержимое
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
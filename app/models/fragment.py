@@ -1,23 +1,81 @@
-from sqlalchemy import Column, String, Text, Boolean, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from typing import Tuple
 
+from sqlalchemy import Column, String, Text, Boolean, Integer, ForeignKey, Index, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import column_property, relationship
+
+from app.core.compression import CompressedText
+from app.core.config import settings
 from app.models.base import BaseModel
+from app.models.content import ContentBlob
 from app.core.database import Base
 from app.models.tag import fragment_tag_association
 
+
+def summarize_content(text: str) -> Tuple[str, int]:
+    """Превью (первые CONTENT_PREVIEW_LINES строк) и число строк текста"""
+    lines = text.splitlines()
+    preview = "\n".join(lines[:settings.CONTENT_PREVIEW_LINES])
+    return preview[:settings.CONTENT_PREVIEW_MAX_CHARS], len(lines)
+
+
 class Fragment(Base, BaseModel):
     """Модель фрагмента кода"""
     __tablename__ = "fragments"
 
     title = Column(String(255), nullable=False, index=True)
-    content = Column(Text, nullable=False)
+    # Содержимое хранится в content_blobs (одна копия на одинаковые тексты).
+    # Строки, записанные до переноса или в обход CRUD, хранят текст в колонке
+    # content (inline_content); после переноса в ней пустая строка.
+    # Большие тексты хранятся сжатыми (CONTENT_COMPRESSION)
+    content_blob_id = Column(Integer, ForeignKey("content_blobs.id"), nullable=True, index=True)
+    inline_content = Column("content", CompressedText, nullable=False, default="")
+    _content = column_property(
+        func.coalesce(
+            select(ContentBlob.content)
+            .where(ContentBlob.id == content_blob_id)
+            .scalar_subquery(),
+            inline_content,
+        )
+    )
+    # Превью и число строк для списков без содержимого; вычисляются при записи
+    # (NULL - строка записана до их появления, см. команду fill-previews)
+    content_preview = Column(Text, nullable=True)
+    line_count = Column(Integer, nullable=True)
     language = Column(String(50), nullable=False, index=True)
     description = Column(Text, nullable=True)
     is_public = Column(Boolean, default=True)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    # Денормализованные счетчики, обновляются вместе с лайками и просмотрами
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    views_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Отношения
     author = relationship("User", back_populates="fragments")
     likes = relationship("Like", back_populates="fragment", cascade="all, delete-orphan")
     views = relationship("View", back_populates="fragment", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary=fragment_tag_association, back_populates="fragments")
+
+    @hybrid_property
+    def content(self) -> str:
+        """Текст фрагмента (в SQL - выражение с подзапросом к content_blobs)"""
+        return self._content
+
+    @content.inplace.setter
+    def _content_setter(self, value: str) -> None:
+        # Запись в обход CRUD хранит текст в строке фрагмента
+        self.inline_content = value
+        self.content_blob_id = None
+        self._content = value
+        self.content_preview, self.line_count = summarize_content(value)
+
+    @content.inplace.expression
+    @classmethod
+    def _content_expression(cls):
+        return cls._content
+
+    # Индекс для постраничного вывода по курсору (created_at, id)
+    __table_args__ = (
+        Index("ix_fragments_created_at_id", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Column, String, Table, ForeignKey
+from sqlalchemy import Index, Integer, Column, String, Table, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
@@ -16,6 +16,15 @@ class Tag(Base, BaseModel):
     __tablename__ = "tags"
 
     name = Column(String(50), nullable=False, unique=True, index=True)
+    # Денормализованное число фрагментов с тегом
+    usage_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Отношения
     fragments = relationship("Fragment", secondary=fragment_tag_association, back_populates="tags")
+
+    # Индекс для выборки популярных тегов (ORDER BY usage_count DESC, name):
+    # направления колонок совпадают с сортировкой, поэтому индекс читается
+    # по порядку без filesort и в MySQL
+    __table_args__ = (
+        Index("ix_tags_usage_count_desc_name", usage_count.desc(), name),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table
+from sqlalchemy.dialects import mysql
+
+from app.core.database import Base
+
+# Триграммы содержимого фрагментов для поиска подстрок:
+# одна строка на каждую различную триграмму (в нижнем регистре) фрагмента.
+# В MySQL сравнение двоичное: при collation по умолчанию "все" и "всё",
+# "cafe" и "café" совпадают и нарушали бы первичный ключ
+fragment_trigram = Table(
+    "fragment_trigrams",
+    Base.metadata,
+    Column(
+        "trigram",
+        String(3).with_variant(mysql.VARCHAR(3, charset="utf8mb4", collation="utf8mb4_bin"), "mysql"),
+        primary_key=True,
+    ),
+    Column("fragment_id", Integer, ForeignKey("fragments.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_fragment_trigrams_fragment_id", "fragment_id"),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, String
+from sqlalchemy import Column, Date, Integer, ForeignKey, String
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
@@ -16,3 +16,14 @@ class View(Base, BaseModel):
     # Отношения
     fragment = relationship("Fragment", back_populates="views")
     user = relationship("User", back_populates="views")
+
+
+class ViewRollup(Base):
+    """Суточная сводка просмотров фрагмента (сжатые записи views)"""
+    __tablename__ = "view_rollups"
+
+    fragment_id = Column(Integer, ForeignKey("fragments.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+    unique_ips = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+# Метрики пула соединений
+class PoolStats(BaseModel):
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    in_use: Optional[int] = None
+    overflow: Optional[int] = None
+
+
+# Метрики приложения для администраторов
+class MetricsResponse(BaseModel):
+    pools: Dict[str, PoolStats]
+    view_buffer: Dict[str, Any]
+    view_dedup: Dict[str, Any]
+    auth_cache: Dict[str, Any]
+    password_pool: Dict[str, Any]
+    tag_usage_reconciler: Dict[str, Any]
+    content_pack: Dict[str, Any]
+    content_pack_compactor: Dict[str, Any]
+
+
+# Статистика дедупликации содержимого фрагментов
+class ContentStatsResponse(BaseModel):
+    fragments: int
+    inline_fragments: int
+    blobs: int
+    stored_bytes: int
+    referenced_bytes: int
+    dedup_ratio: float
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Optional, List, Union
 
 from pydantic import BaseModel, ConfigDict
 
@@ -52,7 +52,42 @@ class FragmentResponse(FragmentInDB):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Схема краткого отображения фрагмента в списке (view=summary): вместо
+# содержимого - превью первых строк и общее число строк
+class FragmentSummaryResponse(BaseModel):
+    id: int
+    title: str
+    content_preview: str
+    line_count: int
+    language: str
+    description: Optional[str] = None
+    is_public: bool = True
+    author_id: int
+    created_at: datetime
+    updated_at: datetime
+    author: UserPublic
+    tags: List[TagResponse] = []
+    likes_count: int
+    views_count: int
+    is_liked_by_current_user: Optional[bool] = None
+
+
 # Схема для списка фрагментов
 class FragmentListResponse(BaseModel):
-    items: List[FragmentResponse]
+    items: List[Union[FragmentResponse, FragmentSummaryResponse]]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# Схема суточной статистики просмотров
+class DailyViews(BaseModel):
+    day: date
+    views: int
+    unique_users: int
+    unique_ips: int
+
+
+# Схема статистики просмотров фрагмента
+class FragmentViewStats(BaseModel):
+    items: List[DailyViews]
     total: int
@@ -15,6 +15,7 @@ class TagCreate(TagBase):
 class TagResponse(TagBase):
     id: int
     created_at: datetime
+    usage_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -22,3 +23,12 @@ class TagResponse(TagBase):
 class TagListResponse(BaseModel):
     items: List[TagResponse]
     total: int
+
+
+# Подсказка тега для автодополнения
+class TagSuggestion(TagBase):
+    usage_count: int
+
+
+class TagSuggestResponse(BaseModel):
+    items: List[TagSuggestion]
@@ -1,20 +1,29 @@
 # tests/conftest.py
 import os
+from contextlib import contextmanager
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from sqlalchemy.orm.session import Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 
-from app.core.database import Base, get_db
+from app.core.auth_cache import principal_cache
+from app.core.code_index import code_index
+from app.core.periodic import content_pack_compactor, tag_usage_reconciler
+from app.core.tag_index import tag_index
+from app.core import database
+from app.core.database import Base, get_async_db, get_db, make_async_url
+from app.core.db_routing import DatabaseRouter
 from app.main import app
-# from app.core.config import settings
+from app.core.bloom import view_dedup
+from app.core.config import settings
 from app.models.user import User
 from app.core.security import get_password_hash, create_access_token
 
-# Настройка тестовой базы данных в памяти
+# Настройка тестовой базы данных
 TEST_DATABASE_URL = "sqlite:///./test.db"
 
 @pytest.fixture(scope="session")
@@ -29,32 +38,104 @@ def engine():
     yield engine
     # Удаляем тестовую БД
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
     os.unlink("./test.db")
 
+@pytest.fixture
+def async_engine():
+    """Создает асинхронный движок для той же тестовой БД.
+
+    NullPool: соединения не переживают цикл событий тестового клиента.
+    """
+    return create_async_engine(make_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+
 @pytest.fixture(scope="function")
 def db_session(engine: Engine):
-    """Создает новую сессию БД для каждого теста"""
-    connection = engine.connect()
-    transaction = connection.begin()
-    Session = sessionmaker(autocommit=False, autoflush=False, bind=connection)
+    """Создает новую сессию БД для каждого теста.
+
+    Асинхронные эндпоинты работают через отдельное соединение и видят только
+    закоммиченные данные, поэтому изоляция тестов - очистка таблиц после теста.
+    """
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     session = Session()
 
     yield session
 
+    session.rollback()
     session.close()
-    transaction.rollback()
-    connection.close()
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    # Индексы кода и тегов хранятся в памяти процесса
+    code_index.clear()
+    tag_index.clear()
+
+class QueryCounter:
+    """Счетчик SQL-запросов, выполненных через движок"""
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+@pytest.fixture
+def count_queries(engine: Engine, async_engine: AsyncEngine):
+    """Контекстный менеджер для подсчета запросов внутри блока.
+
+    Учитываются запросы синхронного и асинхронного движков.
+    Пример: with count_queries() as counter: ...; assert counter.count <= 3
+    """
+    @contextmanager
+    def _count_queries():
+        counter = QueryCounter()
+
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            counter.statements.append(statement)
+
+        targets = [engine, async_engine.sync_engine]
+        for target in targets:
+            event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            for target in targets:
+                event.remove(target, "before_cursor_execute", _before_cursor_execute)
+
+    return _count_queries
 
 @pytest.fixture
-def client(db_session: Session):
+def client(db_session: Session, async_engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch):
     """Создает тестовый клиент FastAPI"""
+    # Просмотры пишутся синхронно, без фонового потока
+    monkeypatch.setattr(settings, "VIEW_BUFFER_ENABLED", False)
+    # Индекс тегов строится по тестовой БД при первом запросе
+    monkeypatch.setattr(settings, "TAG_INDEX_WARMUP", False)
+    # Фоновый пересчет счетчиков работал бы с основной, а не тестовой БД
+    monkeypatch.setattr(tag_usage_reconciler, "interval", 0)
+    monkeypatch.setattr(content_pack_compactor, "interval", 0)
+    # ID пользователей и фрагментов повторяются между тестами после очистки таблиц
+    view_dedup.clear()
+    principal_cache.clear()
+
     def _get_test_db():
         try:
             yield db_session
         finally:
             pass
 
+    AsyncTestSession = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def _get_test_async_db():
+        async with AsyncTestSession() as session:
+            yield session
+
     app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_async_db] = _get_test_async_db
+    # get_read_db/get_write_db работают через маршрутизатор; реплик в тестах нет
+    monkeypatch.setattr(database, "db_router", DatabaseRouter(AsyncTestSession))
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
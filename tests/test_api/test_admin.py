@@ -0,0 +1,47 @@
+# tests/test_api/test_admin.py
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+METRICS_URL = f"{settings.API_V1_STR}/admin/metrics"
+
+
+def test_read_metrics(client: TestClient, admin_user_token: str):
+    """Тест метрик для администратора"""
+    response = client.get(METRICS_URL, headers={"Authorization": f"Bearer {admin_user_token}"})
+    assert response.status_code == 200
+    data = response.json()
+    assert "primary" in data["pools"]
+    assert data["pools"]["primary"]["checkouts"] >= 0
+    assert "queued" in data["view_buffer"]
+    assert "checked" in data["view_dedup"]
+    # Повторная проверка токена администратора берется из кэша
+    response = client.get(METRICS_URL, headers={"Authorization": f"Bearer {admin_user_token}"})
+    assert response.json()["auth_cache"]["hits"] >= 1
+
+def test_read_metrics_forbidden(client: TestClient, normal_user_token: str):
+    """Тест запрета метрик для обычного пользователя"""
+    response = client.get(METRICS_URL, headers={"Authorization": f"Bearer {normal_user_token}"})
+    assert response.status_code == 403
+
+def test_read_content_stats(client: TestClient, admin_user_token: str, normal_user_token: str):
+    """Тест статистики дедупликации содержимого"""
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+    for title in ("First", "Second"):
+        client.post(
+            f"{settings.API_V1_STR}/fragments/",
+            json={"title": title, "content": "FROM python:3.12\n", "language": "docker"},
+            headers=headers,
+        )
+    response = client.get(
+        f"{settings.API_V1_STR}/admin/content-stats",
+        headers={"Authorization": f"Bearer {admin_user_token}"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fragments"] == 2
+    assert data["blobs"] == 1
+    assert data["dedup_ratio"] == 2.0
+
+    response = client.get(f"{settings.API_V1_STR}/admin/content-stats", headers=headers)
+    assert response.status_code == 403
@@ -0,0 +1,24 @@
+# tests/test_api/test_auth.py
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.password_pool import password_pool
+from app.models.user import User
+
+LOGIN_URL = f"{settings.API_V1_STR}/auth/login"
+
+
+def test_login(client: TestClient, normal_user: User):
+    """Тест получения токена"""
+    response = client.post(LOGIN_URL, data={"username": normal_user.email, "password": "password123"})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+def test_login_password_pool_busy(client: TestClient, normal_user: User, monkeypatch):
+    """Тест ответа 503 при переполнении очереди проверки паролей"""
+    monkeypatch.setattr(password_pool, "max_pending", 0)
+
+    response = client.post(LOGIN_URL, data={"username": normal_user.email, "password": "password123"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
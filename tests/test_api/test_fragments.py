@@ -0,0 +1,373 @@
+# tests/test_api/test_fragments.py
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import NullPool
+
+from app import benchmarks
+from app.core import database
+from app.core.config import settings
+from app.core.database import Base, make_async_url
+from app.core.db_routing import DatabaseRouter
+from app.models.fragment import Fragment
+from app.models.tag import Tag
+from app.models.user import User
+from app.schemas.fragment import FragmentListResponse
+
+FRAGMENTS_URL = f"{settings.API_V1_STR}/fragments/"
+
+
+def _create_fragments(db_session: Session, author: User, count: int) -> list[Fragment]:
+    """Создает набор публичных фрагментов"""
+    fragments = [
+        Fragment(title=f"Fragment {i}", content="x = 1", language="python", author_id=author.id)
+        for i in range(count)
+    ]
+    db_session.add_all(fragments)
+    db_session.commit()
+    return fragments
+
+def test_read_fragments_cursor(client: TestClient, db_session: Session, normal_user: User, normal_user_token: str):
+    """Тест постраничного вывода по курсору через API"""
+    fragments = _create_fragments(db_session, normal_user, 5)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    seen = []
+    params = {"pagination": "cursor", "limit": 2}
+    while True:
+        response = client.get(FRAGMENTS_URL, params=params, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        # В режиме курсора total по умолчанию не считается
+        assert data["total"] is None
+        seen.extend(item["id"] for item in data["items"])
+        if data["next_cursor"] is None:
+            break
+        params = {"cursor": data["next_cursor"], "limit": 2}
+
+    assert seen == sorted((f.id for f in fragments), reverse=True)
+
+def test_read_fragments_cursor_with_total(client: TestClient, db_session: Session, normal_user: User, normal_user_token: str):
+    """Тест явного запроса total в режиме курсора"""
+    _create_fragments(db_session, normal_user, 3)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    response = client.get(
+        FRAGMENTS_URL,
+        params={"pagination": "cursor", "limit": 3, "include_total": True},
+        headers=headers
+    )
+    data = response.json()
+    assert data["total"] == 3
+    assert data["next_cursor"] is None
+
+def test_read_fragments_offset(client: TestClient, db_session: Session, normal_user: User, normal_user_token: str):
+    """Тест режима skip/limit: total считается, курсора нет"""
+    _create_fragments(db_session, normal_user, 3)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    data = client.get(FRAGMENTS_URL, params={"skip": 1, "limit": 1}, headers=headers).json()
+    assert data["total"] == 3
+    assert len(data["items"]) == 1
+    assert data["next_cursor"] is None
+
+def test_read_fragments_invalid_cursor(client: TestClient, normal_user_token: str):
+    """Тест ответа 400 на поврежденный курсор"""
+    response = client.get(
+        FRAGMENTS_URL,
+        params={"cursor": "not-a-cursor"},
+        headers={"Authorization": f"Bearer {normal_user_token}"}
+    )
+    assert response.status_code == 400
+
+def _create_tagged_fragments(db_session: Session, author: User, count: int) -> list[Fragment]:
+    """Создает фрагменты с двумя тегами у каждого"""
+    fragments = _create_fragments(db_session, author, count)
+    for fragment in fragments:
+        fragment.tags = [Tag(name=f"tag-{fragment.id}-a"), Tag(name=f"tag-{fragment.id}-b")]
+    db_session.commit()
+    # Сбрасываем загруженные связи, чтобы запросы считались как в новом запросе
+    db_session.expire_all()
+    return fragments
+
+def test_read_fragments_query_count(
+    client: TestClient, db_session: Session, normal_user: User, normal_user_token: str, count_queries
+):
+    """Тест: число запросов списка не зависит от размера страницы"""
+    _create_tagged_fragments(db_session, normal_user, 10)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+    # Первый запрос загружает пользователя в кэш аутентификации
+    client.get(FRAGMENTS_URL, params={"limit": 1}, headers=headers)
+
+    with count_queries() as small_page:
+        response = client.get(FRAGMENTS_URL, params={"limit": 2}, headers=headers)
+    assert response.status_code == 200
+    db_session.expire_all()
+
+    with count_queries() as full_page:
+        response = client.get(FRAGMENTS_URL, params={"limit": 10}, headers=headers)
+    assert len(response.json()["items"]) == 10
+
+    assert full_page.count == small_page.count
+    # Количество, страница с авторами, теги
+    assert full_page.count <= 3
+
+def test_read_fragment_query_count(
+    client: TestClient, db_session: Session, normal_user: User, normal_user_token: str, count_queries
+):
+    """Тест: автор и теги фрагмента загружаются без ленивых запросов"""
+    fragment_id = _create_tagged_fragments(db_session, normal_user, 1)[0].id
+    db_session.expire_all()
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    with count_queries() as counter:
+        response = client.get(f"{FRAGMENTS_URL}{fragment_id}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["tags"]) == 2
+
+    # Пользователь, фрагмент с автором, теги и обновление созданного просмотра
+    select_count = sum(1 for s in counter.statements if s.lstrip().upper().startswith("SELECT"))
+    assert select_count <= 4
+
+def test_read_fragment_views(
+    client: TestClient, db_session: Session, normal_user: User, normal_user_token: str, admin_user: User
+):
+    """Тест статистики просмотров: доступна автору, чужим - 403"""
+    own = _create_fragments(db_session, normal_user, 1)[0]
+    foreign = _create_fragments(db_session, admin_user, 1)[0]
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    client.get(f"{FRAGMENTS_URL}{own.id}", headers=headers)
+    response = client.get(f"{FRAGMENTS_URL}{own.id}/views", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert len(response.json()["items"]) == 1
+
+    response = client.get(f"{FRAGMENTS_URL}{foreign.id}/views", headers=headers)
+    assert response.status_code == 403
+
+def test_repeat_view_suppressed(client: TestClient, db_session: Session, normal_user: User, normal_user_token: str):
+    """Тест: повторный просмотр тем же пользователем не учитывается"""
+    fragment = _create_fragments(db_session, normal_user, 1)[0]
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    client.get(f"{FRAGMENTS_URL}{fragment.id}", headers=headers)
+    response = client.get(f"{FRAGMENTS_URL}{fragment.id}", headers=headers)
+    assert response.status_code == 200
+
+    db_session.refresh(fragment)
+    assert fragment.views_count == 1
+
+def test_read_your_writes_routing(client: TestClient, async_engine: AsyncEngine, normal_user_token: str, tmp_path, monkeypatch):
+    """Тест: после записи пользователь читает с основной БД, затем - с реплики"""
+    # Реплика - отдельный файл SQLite без репликации: на ней нет новых записей
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica_engine = create_engine(replica_url)
+    Base.metadata.create_all(bind=replica_engine)
+    replica_engine.dispose()
+    replica_async_engine = create_async_engine(make_async_url(replica_url), poolclass=NullPool)
+
+    now = [0.0]
+    router = DatabaseRouter(
+        async_sessionmaker(bind=async_engine, expire_on_commit=False),
+        [async_sessionmaker(bind=replica_async_engine, expire_on_commit=False)],
+        window=5.0,
+        clock=lambda: now[0],
+    )
+    monkeypatch.setattr(database, "db_router", router)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    response = client.post(
+        FRAGMENTS_URL,
+        json={"title": "Fresh", "content": "x = 1", "language": "python"},
+        headers=headers
+    )
+    assert response.status_code == 201
+
+    # Сразу после записи - основная БД
+    assert client.get(FRAGMENTS_URL, headers=headers).json()["total"] == 1
+
+    # После окна - реплика, которая еще не получила запись
+    now[0] = 10.0
+    assert client.get(FRAGMENTS_URL, headers=headers).json()["total"] == 0
+
+def test_bulk_import(client: TestClient, db_session: Session, normal_user: User, normal_user_token: str, monkeypatch):
+    """Тест массового импорта NDJSON: пачки, ошибки строк и итог"""
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 2)
+    lines = [
+        json.dumps({"title": "One", "content": "a = 1", "language": "python", "tags": ["Bulk", "py"]}),
+        "",
+        json.dumps({"title": "Two", "content": "b = 2", "language": "python", "tags": ["bulk"]}),
+        "{not json",
+        json.dumps({"title": "Three", "language": "go"}),
+        json.dumps({"title": "Four", "content": "c := 3", "language": "go"}),
+    ]
+
+    response = client.post(
+        f"{FRAGMENTS_URL}bulk",
+        content="\n".join(lines).encode(),
+        headers={"Authorization": f"Bearer {normal_user_token}", "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [(r["line"], r["status"]) for r in results[:-1]] == [
+        (1, "created"), (3, "created"), (4, "error"), (5, "error"), (6, "created")
+    ]
+    assert results[-1] == {"summary": {"lines": 5, "created": 3, "failed": 2}}
+
+    created = db_session.query(Fragment).filter(Fragment.author_id == normal_user.id).all()
+    assert {f.title for f in created} == {"One", "Two", "Four"}
+    bulk_tag = db_session.query(Tag).filter(Tag.name == "bulk").one()
+    assert bulk_tag.usage_count == 2
+    assert len(bulk_tag.fragments) == 2
+
+def test_export_fragments(client: TestClient, db_session: Session, normal_user: User, admin_user_token: str, normal_user_token: str):
+    """Тест потоковой выгрузки в NDJSON и gzip JSON с фильтрами"""
+    _create_tagged_fragments(db_session, normal_user, 3)
+    db_session.add(Fragment(title="Go", content="x := 1", language="go", author_id=normal_user.id, is_public=False))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {admin_user_token}"}
+
+    response = client.get(f"{FRAGMENTS_URL}export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in records] == sorted(r["id"] for r in records)
+    assert len(records) == 4
+    assert records[0]["author"] == normal_user.username
+    assert records[0]["tags"]
+
+    response = client.get(
+        f"{FRAGMENTS_URL}export", params={"format": "json.gz", "language": "go"}, headers=headers
+    )
+    assert response.status_code == 200
+    records = json.loads(gzip.decompress(response.content))
+    assert [r["title"] for r in records] == ["Go"]
+
+    response = client.get(f"{FRAGMENTS_URL}export", headers={"Authorization": f"Bearer {normal_user_token}"})
+    assert response.status_code == 403
+
+def test_read_fragments_summary_view(
+    client: TestClient, db_session: Session, normal_user: User, normal_user_token: str
+):
+    """Тест краткого списка: превью и число строк вместо содержимого"""
+    db_session.add(Fragment(
+        title="Long", content="\n".join(f"x{i} = {i}" for i in range(20)),
+        language="python", author_id=normal_user.id
+    ))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    response = client.get(FRAGMENTS_URL, params={"view": "summary"}, headers=headers)
+    assert response.status_code == 200
+    [item] = response.json()["items"]
+    assert "content" not in item
+    assert item["content_preview"] == "x0 = 0\nx1 = 1\nx2 = 2\nx3 = 3\nx4 = 4"
+    assert item["line_count"] == 20
+    assert item["author"]["username"] == normal_user.username
+
+    [item] = client.get(FRAGMENTS_URL, headers=headers).json()["items"]
+    assert item["content"].startswith("x0 = 0")
+    assert "content_preview" not in item
+
+    response = client.get(FRAGMENTS_URL, params={"view": "brief"}, headers=headers)
+    assert response.status_code == 422
+
+def test_read_fragment_conditional(
+    client: TestClient, db_session: Session, normal_user: User, normal_user_token: str, count_queries
+):
+    """Тест ETag фрагмента: 304 без загрузки содержимого"""
+    fragment = _create_fragments(db_session, normal_user, 1)[0]
+    url = f"{FRAGMENTS_URL}{fragment.id}"
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    # Первый просмотр увеличивает views_count, повторный не учитывается
+    client.get(url, headers=headers)
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == settings.PUBLIC_FRAGMENT_CACHE_CONTROL
+    assert response.json()["views_count"] == 1
+
+    with count_queries() as counter:
+        response = client.get(url, headers={**headers, "If-None-Match": f'W/"other", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert not any("content_blobs" in s for s in counter.statements)
+
+    # If-Modified-Since не проверяется: дата не учитывает счетчики
+    last_modified = response.headers["Last-Modified"]
+    response = client.get(url, headers={**headers, "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+    # Изменение тегов меняет версию фрагмента
+    response = client.put(url, json={"tags": ["etag"]}, headers=headers)
+    assert response.status_code == 200
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["tags"][0]["name"] == "etag"
+
+    # Приватный фрагмент не сохраняется общими кэшами
+    client.put(url, json={"is_public": False}, headers=headers)
+    response = client.get(url, headers=headers)
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+def test_read_fragments_conditional(
+    client: TestClient, db_session: Session, normal_user: User, normal_user_token: str
+):
+    """Тест ETag списка фрагментов"""
+    _create_fragments(db_session, normal_user, 3)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+
+    response = client.get(FRAGMENTS_URL, params={"limit": 2}, headers=headers)
+    etag = response.headers["ETag"]
+    conditional = {**headers, "If-None-Match": etag}
+
+    response = client.get(FRAGMENTS_URL, params={"limit": 2}, headers=conditional)
+    assert response.status_code == 304
+    # Другие параметры - другое представление
+    response = client.get(FRAGMENTS_URL, params={"limit": 2, "view": "summary"}, headers=conditional)
+    assert response.status_code == 200
+
+    _create_fragments(db_session, normal_user, 1)
+    response = client.get(FRAGMENTS_URL, params={"limit": 2}, headers=conditional)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_fast_response_matches_schema():
+    """Тест: быстрый путь сериализации совпадает с ответом через схемы Pydantic"""
+    page = benchmarks._page(3)
+    adapter = TypeAdapter(FragmentListResponse)
+    assert json.loads(benchmarks._fast_response(page)) == json.loads(benchmarks._pydantic_response(page, adapter))
+
+    timings = benchmarks.serialization(items=2, rounds=1)
+    assert set(timings) == {"pydantic", "fast"}
+
+def test_compressed_content_async_paths(
+    client: TestClient, normal_user_token: str, monkeypatch
+):
+    """Тест: распаковка и проверки поиска работают из асинхронных эндпоинтов"""
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_MIN_BYTES", 64)
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+    content = "def compressed_handler():\n    return 1\n" * 20
+    response = client.post(
+        FRAGMENTS_URL, json={"title": "Big", "content": content, "language": "python"}, headers=headers
+    )
+    fragment_id = response.json()["id"]
+
+    assert client.get(f"{FRAGMENTS_URL}{fragment_id}", headers=headers).json()["content"] == content
+    searches = (("substring", "compressed_handler("), ("regex", r"compressed_\w+\("), ("code", "compressed handler"))
+    for search_mode, query in searches:
+        params = {"search": query, "search_mode": search_mode}
+        response = client.get(FRAGMENTS_URL, params=params, headers=headers)
+        assert [item["id"] for item in response.json()["items"]] == [fragment_id], search_mode
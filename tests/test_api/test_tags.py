@@ -0,0 +1,64 @@
+# tests/test_api/test_tags.py
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+
+from app.core.config import settings
+from app.crud.fragment import create as create_fragment
+from app.models.user import User
+from app.schemas.fragment import FragmentCreate
+
+TAGS_URL = f"{settings.API_V1_STR}/tags/"
+
+
+def test_suggest_tags(client: TestClient, db_session: Session, normal_user: User, admin_user_token: str):
+    """Тест автодополнения тегов: префикс, ранжирование, новые теги"""
+    for tags in (["python", "pytest"], ["python"]):
+        create_fragment(
+            db_session,
+            FragmentCreate(title="T", content="x = 1", language="python", tags=tags),
+            author_id=normal_user.id,
+        )
+
+    response = client.get(f"{TAGS_URL}suggest", params={"prefix": "Py"})
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {"name": "python", "usage_count": 2},
+        {"name": "pytest", "usage_count": 1},
+    ]
+
+    # Созданный тег сразу доступен в подсказках
+    response = client.post(
+        TAGS_URL, json={"name": "pydantic"}, headers={"Authorization": f"Bearer {admin_user_token}"}
+    )
+    assert response.status_code == 201
+    names = [item["name"] for item in client.get(f"{TAGS_URL}suggest", params={"prefix": "pyd"}).json()["items"]]
+    assert names == ["pydantic"]
+
+def test_suggest_tags_requires_prefix(client: TestClient):
+    """Тест проверки параметра prefix"""
+    response = client.get(f"{TAGS_URL}suggest", params={"prefix": ""})
+    assert response.status_code == 422
+
+def test_popular_tags(client: TestClient, db_session: Session, normal_user: User, normal_user_token: str):
+    """Тест облака тегов и сортировки по популярности"""
+    for tags in (["python", "pytest"], ["python"], ["go"]):
+        create_fragment(
+            db_session,
+            FragmentCreate(title="T", content="x = 1", language="python", tags=tags),
+            author_id=normal_user.id,
+        )
+
+    response = client.get(f"{TAGS_URL}popular", params={"limit": 2})
+    assert response.status_code == 200
+    assert [(tag["name"], tag["usage_count"]) for tag in response.json()] == [("python", 2), ("go", 1)]
+
+    response = client.get(TAGS_URL, params={"sort": "popular"})
+    assert [tag["name"] for tag in response.json()["items"]] == ["python", "go", "pytest"]
+
+    # Счетчик возвращается и в тегах фрагмента
+    fragments = client.get(
+        f"{settings.API_V1_STR}/fragments/",
+        params={"tag": "python"},
+        headers={"Authorization": f"Bearer {normal_user_token}"}
+    ).json()["items"]
+    assert {tag["name"]: tag["usage_count"] for tag in fragments[0]["tags"]}["python"] == 2
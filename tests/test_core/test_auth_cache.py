@@ -0,0 +1,49 @@
+# tests/test_core/test_auth_cache.py
+from app.core.auth_cache import AuthPrincipal, PrincipalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_principal_cache_ttl_and_counters():
+    """Тест истечения записей и счетчиков попаданий"""
+    clock = FakeClock()
+    cache = PrincipalCache(ttl=10.0, max_size=10, clock=clock)
+    principal = AuthPrincipal(id=1, is_active=True, is_admin=False)
+
+    assert cache.get(1) is None
+    cache.put(principal)
+    assert cache.get(1) == principal
+
+    clock.now = 10.0
+    assert cache.get(1) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["size"] == 0
+
+def test_principal_cache_lru_eviction():
+    """Тест вытеснения давно не использованных записей"""
+    cache = PrincipalCache(ttl=60.0, max_size=2)
+    for user_id in (1, 2):
+        cache.put(AuthPrincipal(id=user_id, is_active=True, is_admin=False))
+
+    # Обращение к 1 делает вытесняемой запись 2
+    assert cache.get(1) is not None
+    cache.put(AuthPrincipal(id=3, is_active=True, is_admin=False))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+
+def test_principal_cache_disabled():
+    """Тест: при нулевом TTL кэш ничего не хранит"""
+    cache = PrincipalCache(ttl=0, max_size=10)
+    cache.put(AuthPrincipal(id=1, is_active=True, is_admin=False))
+    assert cache.get(1) is None
@@ -0,0 +1,50 @@
+# tests/test_core/test_bloom.py
+import pytest
+
+from app.core.bloom import BloomFilter, RotatingBloomFilter
+
+def test_bloom_filter():
+    """Тест фильтра Блума: нет ложных отрицаний, ложные срабатывания редки"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"key-{i}")
+    assert all(f"key-{i}" in bloom for i in range(1000))
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300  # Ожидается около 1%
+    assert bloom.memory_bytes < 1500
+
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=0, error_rate=0.01)
+
+def test_rotating_bloom_filter_window():
+    """Тест окна повторов во вращающемся фильтре"""
+    now = [0.0]
+    dedup = RotatingBloomFilter(window=10, capacity=100, error_rate=0.01, clock=lambda: now[0])
+
+    assert dedup.check_and_add("a") is False
+    assert dedup.check_and_add("a") is True
+
+    # После одной ротации ключ еще помнится предыдущим поколением
+    now[0] = 15
+    assert dedup.check_and_add("b") is False
+    assert dedup.check_and_add("a") is True
+
+    # После двух окон без ротации оба поколения устарели
+    now[0] = 50
+    assert dedup.check_and_add("b") is False
+
+    stats = dedup.stats()
+    assert stats["suppressed"] == 2
+    assert stats["rotations"] == 2
+
+def test_rotating_bloom_filter_capacity():
+    """Тест досрочной ротации заполненного поколения"""
+    dedup = RotatingBloomFilter(window=3600, capacity=1000, error_rate=0.01, clock=lambda: 0.0)
+    suppressed = sum(dedup.check_and_add(f"key-{i}") for i in range(20000))
+    # Без ротации по заполнению большинство новых ключей считались бы повторами
+    assert suppressed < 20000 * 0.02 * 2
+    assert dedup.stats()["capacity_rotations"] >= 19
+
+    # Недавние ключи остаются в пределах двух поколений
+    assert dedup.check_and_add("key-19999") is True
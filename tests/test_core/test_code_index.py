@@ -0,0 +1,37 @@
+# tests/test_core/test_code_index.py
+from app.core.code_index import CodeIndex, tokenize
+
+def test_tokenize():
+    """Тест разбора идентификаторов и операторов"""
+    assert tokenize("getUserById") == ["getuserbyid", "get", "user", "by", "id"]
+    assert tokenize("parse_config") == ["parse_config", "parse", "config"]
+    assert tokenize("HTTPServer") == ["httpserver", "http", "server"]
+    assert tokenize("ptr->next; std::vector") == ["ptr", "->", "next", "std", "::", "vector"]
+    assert tokenize("x") == ["x"]
+
+def test_search_and_bm25():
+    """Тест AND-поиска и ранжирования BM25"""
+    index = CodeIndex()
+    index.add(1, "def get_user(user_id): return db.get(user_id)")
+    index.add(2, "user = getUserById(id)")
+    index.add(3, "def parse_config(path): pass")
+
+    assert [doc_id for doc_id, _ in index.search("get user")] == [1, 2]
+    assert [doc_id for doc_id, _ in index.search("getUserById")] == [2]
+    assert index.search("user config") == []
+    assert index.search("") == []
+
+    # Замена и удаление документа
+    index.add(2, "print('nothing')")
+    assert [doc_id for doc_id, _ in index.search("user")] == [1]
+    index.remove(1)
+    assert index.search("user") == []
+    assert len(index) == 2
+
+def test_postings_out_of_order():
+    """Тест вставки в середину отсортированного списка вхождений"""
+    index = CodeIndex()
+    for doc_id in (5, 1, 3):
+        index.add(doc_id, "token")
+    assert sorted(doc_id for doc_id, _ in index.search("token")) == [1, 3, 5]
+    assert list(index._postings["token"].ids) == [1, 3, 5]
@@ -0,0 +1,31 @@
+# tests/test_core/test_compression.py
+import pytest
+
+from app.core.compression import COMPRESSED_PREFIX, decode_text, encode_text
+
+CODE = "def handler(request):\n    return process(request)\n" * 100
+
+def test_encode_text_roundtrip():
+    """Тест сжатия текста выше порога и обратного преобразования"""
+    stored = encode_text(CODE, "zlib", min_bytes=1024)
+    assert stored.startswith(COMPRESSED_PREFIX + "zlib:")
+    assert len(stored) < len(CODE)
+    assert decode_text(stored) == CODE
+
+def test_encode_text_keeps_small_and_incompressible():
+    """Тест: короткий текст и текст, который не сжимается, хранятся как есть"""
+    assert encode_text("x = 1", "zlib", min_bytes=1024) == "x = 1"
+    assert encode_text("x = 1", None, min_bytes=0) == "x = 1"
+    assert encode_text("aZ", "zlib", min_bytes=0) == "aZ"
+
+def test_encode_text_escapes_marker():
+    """Тест: текст, начинающийся с маркера, декодируется без искажений"""
+    value = COMPRESSED_PREFIX + "zlib:not base64"
+    stored = encode_text(value, None, min_bytes=0)
+    assert stored != value
+    assert decode_text(stored) == value
+
+def test_decode_text_unknown_codec():
+    """Тест ошибки для неизвестного кодека"""
+    with pytest.raises(ValueError):
+        decode_text(COMPRESSED_PREFIX + "lz4:AAAA")
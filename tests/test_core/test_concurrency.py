@@ -0,0 +1,40 @@
+# tests/test_core/test_concurrency.py
+import asyncio
+import threading
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.concurrency import run_blocking
+
+
+def _blocking_work() -> str:
+    time.sleep(0.2)
+    return threading.current_thread().name
+
+
+def test_run_blocking_outside_event_loop():
+    """Тест: вне run_sync функция выполняется в текущем потоке"""
+    assert run_blocking(_blocking_work) == threading.current_thread().name
+
+
+def test_run_blocking_inside_run_sync(async_engine: AsyncEngine):
+    """Тест: внутри run_sync работа идет в пуле потоков и не блокирует цикл событий"""
+    async def _main():
+        ticks = 0
+
+        async def _ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(_ticker())
+        async with AsyncSession(async_engine) as db:
+            worker = await db.run_sync(lambda session: run_blocking(_blocking_work))
+        ticker.cancel()
+        return worker, ticks
+
+    worker, ticks = asyncio.run(_main())
+    assert worker != threading.current_thread().name
+    assert ticks >= 5
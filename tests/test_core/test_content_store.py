@@ -0,0 +1,81 @@
+# tests/test_core/test_content_store.py
+import threading
+
+from app.core.content_store import PackContentStore
+
+
+def _text(store: PackContentStore, stored: str) -> str:
+    # Ссылка без маркера кодека: "<поколение>:<смещение>:<длина>"
+    return store.read_text(stored.split(":", 1)[1])
+
+
+def test_pack_store_roundtrip(tmp_path):
+    """Тест записи в pack-файл и чтения среза без копирования"""
+    store = PackContentStore(str(tmp_path))
+    first = store.put("print('привет')")
+    second = store.put("x = 1")
+    try:
+        assert _text(store, first) == "print('привет')"
+        assert _text(store, second) == "x = 1"
+
+        generation, offset, length = (int(part) for part in second.split(":")[1:])
+        view = store.read(generation, offset, length)
+        assert isinstance(view, memoryview)
+        assert view.readonly
+        assert bytes(view) == b"x = 1"
+        view.release()
+    finally:
+        store.close()
+
+def test_pack_store_rotate(tmp_path):
+    """Тест перехода на новое поколение и удаления старых файлов"""
+    store = PackContentStore(str(tmp_path))
+    old = store.put("old")
+    assert store.rotate() == 2
+    new = store.put("new")
+    assert new.split(":")[1] == "2"
+    assert _text(store, old) == "old"
+
+    assert store.remove_generations(below=2) == [1]
+    assert store.generations() == [2]
+    assert _text(store, new) == "new"
+    store.close()
+
+def test_pack_store_follows_compactions(tmp_path):
+    """Тест: writer, простоявший два сжатия другого процесса, пишет в новое поколение"""
+    writer = PackContentStore(str(tmp_path))
+    compactor = PackContentStore(str(tmp_path))
+    writer.put("before")
+    # Два сжатия: поколение 2 создано и уже удалено
+    assert compactor.rotate() == 2
+    assert compactor.rotate() == 3
+    assert compactor.remove_generations(below=3) == [1, 2]
+
+    stored = writer.put("after")
+    assert stored.split(":")[1] == "3"
+    assert _text(compactor, stored) == "after"
+    writer.close()
+    compactor.close()
+
+def test_pack_store_group_sync(tmp_path):
+    """Тест: одновременные коммиты объединяются в общий fsync"""
+    store = PackContentStore(str(tmp_path), sync_delay=0.05)
+    barrier = threading.Barrier(8)
+
+    def writer(i: int) -> None:
+        barrier.wait()
+        store.put(f"fragment {i}")
+        store.sync()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.appends == 8
+    assert 1 <= store.syncs < 8
+    # Повторный sync без новых записей не вызывает fsync
+    syncs = store.syncs
+    store.sync()
+    assert store.syncs == syncs
+    store.close()
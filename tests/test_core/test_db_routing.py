@@ -0,0 +1,40 @@
+# tests/test_core/test_db_routing.py
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.db_routing import DatabaseRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_router_without_replicas_uses_primary():
+    """Тест: без реплик чтение идет с основной БД"""
+    primary = async_sessionmaker()
+    router = DatabaseRouter(primary)
+
+    assert router.for_read(None) is primary
+    assert router.for_read("1") is primary
+    assert router.for_write() is primary
+
+def test_router_round_robin_and_read_your_writes():
+    """Тест: реплики по кругу, после записи - основная БД до конца окна"""
+    primary = async_sessionmaker()
+    replicas = [async_sessionmaker(), async_sessionmaker()]
+    clock = FakeClock()
+    router = DatabaseRouter(primary, replicas, window=5.0, clock=clock)
+
+    assert [router.for_read("1") for _ in range(3)] == [replicas[0], replicas[1], replicas[0]]
+
+    router.mark_write("1")
+    assert router.for_read("1") is primary
+    # Другие пользователи продолжают читать с реплик
+    assert router.for_read("2") in replicas
+    assert router.for_read(None) in replicas
+
+    clock.now = 5.1
+    assert router.for_read("1") in replicas
@@ -0,0 +1,35 @@
+# tests/test_core/test_fast_json.py
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core import fast_json
+from app.core.fast_json import FastJSONResponse, dumps
+
+
+def test_dumps_matches_fallback(monkeypatch):
+    """Тест: результат с orjson и без него одинаков"""
+    value = {
+        "title": "Привет",
+        "created_at": datetime(2024, 5, 1, 12, 0, 0, 123456),
+        "updated_at": datetime(2024, 5, 1, 12, 0, 0),
+        "tags": [{"id": 1}],
+        "bio": None,
+    }
+    encoded = dumps(value)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert dumps(value) == encoded
+    assert json.loads(encoded)["created_at"] == "2024-05-01T12:00:00.123456"
+    assert json.loads(encoded)["updated_at"] == "2024-05-01T12:00:00"
+
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_fast_json_response():
+    """Тест ответа FastJSONResponse"""
+    response = FastJSONResponse({"items": []}, status_code=201)
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert response.body == b'{"items":[]}'
@@ -0,0 +1,43 @@
+# tests/test_core/test_http_cache.py
+from datetime import datetime
+
+from app.core.http_cache import (
+    cache_headers,
+    etag_matches,
+    format_http_date,
+    is_not_modified,
+    make_etag,
+)
+
+
+def test_make_etag():
+    """Тест: ETag зависит только от версии"""
+    updated_at = datetime(2024, 5, 1, 12, 0, 0, 123456)
+    etag = make_etag([1, updated_at, 3])
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag([1, updated_at, 3]) == etag
+    assert make_etag([1, updated_at, 4]) != etag
+
+
+def test_etag_matches():
+    """Тест разбора If-None-Match"""
+    etag = make_etag([1])
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"a", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"a"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_is_not_modified_uses_etag_only():
+    """Тест: условный запрос проверяется только по If-None-Match"""
+    last_modified = datetime(2024, 5, 1, 12, 0, 0, 900000)
+    etag = make_etag([1])
+    assert is_not_modified({"if-none-match": etag}, etag)
+    assert not is_not_modified({"if-none-match": '"old"'}, etag)
+    # Дата не учитывает счетчики - If-Modified-Since не дает 304
+    assert not is_not_modified({"if-modified-since": format_http_date(last_modified)}, etag)
+
+    headers = cache_headers('"x"', "no-cache", last_modified)
+    assert headers["Last-Modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+    assert "Last-Modified" not in cache_headers('"x"', "no-cache")
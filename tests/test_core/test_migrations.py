@@ -0,0 +1,57 @@
+# tests/test_core/test_migrations.py
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.migrations import upgrade_schema
+
+def test_upgrade_schema_adds_columns(tmp_path):
+    """Тест добавления новых колонок и индексов в существующую таблицу"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # Таблица фрагментов в исходном виде, без счетчиков и индекса курсора
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE fragments ("
+            "id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, content TEXT NOT NULL, "
+            "language VARCHAR(50) NOT NULL, description TEXT, is_public BOOLEAN, "
+            "author_id INTEGER NOT NULL, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text(
+            "INSERT INTO fragments (title, content, language, author_id) "
+            "VALUES ('Old', 'x = 1', 'python', 1)"
+        ))
+
+    applied = upgrade_schema(engine)
+    assert applied
+
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("fragments")}
+    assert {"likes_count", "views_count"} <= columns
+    assert "ix_fragments_created_at_id" in {i["name"] for i in inspector.get_indexes("fragments")}
+    assert "users" in inspector.get_table_names()
+    assert "ix_tags_usage_count_desc_name" in {i["name"] for i in inspector.get_indexes("tags")}
+
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT likes_count, views_count FROM fragments")).one()
+    assert tuple(row) == (0, 0)
+
+    # Повторный запуск ничего не меняет
+    assert upgrade_schema(engine) == []
+    engine.dispose()
+
+def test_upgrade_schema_replaces_obsolete_index(tmp_path):
+    """Тест замены индекса популярных тегов индексом с usage_count DESC"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE tags (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL UNIQUE, "
+            "usage_count INTEGER NOT NULL DEFAULT 0, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text("CREATE INDEX ix_tags_usage_count_name ON tags (usage_count, name)"))
+
+    applied = upgrade_schema(engine)
+
+    assert "CREATE INDEX ix_tags_usage_count_desc_name" in applied
+    assert "DROP INDEX ix_tags_usage_count_name" in applied
+    indexes = {i["name"] for i in inspect(engine).get_indexes("tags")}
+    assert "ix_tags_usage_count_desc_name" in indexes
+    assert "ix_tags_usage_count_name" not in indexes
+    engine.dispose()
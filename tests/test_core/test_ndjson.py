@@ -0,0 +1,59 @@
+# tests/test_core/test_ndjson.py
+import asyncio
+import gzip
+import json
+from typing import List, Optional
+
+from app.core.ndjson import dumps_line, gzip_json_array_chunks, iter_lines, ndjson_chunks
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def _lines(*parts: bytes, max_line_bytes: int = 100) -> List[Optional[bytes]]:
+    async def _collect():
+        return [line async for line in iter_lines(_chunks(*parts), max_line_bytes)]
+    return asyncio.run(_collect())
+
+
+def test_iter_lines_across_chunks():
+    """Тест сборки строк, разрезанных между частями потока"""
+    assert _lines(b'{"a"', b": 1}\n{", b'"b": 2}\n\n', b'{"c": 3}') == [
+        b'{"a": 1}', b'{"b": 2}', b"", b'{"c": 3}'
+    ]
+
+def test_iter_lines_skips_long_lines():
+    """Тест пропуска слишком длинной строки без накопления в памяти"""
+    assert _lines(b"ok\n" + b"x" * 8, b"x" * 8, b"x\nnext\n", max_line_bytes=10) == [
+        b"ok", None, b"next"
+    ]
+
+def test_dumps_line():
+    """Тест сериализации записи"""
+    assert dumps_line({"name": "тег"}) == '{"name": "тег"}\n'.encode("utf-8")
+
+def _collect_chunks(stream) -> List[bytes]:
+    async def _collect():
+        return [chunk async for chunk in stream]
+    return asyncio.run(_collect())
+
+
+async def _records(count: int):
+    for i in range(count):
+        yield {"id": i, "title": f"Фрагмент {i}"}
+
+def test_ndjson_chunks_groups_records():
+    """Тест группировки записей NDJSON в части"""
+    chunks = _collect_chunks(ndjson_chunks(_records(10), chunk_size=64))
+    assert len(chunks) > 1
+    lines = b"".join(chunks).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(10))
+
+def test_gzip_json_array_chunks():
+    """Тест потокового gzip JSON-массива, включая пустой"""
+    chunks = _collect_chunks(gzip_json_array_chunks(_records(50), chunk_size=128))
+    records = json.loads(gzip.decompress(b"".join(chunks)))
+    assert [r["id"] for r in records] == list(range(50))
+    assert json.loads(gzip.decompress(b"".join(_collect_chunks(gzip_json_array_chunks(_records(0)))))) == []
@@ -0,0 +1,76 @@
+# tests/test_core/test_password_pool.py
+import asyncio
+import threading
+
+import pytest
+
+from app.core.password_pool import PasswordPoolBusy, PasswordWorkerPool
+from app.core.security import _hash_password, calibrate_bcrypt_rounds, pwd_context
+
+
+def test_password_pool_rejects_overflow():
+    """Тест отказа при переполнении очереди"""
+    pool = PasswordWorkerPool(workers=0, max_pending=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def _blocking() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    worker = threading.Thread(target=pool.run, args=(_blocking,))
+    worker.start()
+    started.wait(5)
+
+    with pytest.raises(PasswordPoolBusy):
+        pool.run(_blocking)
+
+    release.set()
+    worker.join()
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 1
+    assert stats["pending"] == 0
+
+def test_password_pool_runs_in_processes():
+    """Тест хеширования в отдельном процессе"""
+    pool = PasswordWorkerPool(workers=1, max_pending=4)
+    try:
+        hashed = pool.run(_hash_password, "secret", 4)
+    finally:
+        pool.shutdown()
+    assert hashed.startswith("$2b$04$")
+    assert pwd_context.verify("secret", hashed)
+
+def test_password_pool_run_async():
+    """Тест асинхронного ожидания результата пула"""
+    pool = PasswordWorkerPool(workers=1, max_pending=1)
+
+    async def _scenario() -> str:
+        # Вторая задача не помещается в очередь, пока первая ожидается
+        first = asyncio.ensure_future(pool.run_async(_hash_password, "secret", 4))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordPoolBusy):
+            await pool.run_async(_hash_password, "other", 4)
+        return await first
+
+    try:
+        hashed = asyncio.run(_scenario())
+    finally:
+        pool.shutdown()
+    assert pwd_context.verify("secret", hashed)
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 1
+    assert stats["pending"] == 0
+
+def test_calibrate_bcrypt_rounds():
+    """Тест подбора стоимости bcrypt"""
+    rounds, timings = calibrate_bcrypt_rounds(target_seconds=60, min_rounds=4, max_rounds=5)
+    assert rounds == 5
+    assert set(timings) == {4, 5}
+
+    # Недостижимая цель - минимальная стоимость
+    rounds, _ = calibrate_bcrypt_rounds(target_seconds=0, min_rounds=4, max_rounds=5)
+    assert rounds == 4
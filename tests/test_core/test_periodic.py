@@ -0,0 +1,38 @@
+# tests/test_core/test_periodic.py
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.periodic import PeriodicJob
+
+
+def test_periodic_job_run_once(db_session: Session):
+    """Тест однократного запуска задачи и учета ошибок"""
+    session_factory = sessionmaker(bind=db_session.get_bind())
+    calls = []
+
+    def _job(db: Session) -> int:
+        calls.append(db)
+        if len(calls) > 1:
+            raise RuntimeError("boom")
+        return 42
+
+    job = PeriodicJob("test-job", _job, session_factory, interval=60)
+    assert job.run_once() == 42
+    assert job.run_once() is None
+
+    stats = job.stats()
+    assert stats["runs"] == 1
+    assert stats["failures"] == 1
+    assert stats["last_result"] == 42
+
+def test_periodic_job_start_stop(db_session: Session):
+    """Тест запуска и остановки фонового потока"""
+    job = PeriodicJob("test-job", lambda db: None, sessionmaker(bind=db_session.get_bind()), interval=60)
+    job.start()
+    assert job.running
+    job.stop()
+    assert not job.running
+
+    # Нулевой интервал - поток не запускается
+    job.interval = 0
+    job.start()
+    assert not job.running
@@ -0,0 +1,35 @@
+# tests/test_core/test_pool_metrics.py
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.pool_metrics import PoolMetrics, instrumented_pool
+
+
+def test_pool_metrics_checkout_and_timeout(tmp_path):
+    """Тест учета выдачи соединений, заполнения пула и тайм-аутов"""
+    metrics = PoolMetrics()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        stats = metrics.snapshot(engine.pool)
+        assert stats["checkouts"] == 1
+        assert stats["in_use"] == 1
+
+        # Пул исчерпан - следующее соединение не выдается
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 0
+    assert stats["wait_max_ms"] >= 10
+    engine.dispose()
@@ -0,0 +1,29 @@
+# tests/test_core/test_tag_index.py
+from app.core.tag_index import TagIndex
+
+
+def test_tag_index_prefix_search_ranked_by_usage():
+    """Тест поиска по префиксу с ранжированием по использованию"""
+    index = TagIndex()
+    index.build([("python", 10), ("pytest", 25), ("pydantic", 3), ("java", 40)])
+
+    assert index.search("py") == [("pytest", 25), ("python", 10), ("pydantic", 3)]
+    assert index.search("py", limit=1) == [("pytest", 25)]
+    assert index.search("javascript") == []
+
+def test_tag_index_incremental_updates():
+    """Тест добавления, удаления и обновления счетчиков"""
+    index = TagIndex()
+    index.build([("rust", 5)])
+
+    index.add("ruby")
+    index.add("rust")  # Существующий тег не сбрасывается
+    assert index.search("ru") == [("rust", 5), ("ruby", 0)]
+
+    index.set_usage("ruby", 7)
+    assert index.search("ru")[0] == ("ruby", 7)
+
+    index.remove("ruby")
+    index.remove("missing")
+    assert index.search("ru") == [("rust", 5)]
+    assert len(index) == 1
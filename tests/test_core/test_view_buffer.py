@@ -0,0 +1,65 @@
+# tests/test_core/test_view_buffer.py
+import time
+
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.session import Session
+
+from app.core.view_buffer import ViewBuffer
+from app.models.fragment import Fragment
+from app.models.user import User
+from app.models.view import View
+
+def _make_fragment(db_session: Session, author: User) -> Fragment:
+    fragment = Fragment(title="Viewed", content="x = 1", language="python", author_id=author.id)
+    db_session.add(fragment)
+    db_session.commit()
+    db_session.refresh(fragment)
+    return fragment
+
+def test_flush_writes_batches(db_session: Session, normal_user: User):
+    """Тест записи накопленных просмотров пачками"""
+    fragment = _make_fragment(db_session, normal_user)
+    buffer = ViewBuffer(sessionmaker(bind=db_session.get_bind()), batch_size=2)
+
+    for i in range(5):
+        assert buffer.record(fragment.id, ip_address=f"10.0.0.{i}")
+    # Просмотр удаленного фрагмента пропускается
+    buffer.record(999999)
+
+    assert buffer.flush() == 5
+    stats = buffer.stats()
+    assert stats["queued"] == 0
+    assert stats["written"] == 5
+    assert stats["recorded"] == 6
+
+    db_session.refresh(fragment)
+    assert fragment.views_count == 5
+    assert db_session.query(View).filter(View.fragment_id == fragment.id).count() == 5
+
+def test_overflow_is_dropped(db_session: Session, normal_user: User):
+    """Тест отбрасывания просмотров при переполнении очереди"""
+    buffer = ViewBuffer(sessionmaker(bind=db_session.get_bind()), max_size=2)
+    assert buffer.record(1)
+    assert buffer.record(1)
+    assert not buffer.record(1)
+    assert buffer.stats()["dropped"] == 1
+
+def test_background_flush_and_drain(db_session: Session, normal_user: User):
+    """Тест фоновой записи по интервалу и дозаписи при остановке"""
+    fragment = _make_fragment(db_session, normal_user)
+    buffer = ViewBuffer(
+        sessionmaker(bind=db_session.get_bind()), batch_size=100, flush_interval=0.05
+    )
+    buffer.start()
+    try:
+        buffer.record(fragment.id)
+        deadline = time.monotonic() + 2
+        while buffer.written < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert buffer.written == 1
+    finally:
+        buffer.record(fragment.id)
+        buffer.stop()
+
+    assert not buffer.running
+    assert buffer.written == 2
@@ -0,0 +1,116 @@
+# tests/test_crud/test_content.py
+import pytest
+from sqlalchemy import Text, select, type_coerce
+from sqlalchemy.orm.session import Session
+
+from app.core.config import settings
+from app.core.content_store import pack_store
+from app.crud.content import (
+    PACK_PREFIX, collect_garbage, compact_pack, compress_content, migrate_inline, stats
+)
+from app.crud.fragment import create, delete, get_multi, update
+from app.models.content import ContentBlob
+from app.models.fragment import Fragment
+from app.models.user import User
+from app.schemas.fragment import FragmentCreate, FragmentUpdate
+
+LICENSE = "# Licensed under the Apache License, Version 2.0\n"
+
+
+def _blobs(db_session: Session) -> dict:
+    db_session.expire_all()
+    return {blob.content: blob.ref_count for blob in db_session.scalars(select(ContentBlob))}
+
+def test_shared_content(db_session: Session, normal_user: User):
+    """Тест общего содержимого: подсчет ссылок и удаление без ссылок"""
+    first = create(db_session, FragmentCreate(title="A", content=LICENSE, language="python"), author_id=normal_user.id)
+    second = create(db_session, FragmentCreate(title="B", content=LICENSE, language="python"), author_id=normal_user.id)
+    assert first.content_blob_id == second.content_blob_id
+    assert second.content == LICENSE
+    assert _blobs(db_session) == {LICENSE: 2}
+
+    update(db_session, db_fragment=second, fragment_update=FragmentUpdate(content="print(1)"))
+    assert second.content == "print(1)"
+    assert _blobs(db_session) == {LICENSE: 1, "print(1)": 1}
+
+    # Изменение только названия не трогает содержимое
+    update(db_session, db_fragment=second, fragment_update=FragmentUpdate(title="C", content="print(1)"))
+    assert _blobs(db_session) == {LICENSE: 1, "print(1)": 1}
+
+    delete(db_session, db_fragment=first)
+    assert _blobs(db_session) == {"print(1)": 1}
+
+    # Полнотекстовый поиск видит новое содержимое и не видит старое
+    fragments_list, total = get_multi(db_session, search_query="print")
+    assert total == 1
+    fragments_list, total = get_multi(db_session, search_query="Apache")
+    assert total == 0
+
+def test_migrate_inline(db_session: Session, normal_user: User):
+    """Тест переноса содержимого из строк фрагментов и сборки мусора"""
+    for title in ("A", "B", "C"):
+        db_session.add(Fragment(title=title, content=LICENSE, language="python", author_id=normal_user.id))
+    db_session.add(Fragment(title="D", content="other", language="python", author_id=normal_user.id))
+    db_session.commit()
+    assert stats(db_session)["inline_fragments"] == 4
+
+    assert migrate_inline(db_session, batch_size=2) == 4
+    assert migrate_inline(db_session) == 0
+    assert _blobs(db_session) == {LICENSE: 3, "other": 1}
+    data = stats(db_session)
+    assert data["inline_fragments"] == 0
+    assert data["blobs"] == 2
+    assert data["dedup_ratio"] > 1
+
+    fragments = db_session.scalars(select(Fragment).order_by(Fragment.id)).all()
+    assert [fragment.content for fragment in fragments] == [LICENSE] * 3 + ["other"]
+    fragments_list, total = get_multi(db_session, search_query="Apache")
+    assert total == 3
+
+    # Сборка мусора исправляет ref_count и удаляет содержимое без ссылок
+    db_session.query(ContentBlob).update({ContentBlob.ref_count: 0})
+    db_session.add(ContentBlob(hash="0" * 64, content="orphan", size=6, ref_count=1))
+    db_session.commit()
+    assert collect_garbage(db_session, batch_size=1) == 1
+    assert _blobs(db_session) == {LICENSE: 3, "other": 1}
+
+@pytest.fixture
+def pack(tmp_path, monkeypatch):
+    """Хранилище содержимого в pack-файлах во временном каталоге"""
+    monkeypatch.setattr(settings, "CONTENT_STORE", "pack")
+    monkeypatch.setattr(pack_store, "directory", str(tmp_path))
+    yield pack_store
+    pack_store.close()
+
+def test_pack_content(db_session: Session, normal_user: User, pack, monkeypatch):
+    """Тест хранения содержимого в pack-файлах и сжатия файлов"""
+    keep = create(db_session, FragmentCreate(title="Keep", content=LICENSE, language="python"), author_id=normal_user.id)
+    drop = create(db_session, FragmentCreate(title="Drop", content="x" * 1000, language="text"), author_id=normal_user.id)
+    stored = db_session.scalar(select(type_coerce(ContentBlob.content, Text)).where(ContentBlob.id == keep.content_blob_id))
+    assert stored.startswith(PACK_PREFIX)
+    assert pack.syncs >= 1
+    db_session.expire_all()
+    assert db_session.get(Fragment, keep.id).content == LICENSE
+    fragments_list, total = get_multi(db_session, search_query="Apache")
+    assert [item["fragment"].id for item in fragments_list] == [keep.id]
+
+    # Мало мусора - сжатие не нужно
+    assert compact_pack(db_session, min_garbage=0.5) is None
+    delete(db_session, db_fragment=drop)
+    result = compact_pack(db_session, min_garbage=0.5)
+    assert result["moved"] == 1
+    assert pack.generations() == [1, 2]
+    db_session.expire_all()
+    assert db_session.get(Fragment, keep.id).content == LICENSE
+
+    # Следующее сжатие удаляет поколение, перенесенное предыдущим
+    compact_pack(db_session)
+    assert pack.generations() == [2, 3]
+    db_session.expire_all()
+    assert db_session.get(Fragment, keep.id).content == LICENSE
+
+    # Возврат содержимого в БД
+    monkeypatch.setattr(settings, "CONTENT_STORE", "database")
+    assert compress_content(db_session) == 1
+    stored = db_session.scalar(select(type_coerce(ContentBlob.content, Text)).where(ContentBlob.id == keep.content_blob_id))
+    assert stored == LICENSE
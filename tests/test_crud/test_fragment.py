@@ -1,10 +1,19 @@
 # tests/test_crud/test_fragment.py
+import pytest
+from sqlalchemy import text
 from sqlalchemy.orm.session import Session
 
 from app.crud.fragment import (
-    get_by_id, get_multi, create, update, delete, add_view
+    create_bulk,
+    get_by_id, get_multi, create, update, delete, add_view, reconcile_counters,
+    encode_cursor, fill_previews
 )
+from app.core.compression import COMPRESSED_PREFIX
+from app.core.config import settings
+from app.crud.content import compress_content
+from app.crud.like import create as create_like
 from app.schemas.fragment import FragmentCreate, FragmentUpdate
+from app.models.base import utcnow
 from app.models.fragment import Fragment
 from app.models.user import User
 from app.models.tag import Tag
@@ -37,11 +46,8 @@ def test_get_by_id(db_session: Session, normal_user: User):
     assert fragment_data["is_liked_by_current_user"] is False
 
     # Добавляем лайк и просмотр
-    like = Like(fragment_id=test_fragment.id, user_id=normal_user.id)
-    view = View(fragment_id=test_fragment.id, user_id=normal_user.id)
-    db_session.add(like)
-    db_session.add(view)
-    db_session.commit()
+    create_like(db_session, fragment_id=test_fragment.id, user_id=normal_user.id)
+    add_view(db_session, fragment_id=test_fragment.id, user_id=normal_user.id)
 
     # Вызов тестируемой функции с текущим пользователем
     fragment_data = get_by_id(db_session, fragment_id=test_fragment.id, current_user_id=normal_user.id)
@@ -204,3 +210,295 @@ def test_create(db_session: Session, normal_user: User):
     assert created_fragment.content == fragment_create.content
     assert created_fragment.language == fragment_create.language
     assert created_fragment.description == fragment_create.description
+
+def test_counters_not_multiplied(db_session: Session, normal_user: User, admin_user: User):
+    """Тест счетчиков: лайки и просмотры не перемножаются"""
+    fragment = Fragment(
+        title="Popular Fragment",
+        content="print('popular')",
+        language="python",
+        is_public=True,
+        author_id=normal_user.id
+    )
+    db_session.add(fragment)
+    db_session.commit()
+    db_session.refresh(fragment)
+
+    create_like(db_session, fragment_id=fragment.id, user_id=normal_user.id)
+    create_like(db_session, fragment_id=fragment.id, user_id=admin_user.id)
+    for _ in range(3):
+        add_view(db_session, fragment_id=fragment.id, ip_address="127.0.0.1")
+
+    fragment_data = get_by_id(db_session, fragment_id=fragment.id, current_user_id=admin_user.id)
+    assert fragment_data["likes_count"] == 2
+    assert fragment_data["views_count"] == 3
+    assert fragment_data["is_liked_by_current_user"] is True
+
+    fragments_list, total = get_multi(
+        db_session, current_user_id=normal_user.id, filter_liked_by_user=admin_user.id
+    )
+    assert total == 1
+    assert fragments_list[0]["likes_count"] == 2
+    assert fragments_list[0]["is_liked_by_current_user"] is True
+
+def test_reconcile_counters(db_session: Session, normal_user: User):
+    """Тест пересчета счетчиков по исходным таблицам"""
+    fragments = [
+        Fragment(title=f"Fragment {i}", content="x = 1", language="python", author_id=normal_user.id)
+        for i in range(3)
+    ]
+    db_session.add_all(fragments)
+    db_session.commit()
+
+    # Записи, добавленные в обход CRUD, счетчики не обновляют
+    db_session.add(Like(fragment_id=fragments[0].id, user_id=normal_user.id))
+    db_session.add(View(fragment_id=fragments[1].id))
+    db_session.add(View(fragment_id=fragments[1].id))
+    db_session.commit()
+
+    fixed = reconcile_counters(db_session, batch_size=2)
+    assert fixed == 2
+
+    db_session.expire_all()
+    assert fragments[0].likes_count == 1
+    assert fragments[1].views_count == 2
+    assert fragments[2].likes_count == 0
+
+    # Повторный запуск ничего не меняет
+    assert reconcile_counters(db_session) == 0
+
+def test_get_multi_cursor(db_session: Session, normal_user: User):
+    """Тест постраничного вывода по курсору"""
+    fragments = [
+        Fragment(title=f"Fragment {i}", content="x = 1", language="python", author_id=normal_user.id)
+        for i in range(5)
+    ]
+    db_session.add_all(fragments)
+    db_session.commit()
+
+    seen = []
+    cursor = ""
+    while True:
+        page, total = get_multi(db_session, limit=2, cursor=cursor, with_total=False)
+        assert total is None
+        seen.extend(item["fragment"].id for item in page)
+        if len(page) < 2:
+            break
+        cursor = encode_cursor(page[-1]["fragment"])
+
+    # Все фрагменты без повторов, от новых к старым
+    assert seen == sorted((f.id for f in fragments), reverse=True)
+
+    # Поврежденный курсор
+    with pytest.raises(ValueError):
+        get_multi(db_session, cursor="not-a-cursor")
+
+def test_get_multi_total_with_joined_filters(db_session: Session, normal_user: User, admin_user: User):
+    """Тест total при одновременном фильтре по тегу и лайку"""
+    tag = Tag(name="combined")
+    fragments = [
+        Fragment(title=f"Fragment {i}", content="x = 1", language="python", author_id=normal_user.id)
+        for i in range(3)
+    ]
+    fragments[0].tags.append(tag)
+    fragments[1].tags.append(tag)
+    db_session.add_all(fragments)
+    db_session.commit()
+
+    for fragment in fragments:
+        create_like(db_session, fragment_id=fragment.id, user_id=normal_user.id)
+        create_like(db_session, fragment_id=fragment.id, user_id=admin_user.id)
+
+    fragments_list, total = get_multi(
+        db_session, filter_tag="combined", filter_liked_by_user=admin_user.id
+    )
+    assert total == 2
+    assert len(fragments_list) == 2
+
+def test_get_multi_search_relevance(db_session: Session, normal_user: User):
+    """Тест полнотекстового поиска с сортировкой по релевантности"""
+    weak = create(db_session, FragmentCreate(
+        title="Utilities", content="def helper(): pass  # parser", language="python"
+    ), author_id=normal_user.id)
+    strong = create(db_session, FragmentCreate(
+        title="Config parser", content="def parse(): parser = Parser()  # parser",
+        language="python", description="parser for config files"
+    ), author_id=normal_user.id)
+    create(db_session, FragmentCreate(
+        title="Unrelated", content="print('hi')", language="python"
+    ), author_id=normal_user.id)
+
+    fragments_list, total = get_multi(db_session, search_query="parser", sort="relevance")
+    assert total == 2
+    assert [item["fragment"].id for item in fragments_list] == [strong.id, weak.id]
+
+    # Индекс следует за изменениями и удалением
+    update(db_session, db_fragment=weak, fragment_update=FragmentUpdate(content="def helper(): pass"))
+    delete(db_session, db_fragment=strong)
+    fragments_list, total = get_multi(db_session, search_query="parser")
+    assert total == 0
+
+    # Спецсимволы в запросе не ломают поиск
+    fragments_list, total = get_multi(db_session, search_query='json.loads("')
+    assert total == 0
+
+    with pytest.raises(ValueError):
+        get_multi(db_session, search_query="parser", sort="relevance", cursor="")
+
+def test_get_multi_code_search(db_session: Session, normal_user: User):
+    """Тест поиска по индексу кода"""
+    target = create(db_session, FragmentCreate(
+        title="Lookup", content="user = repo.findUserByEmail(email)", language="python"
+    ), author_id=normal_user.id)
+    create(db_session, FragmentCreate(
+        title="Other", content="find_order(order_id)", language="python"
+    ), author_id=normal_user.id)
+
+    fragments_list, total = get_multi(
+        db_session, search_query="find user email", search_mode="code", sort="relevance"
+    )
+    assert total == 1
+    assert fragments_list[0]["fragment"].id == target.id
+
+    # Индекс обновляется при изменении и удалении
+    update(db_session, db_fragment=target, fragment_update=FragmentUpdate(content="noop()"))
+    fragments_list, total = get_multi(db_session, search_query="findUserByEmail", search_mode="code")
+    assert total == 0
+
+def test_code_index_external_changes(db_session: Session, normal_user: User):
+    """Тест: изменения, внесенные в обход индекса (другим процессом), попадают в поиск"""
+    create(db_session, FragmentCreate(title="First", content="load_settings()", language="python"),
+           author_id=normal_user.id)
+    assert get_multi(db_session, search_query="load_settings", search_mode="code")[1] == 1
+
+    # Запись другого процесса: индекс этого процесса о ней не знает
+    external = Fragment(title="External", content="parse_manifest(path)", language="python",
+                        author_id=normal_user.id)
+    db_session.add(external)
+    db_session.commit()
+    assert get_multi(db_session, search_query="parse_manifest", search_mode="code")[1] == 1
+
+    db_session.execute(
+        text("UPDATE fragments SET content = 'render_page()', updated_at = :now WHERE id = :id"),
+        {"now": utcnow(), "id": external.id}
+    )
+    db_session.commit()
+    assert get_multi(db_session, search_query="parse_manifest", search_mode="code")[1] == 0
+    assert get_multi(db_session, search_query="render_page", search_mode="code")[1] == 1
+
+    db_session.execute(text("DELETE FROM fragments WHERE id = :id"), {"id": external.id})
+    db_session.commit()
+    assert get_multi(db_session, search_query="render_page", search_mode="code")[1] == 0
+
+def test_create_bulk_query_count(db_session: Session, normal_user: User, count_queries):
+    """Тест: число запросов пачки не зависит от числа фрагментов"""
+    def _batch(size: int) -> list[FragmentCreate]:
+        return [
+            FragmentCreate(title=f"F{i}", content=f"value_{i} = {i}", language="python", tags=["bulk", f"t{i}"])
+            for i in range(size)
+        ]
+
+    with count_queries() as small:
+        create_bulk(db_session, _batch(2), author_id=normal_user.id)
+    with count_queries() as large:
+        ids = create_bulk(db_session, _batch(20), author_id=normal_user.id)
+
+    assert len(ids) == 20
+    assert large.count <= small.count + 2
+    # ID возвращаются в порядке входных данных
+    titles = {f.id: f.title for f in db_session.query(Fragment).filter(Fragment.id.in_(ids))}
+    assert [titles[fragment_id] for fragment_id in ids] == [f"F{i}" for i in range(20)]
+    assert db_session.query(Tag).filter(Tag.name == "bulk").one().usage_count == 22
+
+def test_compressed_content(db_session: Session, normal_user: User, monkeypatch):
+    """Тест прозрачного сжатия содержимого, поиска и команды перезаписи"""
+    plain = create(db_session, FragmentCreate(
+        title="Old", content="def old_handler():\n    pass\n" * 200, language="python"
+    ), author_id=normal_user.id)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_MIN_BYTES", 256)
+    fresh = create(db_session, FragmentCreate(
+        title="New", content="def new_handler():\n    pass\n" * 200, language="python"
+    ), author_id=normal_user.id)
+
+    def stored(fragment_id):
+        return db_session.execute(
+            text(
+                "SELECT b.content FROM content_blobs b JOIN fragments f ON f.content_blob_id = b.id "
+                "WHERE f.id = :id"
+            ),
+            {"id": fragment_id}
+        ).scalar()
+
+    assert stored(plain.id) == plain.content
+    assert stored(fresh.id).startswith(COMPRESSED_PREFIX)
+    db_session.expire_all()
+    assert get_by_id(db_session, fresh.id)["fragment"].content.startswith("def new_handler")
+
+    # Сжатое содержимое находится всеми видами поиска
+    for search_mode in ("fulltext", "substring", "regex", "code"):
+        fragments_list, total = get_multi(db_session, search_query="new_handler", search_mode=search_mode)
+        assert [item["fragment"].id for item in fragments_list] == [fresh.id], search_mode
+
+    updated_at = get_by_id(db_session, plain.id)["fragment"].updated_at
+    assert compress_content(db_session, batch_size=1) == 1
+    assert stored(plain.id).startswith(COMPRESSED_PREFIX)
+    db_session.expire_all()
+    assert get_by_id(db_session, plain.id)["fragment"].updated_at == updated_at
+    fragments_list, total = get_multi(db_session, search_query="old_handler", search_mode="fulltext")
+    assert total == 1
+
+    # При отключенном сжатии команда возвращает исходный текст
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", "none")
+    assert compress_content(db_session) == 2
+    assert stored(plain.id).startswith("def old_handler")
+
+def test_get_multi_summary(db_session: Session, normal_user: User, count_queries):
+    """Тест краткого списка: содержимое не загружается, превью заполняется"""
+    fresh = create(db_session, FragmentCreate(
+        title="Fresh", content="\n".join(f"line {i}" for i in range(8)), language="python"
+    ), author_id=normal_user.id)
+    old = create(db_session, FragmentCreate(
+        title="Old", content="a = 1\nb = 2\n", language="python"
+    ), author_id=normal_user.id)
+    # Строка, записанная до появления превью
+    db_session.execute(
+        text("UPDATE fragments SET content_preview = NULL, line_count = NULL WHERE id = :id"),
+        {"id": old.id}
+    )
+    db_session.commit()
+    db_session.expire_all()
+
+    with count_queries() as counter:
+        fragments_list, total = get_multi(db_session, summary=True)
+    by_id = {item["fragment"].id: item["fragment"] for item in fragments_list}
+    assert by_id[fresh.id].content_preview == "line 0\nline 1\nline 2\nline 3\nline 4"
+    assert by_id[fresh.id].line_count == 8
+    assert (by_id[old.id].content_preview, by_id[old.id].line_count) == ("a = 1\nb = 2", 2)
+    # Содержимое выбирается только для строк без превью
+    content_queries = [s for s in counter.statements if "content_blobs" in s]
+    assert len(content_queries) == 1
+    assert "_content" not in by_id[fresh.id].__dict__
+
+    # Превью, вычисленное при чтении, не сохраняется; команда сохраняет его
+    assert not db_session.dirty
+    assert fill_previews(db_session, batch_size=1) == 1
+    db_session.expire_all()
+    assert db_session.get(Fragment, old.id).line_count == 2
+    assert fill_previews(db_session) == 0
+
+def test_mysql_search_filters_by_match_predicates():
+    """Тест поиска в MySQL: отбор объединением MATCH, а не по сумме релевантности"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects import mysql
+    from app.crud.search import apply_search
+
+    # Соединение не открывается: запрос только компилируется
+    engine = create_engine("mysql+pymysql://user@localhost/db")
+    query, order_by = apply_search(Session(engine).query(Fragment.id), "handler")
+    sql = str(query.order_by(order_by).statement.compile(dialect=mysql.dialect()))
+
+    where = sql.split("WHERE", 1)[1].split("ORDER BY")[0]
+    assert "UNION" in where
+    assert where.count("MATCH") == 2
+    assert " + " not in where
@@ -0,0 +1,51 @@
+# tests/test_crud/test_like.py
+from sqlalchemy.orm.session import Session
+
+from app.crud.like import create, delete, get_by_fragment_and_user
+from app.models.fragment import Fragment
+from app.models.user import User
+
+def test_create_and_delete_update_counter(db_session: Session, normal_user: User):
+    """Тест изменения счетчика лайков при создании и удалении лайка"""
+    fragment = Fragment(
+        title="Liked Fragment",
+        content="print('like')",
+        language="python",
+        author_id=normal_user.id
+    )
+    db_session.add(fragment)
+    db_session.commit()
+    db_session.refresh(fragment)
+
+    like = create(db_session, fragment_id=fragment.id, user_id=normal_user.id)
+    assert like.id is not None
+    db_session.refresh(fragment)
+    assert fragment.likes_count == 1
+
+    # Повторный лайк не увеличивает счетчик
+    assert create(db_session, fragment_id=fragment.id, user_id=normal_user.id).id == like.id
+    db_session.refresh(fragment)
+    assert fragment.likes_count == 1
+
+    assert delete(db_session, db_like=like) is True
+    assert get_by_fragment_and_user(db_session, fragment_id=fragment.id, user_id=normal_user.id) is None
+    db_session.refresh(fragment)
+    assert fragment.likes_count == 0
+
+def test_counter_keeps_updated_at(db_session: Session, normal_user: User):
+    """Тест: изменение счетчика не меняет время обновления фрагмента"""
+    fragment = Fragment(
+        title="Stable Fragment",
+        content="print('stable')",
+        language="python",
+        author_id=normal_user.id
+    )
+    db_session.add(fragment)
+    db_session.commit()
+    db_session.refresh(fragment)
+    updated_at = fragment.updated_at
+
+    create(db_session, fragment_id=fragment.id, user_id=normal_user.id)
+    db_session.refresh(fragment)
+    assert fragment.likes_count == 1
+    assert fragment.updated_at == updated_at
@@ -2,11 +2,16 @@
 from sqlalchemy.orm.session import Session
 
 from datetime import datetime
+from app.core.tag_index import tag_index
+from app.crud import tag as tag_crud
 from app.crud.tag import (
     get_by_id, get_by_name, get_multi, create, get_or_create,
     get_or_create_tags, delete
 )
+from app.crud.fragment import create as create_fragment, delete as delete_fragment, update as update_fragment
+from app.schemas.fragment import FragmentCreate, FragmentUpdate
 from app.schemas.tag import TagCreate
+from app.models.user import User
 from app.models.tag import Tag
 
 def test_get_by_id(db_session: Session):
@@ -141,6 +146,38 @@ def test_get_or_create_tags(db_session: Session):
     assert any(tag.name == "new-tag1" for tag in tags)
     assert any(tag.name == "new-tag2" for tag in tags)
 
+def test_get_or_create_tags_batched(db_session: Session, count_queries):
+    """Тест: теги разрешаются фиксированным числом запросов"""
+    db_session.add(Tag(name="existing-tag"))
+    db_session.commit()
+    tag_names = ["Existing-Tag"] + [f"tag-{i}" for i in range(15)] + ["tag-0 "]
+
+    with count_queries() as counter:
+        tags = get_or_create_tags(db_session, tag_names=tag_names)
+
+    # Выборка существующих, вставка недостающих, повторная выборка
+    assert counter.count == 3
+    # Имена нормализованы, повторы удалены, порядок сохранен
+    assert [tag.name for tag in tags] == ["existing-tag"] + [f"tag-{i}" for i in range(15)]
+    assert all(tag.id is not None for tag in tags)
+
+def test_get_or_create_tags_concurrent_insert(db_session: Session, monkeypatch):
+    """Тест: тег, созданный параллельно между выборкой и вставкой, не вызывает ошибку"""
+    original = tag_crud._insert_ignore
+
+    def _insert_after_concurrent_creator(db):
+        # Параллельный запрос успел создать тег
+        db.add(Tag(name="race-tag"))
+        db.flush()
+        return original(db)
+
+    monkeypatch.setattr(tag_crud, "_insert_ignore", _insert_after_concurrent_creator)
+
+    tags = get_or_create_tags(db_session, tag_names=["race-tag", "other-tag"])
+
+    assert [tag.name for tag in tags] == ["race-tag", "other-tag"]
+    assert db_session.query(Tag).filter(Tag.name == "race-tag").count() == 1
+
 def test_delete(db_session: Session):
     """Тест удаления тега"""
     # Создаем тестовый тег
@@ -155,3 +192,63 @@ def test_delete(db_session: Session):
     # Проверка результата
     assert result is True
     assert get_by_id(db_session, tag_id=test_tag.id) is None
+
+def test_tag_index_updated_after_commit_only(db_session: Session):
+    """Тест: новые теги попадают в индекс автодополнения только после коммита"""
+    tag_index.build([])
+
+    get_or_create_tags(db_session, tag_names=["rolled-back"])
+    db_session.rollback()
+    assert tag_index.search("rolled") == []
+
+    get_or_create_tags(db_session, tag_names=["committed"])
+    assert tag_index.search("committed") == []
+    db_session.commit()
+    assert tag_index.search("committed") == [("committed", 0)]
+
+    delete(db_session, db_tag=get_by_name(db_session, name="committed"))
+    assert tag_index.search("committed") == []
+
+def _usage(db_session: Session) -> dict:
+    db_session.expire_all()
+    return {tag.name: tag.usage_count for tag in db_session.query(Tag)}
+
+def test_usage_count_follows_fragment_tags(db_session: Session, normal_user: User):
+    """Тест поддержки usage_count при создании, изменении и удалении фрагментов"""
+    first = create_fragment(
+        db_session,
+        FragmentCreate(title="A", content="x", language="python", tags=["python", "web"]),
+        author_id=normal_user.id,
+    )
+    create_fragment(
+        db_session,
+        FragmentCreate(title="B", content="y", language="python", tags=["python"]),
+        author_id=normal_user.id,
+    )
+    assert _usage(db_session) == {"python": 2, "web": 1}
+
+    update_fragment(db_session, db_fragment=first, fragment_update=FragmentUpdate(tags=["web", "api"]))
+    assert _usage(db_session) == {"python": 1, "web": 1, "api": 1}
+
+    delete_fragment(db_session, db_fragment=first)
+    assert _usage(db_session) == {"python": 1, "web": 0, "api": 0}
+
+    tags, _ = get_multi(db_session, sort="popular")
+    assert [tag.name for tag in tags] == ["python", "api", "web"]
+    assert [tag.name for tag in tag_crud.get_popular(db_session)] == ["python"]
+
+def test_reconcile_usage(db_session: Session, normal_user: User):
+    """Тест исправления расхождений usage_count"""
+    create_fragment(
+        db_session,
+        FragmentCreate(title="A", content="x", language="python", tags=["python"]),
+        author_id=normal_user.id,
+    )
+    drifted = get_by_name(db_session, name="python")
+    drifted.usage_count = 7
+    db_session.add(Tag(name="unused", usage_count=3))
+    db_session.commit()
+
+    assert tag_crud.reconcile_usage(db_session, batch_size=1) == 2
+    assert _usage(db_session) == {"python": 1, "unused": 0}
+    assert tag_crud.reconcile_usage(db_session) == 0
@@ -0,0 +1,97 @@
+# tests/test_crud/test_trigram.py
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm.session import Session
+
+from app.core.config import settings
+from app.crud import trigram as trigram_crud
+from app.crud.fragment import create, update, delete, get_multi
+from app.crud.trigram import required_literals, trigrams, rebuild
+from app.models.fragment import Fragment
+from app.models.trigram import fragment_trigram
+from app.models.user import User
+from app.schemas.fragment import FragmentCreate, FragmentUpdate
+
+def test_trigrams():
+    """Тест разбиения текста на триграммы"""
+    assert trigrams("AbcD") == {"abc", "bcd"}
+    assert trigrams("ab") == set()
+
+def test_required_literals():
+    """Тест извлечения обязательных литералов из регулярного выражения"""
+    assert required_literals(r"json\.loads\(") == ["json.loads("]
+    assert required_literals(r"def \w+_config\(") == ["def ", "_config("]
+    assert required_literals(r"(import|from) os") == [" os"]
+    assert required_literals(r"a|bcd") == []
+    assert required_literals(r"(?:abc)?x") == []
+    assert required_literals(r"(?i)\x41bc{2,3}def") == ["def"]
+    assert required_literals(r"a{bcd") == ["a{bcd"]
+    assert required_literals(r"[a\]]+_handler|x") == []
+    assert required_literals(r"(?P<name>load)_data\+") == ["load", "_data+"]
+
+def test_regex_complexity_limits(db_session: Session):
+    """Тест отказа от выражений с катастрофическим перебором"""
+    for pattern in (r"(abc+)+$", r"(abc|abd)*x", r"(abc)\1", "abc" + r"\w*" * 9, "abc" * 100):
+        with pytest.raises(ValueError):
+            get_multi(db_session, search_query=pattern, search_mode="regex")
+
+def test_substring_decoded_limit(db_session: Session, normal_user: User, monkeypatch):
+    """Тест ограничения числа распаковываемых сжатых кандидатов"""
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_MIN_BYTES", 16)
+    for i in range(3):
+        create(db_session, FragmentCreate(
+            title=f"F{i}", content=f"value_{i} = 1\n" * 50, language="python"
+        ), author_id=normal_user.id)
+
+    assert get_multi(db_session, search_query="e_1", search_mode="substring")[1] == 1
+    monkeypatch.setattr(trigram_crud, "SUBSTRING_MAX_DECODED", 2)
+    with pytest.raises(ValueError):
+        get_multi(db_session, search_query="=", search_mode="substring")
+
+def test_substring_and_regex_search(db_session: Session, normal_user: User):
+    """Тест поиска подстроки и регулярного выражения"""
+    target = create(db_session, FragmentCreate(
+        title="Loader", content="data = json.loads(raw)", language="python"
+    ), author_id=normal_user.id)
+    create(db_session, FragmentCreate(
+        title="Dumper", content="raw = json.dumps(data)", language="python"
+    ), author_id=normal_user.id)
+
+    fragments_list, total = get_multi(db_session, search_query="JSON.loads(", search_mode="substring")
+    assert total == 1
+    assert fragments_list[0]["fragment"].id == target.id
+
+    # Все триграммы присутствуют, но подстроки нет - отсеивается проверкой
+    fragments_list, total = get_multi(db_session, search_query="data = json.dumps", search_mode="substring")
+    assert total == 0
+
+    fragments_list, total = get_multi(db_session, search_query=r"json\.(loads|dumps)\(", search_mode="regex")
+    assert total == 2
+
+    with pytest.raises(ValueError):
+        get_multi(db_session, search_query="a.b", search_mode="regex")
+    with pytest.raises(ValueError):
+        get_multi(db_session, search_query="abc(", search_mode="regex")
+
+    # Индекс следует за изменениями содержимого
+    update(db_session, db_fragment=target, fragment_update=FragmentUpdate(content="pickle.loads(raw)"))
+    fragments_list, total = get_multi(db_session, search_query="json.loads(", search_mode="substring")
+    assert total == 0
+
+    fragment_id = target.id
+    delete(db_session, db_fragment=target)
+    rows = db_session.execute(
+        select(fragment_trigram).where(fragment_trigram.c.fragment_id == fragment_id)
+    ).all()
+    assert rows == []
+
+def test_rebuild(db_session: Session, normal_user: User):
+    """Тест построения триграмм для фрагментов, добавленных в обход CRUD"""
+    fragment = Fragment(title="Raw", content="select * from t", language="sql", author_id=normal_user.id)
+    db_session.add(fragment)
+    db_session.commit()
+
+    assert rebuild(db_session, batch_size=1) >= 1
+    fragments_list, total = get_multi(db_session, search_query="* FROM", search_mode="substring")
+    assert total == 1
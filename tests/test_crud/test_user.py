@@ -9,7 +9,9 @@ from app.crud.user import (
 )
 from app.schemas.user import UserCreate, UserUpdate
 from app.models.user import User
-from app.core.security import verify_password
+from app.core.config import settings
+from app.core.security import _hash_password, verify_password
+from app.core.auth_cache import AuthPrincipal, principal_cache
 
 def test_get_by_id(db_session: Session, normal_user: User):
     """Тест получения пользователя по ID"""
@@ -125,3 +127,27 @@ def test_delete(db_session: Session, normal_user: User):
     # Проверка результата
     assert result is True
     assert get_by_id(db_session, user_id=normal_user.id) is None
+
+def test_update_and_delete_invalidate_auth_cache(db_session: Session, normal_user: User):
+    """Тест сброса кэша пользователя при обновлении и удалении"""
+    principal_cache.put(AuthPrincipal.from_user(normal_user))
+
+    update(db_session, db_user=normal_user, user_update=UserUpdate(bio="Changed"))
+    assert principal_cache.get(normal_user.id) is None
+
+    principal_cache.put(AuthPrincipal.from_user(normal_user))
+    user_id = normal_user.id
+    delete(db_session, db_user=normal_user)
+    assert principal_cache.get(user_id) is None
+
+def test_authenticate_rehashes_on_cost_change(db_session: Session, normal_user: User, monkeypatch):
+    """Тест перехеширования пароля при входе после смены стоимости bcrypt"""
+    normal_user.hashed_password = _hash_password("password123", 4)
+    db_session.commit()
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+    user = authenticate(db_session, email=normal_user.email, password="password123")
+
+    assert user is not None
+    assert user.hashed_password.startswith("$2b$05$")
+    assert verify_password("password123", user.hashed_password)
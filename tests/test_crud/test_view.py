@@ -0,0 +1,46 @@
+# tests/test_crud/test_view.py
+from datetime import timedelta
+
+from sqlalchemy.orm.session import Session
+
+from app.crud.fragment import reconcile_counters
+from app.crud.view import compact_views, count_views, get_daily_views
+from app.models.base import utcnow
+from app.models.fragment import Fragment
+from app.models.user import User
+from app.models.view import View, ViewRollup
+
+def test_compact_views(db_session: Session, normal_user: User):
+    """Тест свертки старых просмотров в суточные сводки"""
+    fragment = Fragment(title="Old", content="x = 1", language="python", author_id=normal_user.id)
+    db_session.add(fragment)
+    db_session.commit()
+
+    old_day = utcnow() - timedelta(days=40)
+    db_session.add_all([
+        View(fragment_id=fragment.id, user_id=normal_user.id, ip_address="1.1.1.1", created_at=old_day),
+        View(fragment_id=fragment.id, user_id=normal_user.id, ip_address="2.2.2.2", created_at=old_day),
+        View(fragment_id=fragment.id, ip_address="2.2.2.2", created_at=old_day - timedelta(days=1)),
+        View(fragment_id=fragment.id, ip_address="3.3.3.3"),
+    ])
+    db_session.commit()
+
+    assert compact_views(db_session, older_than_days=30, batch_size=1) == 3
+
+    rollups = db_session.query(ViewRollup).order_by(ViewRollup.day).all()
+    assert [(r.views, r.unique_users, r.unique_ips) for r in rollups] == [(1, 0, 1), (2, 1, 2)]
+    # Остался только свежий просмотр
+    assert db_session.query(View).filter(View.fragment_id == fragment.id).count() == 1
+
+    # Счетчики и статистика учитывают сводки и хвост
+    assert count_views(db_session, fragment.id) == 4
+    daily = get_daily_views(db_session, fragment.id)
+    assert [item["views"] for item in daily] == [1, 2, 1]
+    assert len(get_daily_views(db_session, fragment.id, since=utcnow().date())) == 1
+
+    reconcile_counters(db_session)
+    db_session.refresh(fragment)
+    assert fragment.views_count == 4
+
+    # Повторный запуск ничего не сворачивает
+    assert compact_views(db_session, older_than_days=30) == 0